@@ -1,11 +1,69 @@
 """Main menu bar application for Claude Window Manager."""
 
-import rumps
+from datetime import datetime
 
-from .window_detector import get_claude_sessions, switch_to_window, get_session_count
+import objc
+import rumps
+from Foundation import NSNotificationCenter, NSObject
+from PyObjCTools.AppHelper import callAfter
+
+from .applescript import use_persistent_runner
+from .diff import SessionDiff, diff_sessions
+from .indexer import connect_or_start, follow_changes
+from .metrics import configure as configure_metrics, timed
+from .refresh import SingleFlight
+from .sampler import describe_usage
+from .scheduler import AdaptiveScheduler, Poller
+from .window_detector import switch_to_window
 from .session import ClaudeSession
 
 
+class _SessionRows:
+    """Menu items for one session, reused across refreshes."""
+
+    def __init__(self, window_id: int, callback):
+        self.window_id = window_id
+        self.item = rumps.MenuItem(f"session-{window_id}", callback=callback)
+        self.topic_item = rumps.MenuItem(f"session-{window_id}-topic")
+        self.topic_item.set_callback(None)
+        self.runtime_item = rumps.MenuItem(f"session-{window_id}-runtime")
+        self.runtime_item.set_callback(None)
+        self.texts = ("", "", "")
+
+    def set_texts(self, texts: tuple[str, str, str]) -> None:
+        """Retitle only the items whose text changed."""
+        if texts == self.texts:
+            return
+        for item, old, new in zip((self.item, self.topic_item, self.runtime_item), self.texts, texts):
+            if old != new:
+                item.title = new
+        self.texts = texts
+
+
+class _MenuTracking(NSObject):
+    """Reports when the status menu opens and closes."""
+
+    def initWithCallback_(self, callback):
+        self = objc.super(_MenuTracking, self).init()
+        if self is None:
+            return None
+        self.callback = callback
+        center = NSNotificationCenter.defaultCenter()
+        center.addObserver_selector_name_object_(
+            self, "menuDidBeginTracking:", "NSMenuDidBeginTrackingNotification", None
+        )
+        center.addObserver_selector_name_object_(
+            self, "menuDidEndTracking:", "NSMenuDidEndTrackingNotification", None
+        )
+        return self
+
+    def menuDidBeginTracking_(self, notification):
+        self.callback(True)
+
+    def menuDidEndTracking_(self, notification):
+        self.callback(False)
+
+
 class ClaudeWindowManager(rumps.App):
     """Menu bar app for managing Claude Code windows."""
 
@@ -16,7 +74,30 @@ class ClaudeWindowManager(rumps.App):
             quit_button=None,  # We'll add our own
         )
         self.sessions: list[ClaudeSession] = []
-        self.refresh_sessions(None)
+        self.resources: dict[str, dict] = {}  # CPU and memory history per session pid
+        self._rows: dict[int, _SessionRows] = {}
+        self._empty_item = rumps.MenuItem("No Claude sessions", callback=None)
+        self._refresh_item = rumps.MenuItem("Refresh", callback=self._refresh_now, key="r")
+        self._quit_item = rumps.MenuItem("Quit", callback=self._quit, key="q")
+        self.index = connect_or_start()
+        # Detection runs on a worker thread; only the finished snapshot is
+        # applied on the main thread
+        self.refresher = SingleFlight(
+            self._fetch,
+            on_result=lambda result: callAfter(self._apply_sessions, *result),
+        )
+        # Poll on an adaptive schedule: fast while the menu is open or right
+        # after a switch, backing off while nothing changes
+        self.scheduler = AdaptiveScheduler()
+        self.poller = Poller(self.scheduler, self._poll)
+        # Set by Refresh Now: the next tick asks the index to re-detect
+        self._fresh_requested = False
+        self._polled: list[ClaudeSession] = []
+        self._menu_tracking = _MenuTracking.alloc().initWithCallback_(self._menu_tracked)
+        self._build_menu()
+        # File and tmux events trigger refreshes; the timer is a safety net
+        self.watcher = follow_changes(self.index, self.poller)
+        self.poller.start()
 
     def _get_title(self, count: int) -> str:
         """Get menu bar title with session count."""
@@ -24,61 +105,126 @@ class ClaudeWindowManager(rumps.App):
             return "C"
         return f"C:{count}"
 
+    def _session_texts(self, idx: int, session: ClaudeSession, now: datetime) -> tuple[str, str, str]:
+        """Menu texts for a session: main item, topic and runtime/usage rows (as of `now`)."""
+        # Keyboard shortcut hint
+        shortcut_hint = f"⌘{idx}" if idx <= 9 else "  "
+        runtime = session.runtime_display_at(now)
+        waiting = "  💬" if session.waiting_for_input else ""
+        usage = describe_usage(self.resources.get(str(session.pid)))
+        details = "   ".join(text for text in (f"⏱ {runtime}" if runtime else "", usage) if text)
+        return (
+            f"{shortcut_hint}  {session.display_name}{waiting}",
+            f"    ✳ {session.display_topic}",
+            f"    {details}" if details else "",
+        )
+
+    @timed("update_menu")
+    def _update_menu(self, diff: SessionDiff) -> None:
+        """
+        Update menu items in place, relaying out only on structural changes.
+
+        Texts are recomputed for every session since runtimes tick even when
+        the snapshot itself is unchanged; items are only retitled on change.
+        """
+        for session in diff.removed:
+            del self._rows[session.window_id]
+
+        relayout = diff.structural
+        now = datetime.now()  # One clock reading for every runtime
+        for idx, session in enumerate(self.sessions, 1):
+            texts = self._session_texts(idx, session, now)
+            rows = self._rows.get(session.window_id)
+            if rows is None:
+                rows = self._rows[session.window_id] = _SessionRows(
+                    session.window_id, self._make_switch_callback(session)
+                )
+            if bool(rows.texts[2]) != bool(texts[2]):
+                relayout = True  # Runtime/usage row appears or disappears
+            rows.set_texts(texts)
+
+        if relayout:
+            self._build_menu()
+
+    @timed("build_menu")
     def _build_menu(self) -> None:
-        """Build the menu from current sessions."""
+        """Lay out the menu from the existing items for current sessions."""
         self.menu.clear()
 
         if not self.sessions:
-            self.menu.add(rumps.MenuItem("No Claude sessions", callback=None))
+            self.menu.add(self._empty_item)
             self.menu.add(rumps.separator)
         else:
-            for idx, session in enumerate(self.sessions, 1):
-                # Create menu item with keyboard shortcut hint
-                shortcut_hint = f"⌘{idx}" if idx <= 9 else "  "
-
-                # Main item: project name
-                title = f"{shortcut_hint}  {session.display_name}"
-                item = rumps.MenuItem(title, callback=self._make_switch_callback(session))
-
-                # Add submenu with details
-                topic_item = rumps.MenuItem(f"    ✳ {session.display_topic}")
-                topic_item.set_callback(None)
-
-                if session.runtime_display:
-                    runtime_item = rumps.MenuItem(f"    ⏱ {session.runtime_display}")
-                    runtime_item.set_callback(None)
-
-                self.menu.add(item)
-                self.menu.add(topic_item)
-                if session.runtime_display:
-                    self.menu.add(runtime_item)
+            for session in self.sessions:
+                rows = self._rows[session.window_id]
+                key = str(session.window_id)
+                # Explicit keys: titles of different sessions may collide
+                self.menu[key] = rows.item
+                self.menu[f"{key}:topic"] = rows.topic_item
+                if rows.texts[2]:
+                    self.menu[f"{key}:runtime"] = rows.runtime_item
                 self.menu.add(rumps.separator)
 
         # Add standard items
-        self.menu.add(rumps.MenuItem("Refresh", callback=self.refresh_sessions, key="r"))
+        self.menu.add(self._refresh_item)
         self.menu.add(rumps.separator)
-        self.menu.add(rumps.MenuItem("Quit", callback=self._quit, key="q"))
+        self.menu.add(self._quit_item)
 
     def _make_switch_callback(self, session: ClaudeSession):
         """Create a callback function for switching to a session."""
+        window_id = session.window_id
+
         def callback(_):
-            switch_to_window(session.window_id)
+            # The pid may have changed since the item was made
+            pid = next((s.pid for s in self.sessions if s.window_id == window_id), None)
+            switch_to_window(window_id, pid)
+            self.poller.poke()
         return callback
 
     def _quit(self, _):
         """Quit the application."""
         rumps.quit_application()
 
-    @rumps.timer(2)
-    def refresh_sessions(self, _):
-        """Refresh the list of Claude sessions."""
-        self.sessions = get_claude_sessions()
-        self.title = self._get_title(len(self.sessions))
-        self._build_menu()
+    def _refresh_now(self, _):
+        """Rescan now, through the poller like every other refresh."""
+        self._fresh_requested = True
+        self.poller.poke()
+
+    def _menu_tracked(self, is_open: bool) -> None:
+        """Poll fast while the menu is open."""
+        self.scheduler.set_menu_open(is_open)
+        if is_open:
+            self.index.request_refresh()
+            self.poller.poke()
+
+    def _fetch(self, fresh: bool = False) -> tuple[list[ClaudeSession], dict[str, dict]]:
+        """Sessions and their resource history (worker thread)."""
+        return self.index.terminal_sessions(fresh=fresh), self.index.resources()
+
+    def _poll(self) -> bool:
+        """Refresh the list of Claude sessions (poller thread)."""
+        fresh, self._fresh_requested = self._fresh_requested, False
+        sessions, _ = self.refresher.request(fresh=fresh).result()
+        # Usage changes every tick; only session changes keep polling fast
+        changed = sessions != self._polled
+        self._polled = sessions
+        return changed
+
+    def _apply_sessions(self, sessions: list[ClaudeSession], resources: dict[str, dict]) -> None:
+        """Apply a finished refresh (main thread)."""
+        diff = diff_sessions(self.sessions, sessions)
+        self.sessions = sessions
+        self.resources = resources
+        title = self._get_title(len(self.sessions))
+        if self.title != title:
+            self.title = title
+        self._update_menu(diff)
 
 
 def main():
     """Entry point for the application."""
+    use_persistent_runner()
+    configure_metrics()
     app = ClaudeWindowManager()
     app.run()
 
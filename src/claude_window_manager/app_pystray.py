@@ -1,106 +1,216 @@
 """Menu bar app using pystray (more reliable on modern macOS)."""
 
-import threading
-import time
-from PIL import Image, ImageDraw
+import subprocess
+import sys
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont
 import pystray
 from pystray import MenuItem as item
 
-from .window_detector import get_claude_sessions, switch_to_window
+from .applescript import use_persistent_runner
+from .diff import SessionDiff, diff_sessions
+from .indexer import connect_or_start, follow_changes
+from .metrics import configure as configure_metrics, timed
+from .refresh import SingleFlight
+from .sampler import describe_usage
+from .scheduler import AdaptiveScheduler, Poller
+from .window_detector import switch_to_window
 from .session import ClaudeSession
 
 
-def create_icon_image(count: int) -> Image.Image:
-    """Create a simple icon with session count."""
-    # Create a 22x22 image (standard menu bar size)
-    size = 22
+# Icon colors per menu bar theme: (circle, text)
+ICON_COLORS = {
+    "light": ((100, 100, 100, 255), (255, 255, 255, 255)),
+    "dark": ((210, 210, 210, 255), (30, 30, 30, 255)),
+}
+
+# Render at 2x on macOS: pystray scales the image to the menu bar height,
+# so the extra pixels are used on retina displays
+ICON_SCALE = 2 if sys.platform == "darwin" else 1
+
+
+def detect_theme() -> str:
+    """Return "dark" or "light" for the macOS menu bar appearance."""
+    if sys.platform != "darwin":
+        return "light"
+    result = subprocess.run(
+        ["defaults", "read", "-g", "AppleInterfaceStyle"],
+        capture_output=True,
+        text=True,
+    )
+    return "dark" if result.stdout.strip() == "Dark" else "light"
+
+
+def icon_key(count: int, theme: str = "light", scale: int = 1) -> tuple[int, str, int]:
+    """Cache key for an icon; every count of 10 or more renders the same."""
+    return min(count, 10), theme, scale
+
+
+@lru_cache(maxsize=64)
+def _render_icon(count: int, theme: str, scale: int) -> Image.Image:
+    # Create a 22x22 image (standard menu bar size), times scale
+    size = 22 * scale
     img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
+    circle, text_color = ICON_COLORS[theme]
 
     # Draw a circle
-    draw.ellipse([2, 2, size-2, size-2], fill=(100, 100, 100, 255))
+    draw.ellipse([2 * scale, 2 * scale, size - 2 * scale, size - 2 * scale], fill=circle)
 
     # Draw the count
     text = str(count) if count < 10 else "+"
+    font = None
+    if scale > 1:
+        try:
+            font = ImageFont.load_default(size=11 * scale)
+        except TypeError:  # Pillow < 10.1 has a single fixed-size font
+            pass
     # Center the text (approximate)
-    draw.text((8, 4), text, fill=(255, 255, 255, 255))
+    draw.text((8 * scale, 4 * scale), text, fill=text_color, font=font)
 
     return img
 
 
+def create_icon_image(count: int, theme: str = "light", scale: int = 1) -> Image.Image:
+    """Get the icon with session count (rendered once per count/theme/scale)."""
+    return _render_icon(*icon_key(count, theme, scale))
+
+
+def prerender_icons(theme: str, scale: int = ICON_SCALE) -> None:
+    """Render every count's icon up front, at 1x and the display scale."""
+    for count in range(11):
+        for s in {1, scale}:
+            create_icon_image(count, theme, s)
+
+
 class ClaudeWindowManagerTray:
     """Pystray-based menu bar app."""
 
     def __init__(self):
         self.sessions: list[ClaudeSession] = []
+        self.resources: dict[str, dict] = {}  # CPU and memory history per session pid
         self.icon = None
         self.running = True
-
-    def refresh_sessions(self):
+        self.index = connect_or_start()
+        self.theme = detect_theme()
+        self._icon_key = None
+        # One detection per tick; concurrent ticks join the one in progress
+        self.refresher = SingleFlight(self.update_menu)
+        # Set by a Refresh click: the next tick asks the index to re-detect
+        self._fresh_requested = False
+        # Adaptive polling: fast after a switch or Refresh, backing off
+        # while nothing changes
+        self.scheduler = AdaptiveScheduler()
+        self.poller = Poller(self.scheduler, self._poll)
+        self.watcher = None
+        # Menu items are created once per session and reused across refreshes
+        self._shown: list[ClaudeSession] = []
+        self._items: dict[int, item] = {}
+        self._labels: dict[int, str] = {}
+        self._empty_item = item("No Claude sessions", None, enabled=False)
+        self._refresh_item = item("Refresh", self.on_refresh)
+        self._quit_item = item("Quit", self.on_quit)
+
+    def refresh_sessions(self, fresh: bool = False):
         """Refresh session list."""
-        self.sessions = get_claude_sessions()
-
-    def build_menu(self):
-        """Build the menu dynamically."""
-        self.refresh_sessions()
-
-        menu_items = []
-
-        if not self.sessions:
-            menu_items.append(item("No Claude sessions", None, enabled=False))
+        self.sessions = self.index.terminal_sessions(fresh=fresh)
+        self.resources = self.index.resources()
+
+    @timed("build_menu")
+    def build_menu(self) -> SessionDiff:
+        """Sync menu items with the session list, reusing unchanged ones."""
+        diff = diff_sessions(self._shown, self.sessions)
+        for session in diff.removed:
+            del self._items[session.window_id]
+            del self._labels[session.window_id]
+        for session in self.sessions:
+            window_id = session.window_id
+            waiting = " 💬" if session.waiting_for_input else ""
+            usage = describe_usage(self.resources.get(str(session.pid)), width=8)
+            usage = f"  {usage}" if usage else ""
+            self._labels[window_id] = f"{session.display_name}: {session.display_topic}{waiting}{usage}"
+            if window_id not in self._items:
+                self._items[window_id] = self._make_item(window_id)
+        self._shown = self.sessions
+        return diff
+
+    def _make_item(self, window_id: int) -> item:
+        """Create the menu item for a session; its label is looked up on render."""
+        def switch():
+            pid = next((s.pid for s in self._shown if s.window_id == window_id), None)
+            switch_to_window(window_id, pid)
+            self.poller.poke()
+
+        return item(lambda _: self._labels.get(window_id, ""), switch)
+
+    def menu_items(self) -> tuple:
+        """Current menu items; pystray calls this each time it renders the menu."""
+        if not self._shown:
+            sessions = [self._empty_item]
         else:
-            for idx, session in enumerate(self.sessions):
-                # Create a closure to capture the session
-                def make_callback(s):
-                    return lambda: switch_to_window(s.window_id)
-
-                label = f"{session.display_name}: {session.display_topic}"
-                menu_items.append(item(label, make_callback(session)))
-
-        menu_items.append(pystray.Menu.SEPARATOR)
-        menu_items.append(item("Refresh", self.on_refresh))
-        menu_items.append(item("Quit", self.on_quit))
-
-        return menu_items
+            sessions = [self._items[s.window_id] for s in self._shown]
+        return (*sessions, pystray.Menu.SEPARATOR, self._refresh_item, self._quit_item)
 
     def on_refresh(self):
-        """Refresh menu."""
-        self.update_menu()
+        """Refresh menu (through the poller, like every other refresh)."""
+        self._fresh_requested = True
+        self.poller.poke()
 
     def on_quit(self):
         """Quit the app."""
         self.running = False
+        self.poller.stop()
+        if self.watcher:
+            self.watcher.stop()
         if self.icon:
             self.icon.stop()
 
-    def update_menu(self):
-        """Update the icon and menu."""
-        self.refresh_sessions()
+    def update_icon(self) -> None:
+        """Push the icon to pystray only if it changed."""
+        key = icon_key(len(self.sessions), self.theme, ICON_SCALE)
+        if key != self._icon_key:
+            self.icon.icon = create_icon_image(*key)
+            self._icon_key = key
+
+    def update_menu(self, fresh: bool = False) -> bool:
+        """
+        Run one detection, then update the icon and menu if the sessions or
+        their resource usage changed. Returns whether the sessions changed.
+        """
+        resources = self.resources
+        self.refresh_sessions(fresh)
+        diff = self.build_menu()
         if self.icon:
-            self.icon.icon = create_icon_image(len(self.sessions))
-            self.icon.menu = pystray.Menu(*self.build_menu())
-
-    def refresh_loop(self):
-        """Background thread to refresh periodically."""
-        while self.running:
-            time.sleep(3)
-            if self.running:
-                self.update_menu()
+            self.update_icon()
+            # A new CPU/memory sample changes labels even when the sessions
+            # haven't
+            if not diff.empty or self.resources != resources:
+                self.icon.update_menu()
+        return not diff.empty
+
+    def _poll(self) -> bool:
+        """One scheduled tick (poller thread)."""
+        fresh, self._fresh_requested = self._fresh_requested, False
+        return self.refresher.request(fresh=fresh).result()
 
     def run(self):
         """Run the app."""
+        prerender_icons(self.theme)
         self.refresh_sessions()
+        self.build_menu()
 
+        self._icon_key = icon_key(len(self.sessions), self.theme, ICON_SCALE)
         self.icon = pystray.Icon(
             "claude-wm",
-            create_icon_image(len(self.sessions)),
+            create_icon_image(*self._icon_key),
             "Claude Window Manager",
-            pystray.Menu(*self.build_menu())
+            pystray.Menu(self.menu_items),
         )
 
-        # Start refresh thread
-        refresh_thread = threading.Thread(target=self.refresh_loop, daemon=True)
-        refresh_thread.start()
+        # Start refresh thread; file and tmux events trigger refreshes and
+        # the timer is a safety net
+        self.watcher = follow_changes(self.index, self.poller)
+        self.poller.start()
 
         # Run the icon (blocks)
         self.icon.run()
@@ -108,6 +218,8 @@ class ClaudeWindowManagerTray:
 
 def main():
     """Entry point."""
+    use_persistent_runner()
+    configure_metrics()
     app = ClaudeWindowManagerTray()
     app.run()
 
@@ -0,0 +1,287 @@
+"""Shared AppleScript execution.
+
+Scripts run either as a one-shot `osascript` call (the default, cheapest
+for short-lived CLI invocations) or through a persistent `ScriptRunner`
+that keeps a warm interpreter process (see `osa_server`) and caches
+compiled scripts. Long-running processes such as the menu bar apps opt
+into the persistent runner with `use_persistent_runner()`.
+"""
+
+import hashlib
+import json
+import os
+import select
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from .metrics import METRICS, span
+from .paths import STATE_DIR
+
+DEFAULT_TIMEOUT = 10.0
+
+# Delimiters for structured script output. ASCII unit/record separators
+# never appear in window titles, unlike ", " which osascript uses for lists.
+FIELD_SEP = "\x1f"
+RECORD_SEP = "\x1e"
+
+
+class AppleScriptError(Exception):
+    """Raised when a script fails or the interpreter misbehaves."""
+
+
+class AppleScriptTimeout(AppleScriptError):
+    """Raised when a script doesn't finish within its timeout."""
+
+
+class ScriptTemplate:
+    """
+    A parameterized script compiled once and called with string arguments.
+
+    `body` is the inside of an ``on cwm(argv)`` handler; arguments are
+    available as ``item N of argv``, so they never need to be quoted into
+    the script text.
+    """
+
+    def __init__(self, name: str, body: str):
+        self.name = name
+        self.source = (
+            f"on cwm(argv)\n{body.strip(chr(10))}\nend cwm\n\n"
+            "on run argv\n    return cwm(argv)\nend run\n"
+        )
+        self.digest = hashlib.sha1(self.source.encode()).hexdigest()[:12]
+
+
+def quote(text: str) -> str:
+    """Quote text as an AppleScript string literal."""
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def parse_records(output: str, fields: int) -> list[list[str]]:
+    """
+    Parse RECORD_SEP-separated records of FIELD_SEP-separated fields.
+
+    Records with fewer fields are padded with empty strings; records with
+    more fields than expected are malformed and skipped.
+    """
+    if not output:
+        return []
+    records = []
+    for record in output.split(RECORD_SEP):
+        values = record.split(FIELD_SEP)
+        if len(values) > fields:
+            continue
+        values.extend([""] * (fields - len(values)))
+        records.append(values)
+    return records
+
+
+def parse_columns(output: str, columns: int) -> list[tuple[str, ...]]:
+    """
+    Parse column-major output into rows.
+
+    The script returns one RECORD_SEP-separated column per property
+    (e.g. ``id of every window``), each a FIELD_SEP-separated list.
+    Returns no rows if the columns disagree in length, which happens when
+    a window opens or closes between the property fetches.
+    """
+    if not output:
+        return []
+    parts = output.split(RECORD_SEP)
+    parts.extend([""] * (columns - len(parts)))
+    cols = [part.split(FIELD_SEP) for part in parts[:columns]]
+    if len({len(col) for col in cols}) != 1:
+        return []
+    return list(zip(*cols))
+
+
+class ScriptRunner:
+    """Sends scripts to a warm interpreter process over a pipe."""
+
+    def __init__(self, command: Optional[list[str]] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.command = command or [sys.executable, "-m", "claude_window_manager.osa_server"]
+        self.timeout = timeout
+        self.restarts = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._next_id = 0
+        self._buffer = b""
+        self._lock = threading.Lock()
+
+    def run(self, script: str, timeout: Optional[float] = None) -> str:
+        """Run a script and return its result text."""
+        return self._request({"source": script, "args": None}, timeout)
+
+    def run_template(self, template: ScriptTemplate, *args, timeout: Optional[float] = None) -> str:
+        """Call a template's handler with the given arguments."""
+        return self._request({"source": template.source, "args": [str(a) for a in args]}, timeout)
+
+    def close(self) -> None:
+        """Stop the interpreter process."""
+        with self._lock:
+            self._kill()
+
+    def _start(self) -> subprocess.Popen:
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+        if self._process is not None:
+            self.restarts += 1
+        self._buffer = b""
+        METRICS.count_subprocess(self.command[0])
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        return self._process
+
+    def _kill(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+
+    def _request(self, payload: dict, timeout: Optional[float]) -> str:
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._next_id += 1
+            payload["id"] = self._next_id
+            data = json.dumps(payload).encode() + b"\n"
+            process = self._start()
+            try:
+                process.stdin.write(data)
+                process.stdin.flush()
+            except BrokenPipeError:
+                # Interpreter died while idle; the request never arrived
+                process = self._start()
+                process.stdin.write(data)
+                process.stdin.flush()
+            response = self._read_response(process, payload["id"], time.monotonic() + timeout)
+        if not response.get("ok"):
+            raise AppleScriptError(response.get("error", "script failed"))
+        return response.get("result", "")
+
+    def _read_response(self, process: subprocess.Popen, request_id: int, deadline: float) -> dict:
+        fd = process.stdout.fileno()
+        while True:
+            if b"\n" in self._buffer:
+                line, self._buffer = self._buffer.split(b"\n", 1)
+                try:
+                    response = json.loads(line)
+                except ValueError:
+                    response = None
+                if not isinstance(response, dict):
+                    # Out of step with the protocol: start over with a new one
+                    self._kill()
+                    raise AppleScriptError(f"malformed interpreter response: {line[:80]!r}")
+                if response.get("id") == request_id:
+                    return response
+                continue  # Late answer to a request that already timed out
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                self._kill()
+                raise AppleScriptTimeout("script timed out")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                self._kill()
+                raise AppleScriptError("interpreter exited")
+            self._buffer += chunk
+
+
+_runner: Optional[ScriptRunner] = None
+_compiled_paths: dict[str, str] = {}
+
+
+@contextmanager
+def use_runner(runner):
+    """
+    Route `run_applescript`/`run_template` through any object with
+    ScriptRunner's `run`/`run_template` methods (e.g. a simulator).
+    """
+    global _runner
+    previous, _runner = _runner, runner
+    try:
+        yield runner
+    finally:
+        _runner = previous
+
+
+def active_runner():
+    """The runner `run_applescript` goes through, or None for `osascript`."""
+    return _runner
+
+
+def use_persistent_runner(enabled: bool = True) -> None:
+    """Route `run_applescript`/`run_template` through a warm interpreter."""
+    global _runner
+    if enabled and _runner is None:
+        _runner = ScriptRunner()
+    elif not enabled and _runner is not None:
+        _runner.close()
+        _runner = None
+
+
+def _run_osascript(argv: list[str], timeout: Optional[float]) -> str:
+    METRICS.count_subprocess("osascript")
+    try:
+        result = subprocess.run(
+            ["osascript", *argv],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise AppleScriptTimeout("script timed out")
+    if result.returncode != 0:
+        raise AppleScriptError(result.stderr.strip())
+    # Only strip the trailing newline: str.strip() would also eat the
+    # separators, which Python counts as whitespace.
+    return result.stdout.rstrip("\n")
+
+
+def _compiled_template(template: ScriptTemplate) -> str:
+    """Path to a precompiled .scpt for the template, building it once."""
+    path = _compiled_paths.get(template.digest)
+    if path is not None:
+        return path
+    target = STATE_DIR / "scripts" / f"{template.name}-{template.digest}.scpt"
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        METRICS.count_subprocess("osacompile")
+        result = subprocess.run(
+            ["osacompile", "-o", str(target), "-e", template.source],
+            capture_output=True,
+        )
+        if result.returncode != 0:
+            raise AppleScriptError(result.stderr.decode().strip())
+    _compiled_paths[template.digest] = str(target)
+    return str(target)
+
+
+def run_applescript(script: str, timeout: Optional[float] = DEFAULT_TIMEOUT) -> str:
+    """Execute AppleScript and return output (empty on failure)."""
+    try:
+        with span("run_applescript"):
+            if _runner is not None:
+                return _runner.run(script, timeout=timeout)
+            return _run_osascript(["-e", script], timeout)
+    except AppleScriptError:
+        return ""
+
+
+def run_template(template: ScriptTemplate, *args, timeout: Optional[float] = DEFAULT_TIMEOUT) -> str:
+    """Run a script template with arguments (empty on failure)."""
+    try:
+        with span(f"run_template:{template.name}"):
+            if _runner is not None:
+                return _runner.run_template(template, *args, timeout=timeout)
+            try:
+                compiled = _compiled_template(template)
+            except (OSError, AppleScriptError):
+                return _run_osascript(["-e", template.source, *map(str, args)], timeout)
+            return _run_osascript([compiled, *map(str, args)], timeout)
+    except AppleScriptError:
+        return ""
@@ -0,0 +1,574 @@
+"""Benchmark suite for detection and parsing, run against the simulator.
+
+    python -m claude_window_manager.bench                  # compare with baseline
+    python -m claude_window_manager.bench --save-baseline  # record a new baseline
+    python -m claude_window_manager.bench --only sessions --sizes 1000
+    python -m claude_window_manager.bench --startup        # CLI import budget
+    python -m claude_window_manager.bench --memory         # session records, tracemalloc
+
+Each benchmark runs at several scales (number of windows) and reports
+throughput and latency percentiles. The run fails (exit status 1) if any
+benchmark's median latency regresses past `--tolerance` times its baseline,
+or its p99 exceeds the benchmark's own budget (for interactive paths).
+`--memory` is checked the same way, on held and peak bytes. The baseline
+is benchmarks/baseline.json in the source tree unless `--baseline` says
+otherwise; `--save-baseline` adds or replaces the entries it ran.
+
+`--startup` instead checks the CLI's import cost with `-X importtime`: each
+entry path must stay within its time budget and import only allowed
+package modules and none of the forbidden heavy ones.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from .simulator import Simulator, title_corpus
+
+# In the source tree, so runs from any directory compare against it
+BASELINE_PATH = Path(__file__).resolve().parents[2] / "benchmarks" / "baseline.json"
+SIZES = (1, 10, 100, 1000)
+PROCESSES = 5000
+
+# Heavy modules the CLI must never load at startup
+FORBIDDEN_IMPORTS = {"PIL", "pystray", "rumps", "objc", "Foundation", "AppKit", "asyncio", "http"}
+
+# The CLI's own import budget: cwm runs from aliases and key bindings,
+# so this adds directly to every switch
+CLI_BUDGET_MS = 40.0
+
+# name -> (statement, package modules it may import, budget in ms)
+STARTUP_CHECKS = {
+    "cli": (
+        "import claude_window_manager.cli",
+        {"claude_window_manager", "claude_window_manager.cli", "claude_window_manager.colors"},
+        CLI_BUDGET_MS,
+    ),
+    # `cwm list`/`cwm switch` answered by a running daemon: the CLI plus
+    # json, socket and paths to query it (the server, scheduler, metrics
+    # and session records only load in the daemon)
+    "index_client": (
+        "import claude_window_manager.cli, claude_window_manager.index_client",
+        {
+            "claude_window_manager", "claude_window_manager.cli", "claude_window_manager.colors",
+            "claude_window_manager.index_client", "claude_window_manager.paths",
+        },
+        CLI_BUDGET_MS + 10.0,
+    ),
+}
+
+# name -> (factory(size, simulator) -> callable to time, sizes or None for all)
+BENCHMARKS: dict[str, tuple[Callable[[int, Simulator], Callable[[], object]], Optional[tuple]]] = {}
+# name -> p99 latency budget in ms, at every size
+BUDGETS: dict[str, float] = {}
+
+
+def benchmark(name: str, sizes: Optional[tuple] = None, budget_ms: Optional[float] = None):
+    """Register a benchmark factory, optionally with a p99 latency budget."""
+    def register(factory):
+        BENCHMARKS[name] = (factory, sizes)
+        if budget_ms is not None:
+            BUDGETS[name] = budget_ms
+        return factory
+    return register
+
+
+@dataclass
+class BenchResult:
+    name: str
+    size: int
+    calls: int
+    ops_per_sec: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.size}]"
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.3, max_calls: int = 20000) -> list[float]:
+    """Call `fn` repeatedly (after a warm-up call) and return per-call latencies."""
+    fn()
+    latencies = []
+    deadline = time.perf_counter() + min_time
+    while len(latencies) < max_calls and (len(latencies) < 5 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summarize(name: str, size: int, latencies: list[float]) -> BenchResult:
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = latencies[0]
+    return BenchResult(
+        name=name,
+        size=size,
+        calls=len(latencies),
+        ops_per_sec=len(latencies) / sum(latencies),
+        p50_ms=p50 * 1000,
+        p90_ms=p90 * 1000,
+        p99_ms=p99 * 1000,
+    )
+
+
+@benchmark("get_terminal_windows")
+def _bench_terminal_windows(size, sim):
+    from .window_detector import get_terminal_windows
+    return get_terminal_windows
+
+
+def legacy_parse_window_name(name: str) -> tuple[str, Optional[str], Optional[str]]:
+    """The original title parser: up to three regexes per call, uncached."""
+    project = name
+    topic = None
+    language = None
+    if "claude" not in name.lower():
+        return project, topic, language
+    match = re.match(
+        r'^(.+?)\s*[—-]\s*✳\s*(.+?)\s*[—-]\s*(\w+)\s*◂\s*claude',
+        name,
+        re.IGNORECASE
+    )
+    if match:
+        return match.group(1).strip(), match.group(2).strip(), match.group(3).strip()
+    match = re.match(r'^(.+?)\s*[—-]\s*✳\s*(.+?)(?:\s*[—-]|$)', name)
+    if match:
+        return match.group(1).strip(), match.group(2).strip(), language
+    parts = re.split(r'\s*[—-]\s*', name)
+    if parts:
+        project = parts[0].strip()
+    return project, topic, language
+
+
+@benchmark("parse_window_name")
+def _bench_parse_window_name(size, sim):
+    from .window_detector import parse_window_name
+    titles = title_corpus(size)
+    return lambda: [parse_window_name(t) for t in titles]
+
+
+# Titles seen for the first time (cache cleared before each pass)
+@benchmark("parse_window_name_cold")
+def _bench_parse_window_name_cold(size, sim):
+    from .window_detector import _parse_title, parse_window_name
+    titles = title_corpus(size)
+
+    def parse():
+        _parse_title.cache_clear()
+        return [parse_window_name(t) for t in titles]
+    return parse
+
+
+@benchmark("parse_window_name_legacy")
+def _bench_parse_window_name_legacy(size, sim):
+    titles = title_corpus(size)
+    return lambda: [legacy_parse_window_name(t) for t in titles]
+
+
+@benchmark("get_claude_processes")
+def _bench_claude_processes(size, sim):
+    from .window_detector import get_claude_processes
+    return get_claude_processes
+
+
+@benchmark("get_claude_sessions")
+def _bench_claude_sessions(size, sim):
+    from .window_detector import get_claude_sessions
+    return get_claude_sessions
+
+
+@benchmark("build_sessions_steady")
+def _bench_build_sessions_steady(size, sim):
+    from .detection import detect_sync
+    from .session import RecordCache
+    from .window_detector import build_claude_sessions
+    # A tick with nothing changed: every record (and dict) is last tick's
+    result = detect_sync(["terminal", "processes"])
+    cache = RecordCache()
+
+    def tick():
+        sessions = build_claude_sessions(result["terminal"], result["processes"], cache)
+        dicts = [cache.reuse(("dict", s), s.to_dict) for s in sessions]
+        cache.tick()
+        return dicts
+    return tick
+
+
+@benchmark("get_claude_iterm_sessions")
+def _bench_iterm_sessions(size, sim):
+    from .iterm2_integration import get_claude_iterm_sessions
+    return get_claude_iterm_sessions
+
+
+@benchmark("script_runner_roundtrip", sizes=(1,))
+def _bench_script_runner(size, sim):
+    from .applescript import ScriptRunner
+    from .window_detector import SWITCH_WINDOW
+    runner = ScriptRunner([sys.executable, "-m", "claude_window_manager.osa_server", "--fake"])
+    return lambda: runner.run_template(SWITCH_WINDOW, 1)
+
+
+@dataclass
+class LegacySession:
+    """The session record before it was slotted, frozen and cached."""
+
+    window_id: int
+    window_name: str
+    project: str
+    topic: Optional[str]
+    language: Optional[str]
+    pid: Optional[int]
+    tty: Optional[str]
+    start_time: Optional[datetime]
+    last_activity: Optional[datetime] = None
+    waiting_for_input: Optional[bool] = None
+
+
+def _legacy_tick(windows, processes) -> list[dict]:
+    from .window_detector import is_claude_title, parse_window_name
+    sessions = []
+    for window_id, window_name, tty in windows:
+        if is_claude_title(window_name):
+            pid, start_time = processes.get(tty, (None, None))
+            sessions.append(LegacySession(window_id, window_name, *parse_window_name(window_name), pid, tty, start_time))
+    return [asdict(s) for s in sessions]
+
+
+def _traced(fn: Callable[[], object]) -> tuple[object, int, int]:
+    """Call `fn` under tracemalloc: (result, bytes still held by it, peak bytes)."""
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        result = fn()
+        held, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, held, peak
+
+
+def session_memory(count: int = 1000, ticks: int = 3) -> list[tuple[str, int, int]]:
+    """
+    Memory per refresh at `count` Terminal windows, before (plain dataclass,
+    rebuilt and serialized every tick) and after (slotted records reused
+    through a RecordCache).
+
+    Returns (label, bytes allocated during a tick and still held after it
+    per session, peak bytes allocated during the tick) rows. Each tick
+    re-parses the detection output, so titles are fresh strings, as from
+    real osascript output.
+    """
+    from .detection import detect_sync
+    from .session import RecordCache
+    from .window_detector import _parse_title, build_claude_sessions
+
+    sim = Simulator(windows=count, processes=max(PROCESSES, count * 2))
+    cache = RecordCache()
+
+    def fresh():
+        with sim.install():
+            result = detect_sync(["terminal", "processes"])
+        sim.__dict__.pop("terminal_output", None)  # Fresh title strings next time
+        return result
+
+    def current(result):
+        sessions = build_claude_sessions(result["terminal"], result["processes"], cache)
+        dicts = [cache.reuse(("dict", s), s.to_dict) for s in sessions]
+        cache.tick()
+        return sessions, dicts
+
+    rows = []
+    for label, tick in (("legacy", lambda r: _legacy_tick(r["terminal"], r["processes"])), ("records", current)):
+        held = peak = 0
+        for _ in range(ticks):
+            result = fresh()
+            _parse_title.cache_clear()
+            output, held, peak = _traced(lambda: tick(result))
+        sessions = len(output if label == "legacy" else output[0])
+        rows.append((label, held // max(sessions, 1), peak))
+    return rows
+
+
+def import_profile(statement: str) -> tuple[float, list[str]]:
+    """
+    Run `statement` in a fresh interpreter under `-X importtime`.
+    Returns the time spent importing the package (ms) and every module
+    imported, including those the interpreter loads at startup.
+    """
+    # This copy of the package, wherever the interpreter is started from
+    package_root = str(Path(__file__).resolve().parents[1])
+    path = os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": path},
+    )
+    total_us = 0
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name[1:]  # Indented by nesting depth after one space
+        modules.append(name.strip())
+        if name.startswith("claude_window_manager"):
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def check_startup(scale: float = 1.0, repeat: int = 5) -> list[str]:
+    """Describe every startup check that breaks its budget or import rules."""
+    failures = []
+    for name, (statement, allowed, budget_ms) in STARTUP_CHECKS.items():
+        profiles = [import_profile(statement) for _ in range(repeat)]
+        best_ms = min(ms for ms, _ in profiles)
+        modules = profiles[0][1]
+        print(f"{name:<14} {best_ms:7.1f} ms (budget {budget_ms * scale:.0f} ms), {len(modules)} modules")
+        if best_ms > budget_ms * scale:
+            failures.append(f"{name}: imports take {best_ms:.1f}ms, budget {budget_ms * scale:.0f}ms")
+        for module in modules:
+            top = module.split(".")[0]
+            if top in FORBIDDEN_IMPORTS:
+                failures.append(f"{name}: imports forbidden module {module}")
+            elif top == "claude_window_manager" and module not in allowed:
+                failures.append(f"{name}: imports {module}, which is not on the allow-list")
+    return failures
+
+
+# Typing, correcting and clearing queries, one keystroke per call
+KEYSTROKES = [
+    "f", "fi", "fix", "fix ", "fix t", "fix te", "fix tes", "fix te", "fix t", "fix", "fi", "f", "",
+    "b", "bi", "bil", "bill", "billi", "billin", "billing", "billing p", "billing py", "",
+    "r", "ru", "rus", "rust", "rus", "ru", "r", "",
+]
+
+
+@benchmark("search_keystroke", budget_ms=5.0)
+def _bench_search_keystroke(size, sim):
+    from itertools import cycle
+
+    from .picker import render
+    from .search import Search, SearchIndex
+    from .simulator import session_dicts
+    sessions = session_dicts(size)
+    search = Search(SearchIndex(sessions))
+    queries = cycle(KEYSTROKES)
+
+    def keystroke():
+        query = next(queries)
+        return render(sessions, query, search.update(query), 0)
+    return keystroke
+
+
+@benchmark("sampler_tick")
+def _bench_sampler_tick(size, sim):
+    import random
+
+    from .sampler import ProcessInfo, Sampler
+    # A process table with `size` sessions, each with a few children
+    rng = random.Random(0)
+    table = {pid: ProcessInfo(1, 0.0, 1 << 20) for pid in range(2, PROCESSES)}
+    roots = rng.sample(range(2, PROCESSES), size)
+    children = iter(rng.sample(range(2, PROCESSES), min(PROCESSES - 2, size * 3)))
+    for root in roots:
+        for _ in range(3):
+            child = next(children, None)
+            if child is not None and child not in roots:
+                table[child] = ProcessInfo(root, 0.0, 1 << 20)
+    sampler = Sampler(read_table=lambda: table)
+    return lambda: sampler.sample(roots)
+
+
+@benchmark("iterm2_write_flush")
+def _bench_iterm2_writes(size, sim):
+    from .iterm2_writes import WriteBuffer
+    # A badge per tab, every tick; one tab in ten changes between ticks
+    writes = WriteBuffer(run=sim.apply_writes)
+    ids = [sid for _, _, sid, *_ in sim.iterm[:size]]
+    ticks = iter(range(1 << 62))
+
+    def tick():
+        n = next(ticks)
+        for i, sid in enumerate(ids):
+            writes.set_badge(sid, f"{(n + i) // 10 % 2}")
+        writes.flush()
+        sim.write_scripts.clear()
+    return tick
+
+
+_transcripts_dir: Optional[Path] = None
+
+
+def _transcript_fixtures() -> Path:
+    """Synthetic transcripts, generated once per run."""
+    global _transcripts_dir
+    if _transcripts_dir is None:
+        import atexit
+        import shutil
+        import tempfile
+
+        from .simulator import write_transcripts
+
+        _transcripts_dir = Path(tempfile.mkdtemp(prefix="cwm-transcripts-"))
+        atexit.register(shutil.rmtree, _transcripts_dir, ignore_errors=True)
+        write_transcripts(_transcripts_dir)
+    return _transcripts_dir
+
+
+# Size is the number of scanner processes here
+@benchmark("usage_scan_jobs", sizes=(1, 2, 4, 8))
+def _bench_usage_scan(size, sim):
+    from .usage import collect_usage
+    root = _transcript_fixtures()
+    return lambda: collect_usage(root, jobs=size, cache_path=None)
+
+
+def run_benchmarks(sizes=SIZES, only: Optional[str] = None) -> list[BenchResult]:
+    results = []
+    for name, (factory, bench_sizes) in BENCHMARKS.items():
+        if only and only not in name:
+            continue
+        for size in bench_sizes or sizes:
+            sim = Simulator(windows=size, processes=max(PROCESSES, size * 2))
+            with sim.install():
+                fn = factory(size, sim)
+                results.append(summarize(name, size, measure(fn)))
+    return results
+
+
+def compare(results: list[BenchResult], baseline: dict, tolerance: float) -> list[str]:
+    """Describe every result whose median regressed past tolerance or p99 is over budget."""
+    failures = []
+    for r in results:
+        base = baseline.get(r.key)
+        if base and r.p50_ms > base["p50_ms"] * tolerance:
+            failures.append(f"{r.key}: p50 {r.p50_ms:.3f}ms vs baseline {base['p50_ms']:.3f}ms")
+        budget = BUDGETS.get(r.name)
+        if budget is not None and r.p99_ms > budget:
+            failures.append(f"{r.key}: p99 {r.p99_ms:.3f}ms over its {budget:.1f}ms budget")
+    return failures
+
+
+def memory_key(label: str, count: int) -> str:
+    return f"memory:{label}[{count}]"
+
+
+def compare_memory(rows: list[tuple[str, int, int]], count: int, baseline: dict, tolerance: float) -> list[str]:
+    """Describe every `session_memory` row whose held or peak bytes grew past tolerance."""
+    failures = []
+    for label, held, peak in rows:
+        base = baseline.get(memory_key(label, count))
+        if not base:
+            continue
+        if held > base["held_bytes"] * tolerance:
+            failures.append(f"{memory_key(label, count)}: {held} B/session held vs baseline {base['held_bytes']}")
+        if peak > base["peak_bytes"] * tolerance:
+            failures.append(f"{memory_key(label, count)}: {peak} B peak vs baseline {base['peak_bytes']}")
+    return failures
+
+
+def load_baseline(path: Path, saving: bool) -> dict:
+    if path.exists():
+        return json.loads(path.read_text())
+    if not saving:
+        print(f"⚠️  No baseline at {path}: only budgets are checked", file=sys.stderr)
+    return {}
+
+
+def save_baseline(path: Path, baseline: dict, entries: dict) -> None:
+    baseline.update(entries)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+    print(f"\nBaseline written to {path}")
+
+
+def report_failures(failures: list[str]) -> int:
+    if not failures:
+        return 0
+    print("\nRegressions:")
+    for failure in failures:
+        print(f"  {failure}")
+    return 1
+
+
+def print_table(results: list[BenchResult], baseline: dict) -> None:
+    print(f"{'benchmark':<34} {'calls':>6} {'ops/s':>11} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'vs base':>8}")
+    for r in results:
+        base = baseline.get(r.key)
+        ratio = f"{r.p50_ms / base['p50_ms']:.2f}x" if base and base["p50_ms"] else "-"
+        print(
+            f"{r.key:<34} {r.calls:>6} {r.ops_per_sec:>11.1f} "
+            f"{r.p50_ms:>9.3f} {r.p90_ms:>9.3f} {r.p99_ms:>9.3f} {ratio:>8}"
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Claude Window Manager benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Comma-separated window counts")
+    parser.add_argument("--only", help="Run benchmarks whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Allowed p50 slowdown factor")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--startup", action="store_true", help="Check CLI import time and allow-list instead")
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="Report session record memory per refresh (tracemalloc) instead",
+    )
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        count = int(args.sizes.split(",")[-1])
+        baseline = load_baseline(args.baseline, args.save_baseline)
+        rows = session_memory(count)
+        print(f"{'sessions (' + str(count) + ' windows)':<28} {'held B/session':>15} {'peak KiB/tick':>14}")
+        for label, held, peak in rows:
+            print(f"{label:<28} {held:>15} {peak / 1024:>14.1f}")
+        if args.save_baseline:
+            save_baseline(args.baseline, baseline, {
+                memory_key(label, count): {"held_bytes": held, "peak_bytes": peak}
+                for label, held, peak in rows
+            })
+            return 0
+        return report_failures(compare_memory(rows, count, baseline, args.tolerance))
+
+    if args.startup:
+        failures = check_startup()
+        for failure in failures:
+            print(f"  {failure}")
+        return 1 if failures else 0
+
+    sizes = tuple(int(s) for s in args.sizes.split(","))
+    baseline = load_baseline(args.baseline, args.save_baseline)
+    results = run_benchmarks(sizes, args.only)
+
+    if args.json:
+        print(json.dumps([asdict(r) for r in results], indent=2))
+    else:
+        print_table(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, baseline, {r.key: asdict(r) for r in results})
+        return 0
+    return report_failures(compare(results, baseline, args.tolerance))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
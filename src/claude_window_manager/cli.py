@@ -1,21 +1,50 @@
 #!/usr/bin/env python3
-"""CLI for Claude Window Manager - iTerm2 integration."""
+"""CLI for Claude Window Manager - iTerm2 integration.
+
+`cwm` runs from shell aliases and key bindings, so startup time counts:
+commands import what they need when they run. Check the budget with
+`python -m claude_window_manager.bench --startup`.
+"""
 
 import argparse
 import os
 import sys
-from pathlib import Path
 
-from .iterm2_integration import (
-    launch_claude_session,
-    get_claude_iterm_sessions,
-    switch_to_session,
-    COLORS,
-)
+from .colors import COLORS
+
+BACKENDS = {"iterm2": "iTerm2", "tmux": "tmux"}
+
+
+def default_backend() -> str:
+    """tmux when running inside it, iTerm2 otherwise."""
+    return "tmux" if os.environ.get("TMUX") else "iterm2"
+
+
+def load_sessions(backend: str) -> list[dict]:
+    """Sessions for a backend as dicts with at least project and topic."""
+    from .index_client import IndexClient
+
+    if backend == "tmux":
+        return [s.to_dict() for s in IndexClient().tmux_sessions()]
+    return IndexClient().iterm_sessions()
+
+
+def switch_session(backend: str, session: dict) -> bool:
+    """Switch to a session returned by `load_sessions`."""
+    if backend == "tmux":
+        from .tmux_backend import switch_to_pane
+        return switch_to_pane(session["window_id"], session.get("pid"))
+    from .iterm2_integration import switch_to_session
+    return switch_to_session(session["window"], session["tab"], session.get("pid"), session.get("id"))
 
 
 def cmd_new(args):
     """Launch a new Claude session."""
+    from .index_client import IndexClient
+
+    if args.manifest:
+        cmd_new_from(args)
+        return
     project_path = args.path or os.getcwd()
     topic = args.topic or "New Session"
     color = COLORS.get(args.color, COLORS["default"])
@@ -23,25 +52,64 @@ def cmd_new(args):
     print(f"🚀 Launching Claude in: {project_path}")
     print(f"   Topic: {topic}")
 
-    success = launch_claude_session(
-        project_path=project_path,
-        topic=topic,
-        tab_color=color,
-    )
+    if args.backend == "tmux":
+        from .tmux_backend import launch_claude_tmux_session
+        success = launch_claude_tmux_session(project_path=project_path, topic=topic)
+    else:
+        from .iterm2_integration import launch_claude_session
+        success = launch_claude_session(
+            project_path=project_path,
+            topic=topic,
+            tab_color=color,
+        )
 
     if success:
+        IndexClient().request_refresh()
         print("✅ Session launched!")
     else:
         print("❌ Failed to launch session")
         sys.exit(1)
 
 
+def cmd_new_from(args):
+    """Launch every session in a manifest at once."""
+    from .index_client import IndexClient
+    from .manifest import ManifestError, load_manifest
+
+    try:
+        specs = load_manifest(args.manifest)
+    except ManifestError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"🚀 Launching {len(specs)} sessions from {args.manifest}")
+    if args.backend == "tmux":
+        from .tmux_backend import launch_claude_tmux_sessions
+        errors = launch_claude_tmux_sessions(specs)
+    else:
+        from .iterm2_integration import launch_claude_sessions
+        errors = launch_claude_sessions(specs)
+
+    for spec, error in zip(specs, errors):
+        if error is None:
+            print(f"   ✅ {spec.title}")
+        else:
+            print(f"   ❌ {spec.title}: {error}")
+    failed = sum(error is not None for error in errors)
+    if failed < len(specs):
+        IndexClient().request_refresh()
+    if failed:
+        print(f"❌ {failed} of {len(specs)} sessions failed to launch")
+        sys.exit(1)
+    print("✅ Sessions launched!")
+
+
 def cmd_list(args):
     """List all Claude sessions."""
-    sessions = get_claude_iterm_sessions()
+    sessions = load_sessions(args.backend)
 
     if not sessions:
-        print("No Claude sessions found in iTerm2")
+        print(f"No Claude sessions found in {BACKENDS[args.backend]}")
         print("\nLaunch one with: cwm new --topic 'My Task'")
         return
 
@@ -54,7 +122,7 @@ def cmd_list(args):
 
 def cmd_switch(args):
     """Switch to a Claude session."""
-    sessions = get_claude_iterm_sessions()
+    sessions = load_sessions(args.backend)
 
     if not sessions:
         print("No Claude sessions found")
@@ -66,14 +134,25 @@ def cmd_switch(args):
         idx = args.number - 1
         if 0 <= idx < len(sessions):
             session = sessions[idx]
-            switch_to_session(session["window"], session["tab"])
+            switch_session(args.backend, session)
             topic_str = f" — ✳ {session['topic']}" if session.get('topic') else ""
             print(f"✅ Switched to: {session['project']}{topic_str}")
         else:
             print(f"Invalid session number: {args.number}")
             sys.exit(1)
+    elif sys.stdin.isatty() and sys.stdout.isatty():
+        # Type to filter
+        from .picker import pick
+
+        session = pick(sessions)
+        if session is None:
+            print("Cancelled")
+            return
+        switch_session(args.backend, session)
+        topic_str = f" — ✳ {session['topic']}" if session.get('topic') else ""
+        print(f"✅ Switched to: {session['project']}{topic_str}")
     else:
-        # Interactive selection
+        # Numbered selection, e.g. when piped
         print("\n🤖 Claude Sessions:\n")
         for idx, s in enumerate(sessions, 1):
             topic_str = f" — ✳ {s['topic']}" if s.get('topic') else ""
@@ -88,7 +167,7 @@ def cmd_switch(args):
             idx = int(choice) - 1
             if 0 <= idx < len(sessions):
                 session = sessions[idx]
-                switch_to_session(session["window"], session["tab"])
+                switch_session(args.backend, session)
                 topic_str = f" — ✳ {session['topic']}" if session.get('topic') else ""
                 print(f"\n✅ Switched to: {session['project']}{topic_str}")
             else:
@@ -97,6 +176,215 @@ def cmd_switch(args):
             print("\nCancelled")
 
 
+def session_pid(session: dict, processes=None):
+    """A session's Claude pid, joined through its TTY if the session lacks one."""
+    if session.get("pid"):
+        return session["pid"]
+    match = (processes or {}).get(session.get("tty"))
+    return match[0] if match else None
+
+
+def cmd_top(args):
+    """
+    Live CPU and memory per session, with history. Shows the daemon's
+    samples when one is running, and samples locally otherwise.
+    """
+    import time
+
+    from .index_client import query
+    from .sampler import format_bytes, sparkline
+
+    sampler = None  # Local sampling, once no daemon answered
+    live = not args.once and sys.stdout.isatty()
+    try:
+        while True:
+            sessions = load_sessions(args.backend)
+            response = query("top") if sampler is None else None
+            if response is not None:
+                # Sessions from the daemon have their pids
+                resources = response["resources"]
+                pids = {id(s): s.get("pid") for s in sessions}
+            else:
+                if sampler is None:
+                    from .sampler import Sampler
+                    sampler = Sampler(capacity=args.width)
+                processes = None
+                if any(not s.get("pid") for s in sessions):
+                    # No daemon: direct iTerm2 detection has TTYs only
+                    from .window_detector import get_claude_processes
+                    processes = get_claude_processes()
+                pids = {id(s): session_pid(s, processes) for s in sessions}
+                sampler.sample(pids.values())
+                resources = sampler.report()
+
+            rows = []
+            for s in sessions:
+                usage = resources.get(str(pids[id(s)]))
+                if usage and usage["cpu"]:
+                    rows.append((usage, s))
+            rows.sort(key=lambda row: -row[0]["cpu"][-1])
+
+            if live:
+                print("\x1b[H\x1b[J", end="")
+            if rows:
+                print(f"  {'CPU%':>6} {'MEM':>6} {'PROCS':>5}  {'HISTORY':<{args.width}}  SESSION")
+                for usage, s in rows:
+                    cpu = usage["cpu"][-args.width:]
+                    topic_str = f" — ✳ {s['topic']}" if s.get('topic') else ""
+                    print(
+                        f"  {cpu[-1]:>6.1f} {format_bytes(usage['rss'][-1]):>6} {usage['processes']:>5}  "
+                        f"{sparkline(cpu, max(100.0, *cpu)):<{args.width}}  {s['project']}{topic_str}"
+                    )
+            elif sessions and not args.once:
+                print("Sampling...")
+            else:
+                print(f"No Claude sessions found in {BACKENDS[args.backend]}")
+            if args.once and rows:
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print()
+
+
+def cmd_watch(args):
+    """Stream session events as JSON lines (see `events` for the format)."""
+    from .events import SESSION_FIELDS, format_event, select_fields
+    from .indexer import watch_events
+
+    fields = None
+    if args.fields:
+        fields = [f.strip() for f in args.fields.split(",") if f.strip()]
+        unknown = [f for f in fields if f not in SESSION_FIELDS]
+        if unknown:
+            print(f"❌ Unknown fields: {', '.join(unknown)} (choose from {', '.join(SESSION_FIELDS)})", file=sys.stderr)
+            sys.exit(1)
+    try:
+        for event in watch_events(initial=args.initial):
+            print(format_event(select_fields(event, fields)), flush=True)
+    except KeyboardInterrupt:
+        return
+    except BrokenPipeError:
+        # The consumer went away; don't complain about it at exit either
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    print("❌ The session index stopped", file=sys.stderr)
+    sys.exit(1)
+
+
+def cmd_daemon(args):
+    """Run the session indexer in the foreground."""
+    from .applescript import use_persistent_runner
+    from .indexer import SessionIndexer
+    from .metrics import METRICS, configure as configure_metrics, serve_prometheus
+
+    use_persistent_runner()
+    configure_metrics(tracing=METRICS.tracing)
+    if args.metrics_port:
+        try:
+            serve_prometheus(args.metrics_port)
+        except OSError as e:
+            print(f"❌ Cannot serve metrics on port {args.metrics_port}: {e}")
+            sys.exit(1)
+        print(f"📈 Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+    indexer = SessionIndexer(
+        interval=args.interval,
+        watch=not args.no_watch,
+        govern=args.govern,
+        iterm2_api=not args.no_iterm2_api,
+    )
+    try:
+        indexer.serve_forever()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+def print_stats(stats: dict) -> None:
+    """Print a metrics snapshot as a table."""
+    print(f"\n📈 Refresh cycles: {stats['ticks']}")
+    print(
+        f"   Subprocesses per cycle: {stats['subprocesses_per_tick']:.1f} avg, "
+        f"{stats['subprocesses_last_tick']} last"
+    )
+    for command, count in sorted(stats["subprocesses"].items()):
+        print(f"     {command}: {count}")
+    if stats.get("counters"):
+        print("   Events:")
+        for name, count in sorted(stats["counters"].items()):
+            print(f"     {name}: {count}")
+
+    if not stats["spans"]:
+        print("\nNo timings recorded")
+        return
+    print(f"\n  {'span':<32} {'count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, s in stats["spans"].items():
+        print(
+            f"  {name:<32} {s['count']:>7} {s['p50'] * 1000:>9.2f} {s['p90'] * 1000:>9.2f} "
+            f"{s['p99'] * 1000:>9.2f} {s['max'] * 1000:>9.2f}"
+        )
+    print()
+
+
+def cmd_stats(args):
+    """Show refresh timings from the daemon, or from one local refresh."""
+    import json
+
+    from .index_client import query
+    from .indexer import SessionIndexer
+    from .metrics import METRICS, configure as configure_metrics
+
+    if args.stats_command == "usage":
+        cmd_stats_usage(args)
+        return
+
+    response = query("stats")
+    if response is not None:
+        stats = response["stats"]
+        source = "daemon"
+    else:
+        configure_metrics(enabled=True, tracing=METRICS.tracing)
+        SessionIndexer().refresh()
+        stats = METRICS.snapshot()
+        source = "one local refresh (no daemon running)"
+
+    if args.stats_json:
+        print(json.dumps(stats, indent=2))
+        return
+    print(f"Source: {source}")
+    if not stats["enabled"]:
+        print("Metrics are disabled in the daemon (CWM_METRICS=0)")
+        return
+    print_stats(stats)
+
+
+def cmd_stats_usage(args):
+    """Token and session usage per project from all transcripts."""
+    import json
+    import time
+
+    from .usage import CACHE_PATH, collect_usage, print_usage_table, summarize
+
+    started = time.perf_counter()
+    usages, scanned = collect_usage(jobs=args.jobs, cache_path=None if args.no_cache else CACHE_PATH)
+    rows = summarize(usages, daily=args.daily, since=args.since)
+
+    if args.usage_json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print("No usage found in ~/.claude/projects")
+        return
+    print(
+        f"\n📊 Usage from {len(usages)} transcripts "
+        f"({scanned} scanned, {time.perf_counter() - started:.1f}s)\n"
+    )
+    print_usage_table(rows)
+    print()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Claude Window Manager - iTerm2 Integration",
@@ -112,14 +400,44 @@ Examples:
   # List all Claude sessions
   claude-wm list
 
-  # Switch to session interactively
+  # Switch to session interactively (type to filter)
   claude-wm switch
 
   # Switch to session 2 directly
   claude-wm switch 2
+
+  # Work with Claude sessions in tmux panes
+  claude-wm --backend tmux list
+
+  # Keep a session index in the background for instant list/switch
+  claude-wm daemon &
+
+  # Which session is using the CPU?
+  claude-wm top
+
+  # Show refresh timings and subprocess counts
+  claude-wm stats
+
+  # Token usage per project and day, for chargeback
+  claude-wm stats usage --daily --since 2025-01-01
+
+  # Record a Chrome trace of a command (open in chrome://tracing)
+  claude-wm --trace trace.json list
         """,
     )
 
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write a Chrome trace of timed steps to FILE on exit",
+    )
+    parser.add_argument(
+        "--backend", "-b",
+        choices=list(BACKENDS),
+        default=default_backend(),
+        help="Where sessions live (default: tmux inside tmux, otherwise iTerm2)",
+    )
+
     subparsers = parser.add_subparsers(dest="command", help="Commands")
 
     # New session
@@ -132,6 +450,12 @@ Examples:
         default="default",
         help="Tab color scheme",
     )
+    new_parser.add_argument(
+        "--from", "-f",
+        dest="manifest",
+        metavar="FILE",
+        help="Launch every session in a JSON, TOML or YAML manifest",
+    )
 
     # List sessions
     subparsers.add_parser("list", aliases=["ls"], help="List Claude sessions")
@@ -140,16 +464,97 @@ Examples:
     switch_parser = subparsers.add_parser("switch", aliases=["sw"], help="Switch to session")
     switch_parser.add_argument("number", type=int, nargs="?", help="Session number")
 
+    # Session indexer
+    daemon_parser = subparsers.add_parser("daemon", help="Run the background session indexer")
+    daemon_parser.add_argument(
+        "--interval", "-i",
+        type=float,
+        help="Minimum seconds between refreshes; backs off up to CWM_POLL_MAX while idle",
+    )
+    daemon_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on 127.0.0.1:PORT",
+    )
+    daemon_parser.add_argument(
+        "--no-watch",
+        action="store_true",
+        help="Poll only, without watching ~/.claude/projects for changes",
+    )
+    daemon_parser.add_argument(
+        "--no-iterm2-api",
+        action="store_true",
+        help="Poll iTerm2 with AppleScript even if the iterm2 package is installed",
+    )
+    daemon_parser.add_argument(
+        "--govern",
+        choices=["renice"],
+        help="Lower the priority of sessions idle for CWM_GOVERN_AFTER seconds "
+             "(default 1800); switching restores them",
+    )
+
+    # Change feed
+    watch_parser = subparsers.add_parser("watch", help="Stream session events as JSON lines")
+    watch_parser.add_argument("--initial", action="store_true", help="Start with the current sessions")
+    watch_parser.add_argument(
+        "--fields", "-f",
+        help="Comma-separated session fields to include (default: all)",
+    )
+
+    # Resource usage
+    top_parser = subparsers.add_parser("top", help="Live CPU and memory per session")
+    top_parser.add_argument(
+        "--interval", "-i",
+        type=float,
+        default=2.0,
+        help="Seconds between samples (default: 2)",
+    )
+    top_parser.add_argument("--width", "-w", type=int, default=30, help="Samples of history to show")
+    top_parser.add_argument("--once", action="store_true", help="Print one sample and exit")
+
+    # Instrumentation
+    stats_parser = subparsers.add_parser("stats", help="Show refresh timings and subprocess counts")
+    stats_parser.add_argument(
+        "--json", action="store_true", dest="stats_json", help="Print raw stats as JSON"
+    )
+    stats_subparsers = stats_parser.add_subparsers(dest="stats_command")
+    usage_parser = stats_subparsers.add_parser("usage", help="Token and session usage per project")
+    usage_parser.add_argument("--daily", "-d", action="store_true", help="Break down by day")
+    usage_parser.add_argument("--since", metavar="YYYY-MM-DD", help="Only count days from this date")
+    usage_parser.add_argument("--jobs", "-j", type=int, help="Scanner processes (default: one per CPU)")
+    usage_parser.add_argument("--no-cache", action="store_true", help="Rescan every transcript")
+    # Its own dest, so `stats --json usage` doesn't print usage as JSON
+    usage_parser.add_argument(
+        "--json", action="store_true", dest="usage_json", help="Print rows as JSON"
+    )
+
     args = parser.parse_args()
 
-    if args.command in ("new",):
-        cmd_new(args)
-    elif args.command in ("list", "ls"):
-        cmd_list(args)
-    elif args.command in ("switch", "sw"):
-        cmd_switch(args)
-    else:
-        parser.print_help()
+    if args.trace:
+        from .metrics import METRICS, configure as configure_metrics
+
+        configure_metrics(enabled=True, tracing=True)
+    try:
+        if args.command in ("new",):
+            cmd_new(args)
+        elif args.command in ("list", "ls"):
+            cmd_list(args)
+        elif args.command in ("switch", "sw"):
+            cmd_switch(args)
+        elif args.command == "daemon":
+            cmd_daemon(args)
+        elif args.command == "top":
+            cmd_top(args)
+        elif args.command == "watch":
+            cmd_watch(args)
+        elif args.command == "stats":
+            cmd_stats(args)
+        else:
+            parser.print_help()
+    finally:
+        if args.trace:
+            METRICS.write_trace(args.trace)
+            print(f"🧵 Trace written to {args.trace}", file=sys.stderr)
 
 
 if __name__ == "__main__":
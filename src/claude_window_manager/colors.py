@@ -0,0 +1,10 @@
+"""Tab color schemes, kept import-free so the CLI can build its parser cheaply."""
+
+# Predefined color schemes for different project types
+COLORS = {
+    "default": (147, 112, 219),   # Purple
+    "frontend": (100, 149, 237),  # Cornflower blue
+    "backend": (60, 179, 113),    # Medium sea green
+    "devops": (255, 165, 0),      # Orange
+    "urgent": (255, 99, 71),      # Tomato red
+}
@@ -0,0 +1,174 @@
+"""Asynchronous detection core.
+
+Each data source (Terminal windows, the process table, iTerm2 sessions)
+is fetched by its own subprocess, all running concurrently, each with a
+hard deadline. A source that misses its deadline or fails contributes its
+last-known result instead and is reported as stale, so one hung app can't
+stall the whole refresh.
+
+The sync functions in `window_detector` and `iterm2_integration` are thin
+wrappers around `detect_sync()`.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from .applescript import active_runner
+from .metrics import METRICS, span
+
+# asyncio is imported where it's used: it takes ~20ms to load, which every
+# CLI call would otherwise pay even when it never detects anything.
+
+SOURCE_TIMEOUT = 3.0
+
+
+class SourceTimeout(Exception):
+    """Raised when a source misses its deadline."""
+
+
+# Replaces real subprocesses when set (see `use_command_backend`)
+_command_backend: Optional[Callable[[list[str], float], Awaitable[str]]] = None
+
+
+@contextmanager
+def use_command_backend(backend: Callable[[list[str], float], Awaitable[str]]):
+    """Answer `run_command` calls with `backend(argv, timeout)` instead of subprocesses."""
+    global _command_backend
+    previous, _command_backend = _command_backend, backend
+    try:
+        yield backend
+    finally:
+        _command_backend = previous
+
+
+async def run_command(argv: list[str], timeout: float = SOURCE_TIMEOUT) -> str:
+    """Run a command and return its stdout, killing it at the deadline."""
+    METRICS.count_subprocess(argv[0])
+    if _command_backend is not None:
+        return await _command_backend(argv, timeout)
+    import asyncio
+
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        raise SourceTimeout(f"{argv[0]} timed out after {timeout}s")
+    finally:
+        # Also reached when the caller's own deadline cancels us
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    return stdout.decode().rstrip("\n")
+
+
+async def run_applescript_async(script: str, timeout: float = SOURCE_TIMEOUT) -> str:
+    """
+    Execute AppleScript on the warm interpreter when one is in use (see
+    `applescript.use_persistent_runner`), otherwise in its own `osascript`
+    process. Runner errors raise, so the source is reported stale.
+    """
+    runner = active_runner()
+    with span("run_applescript"):
+        if runner is None:
+            return await run_command(["osascript", "-e", script], timeout)
+        import asyncio
+
+        # The runner blocks and answers one script at a time; it kills the
+        # interpreter itself at the deadline
+        return await asyncio.to_thread(runner.run, script, timeout=timeout)
+
+
+@dataclass
+class Source:
+    """A named data source: an async fetch and the value to use before any success."""
+
+    fetch: Callable[[], Awaitable[Any]]
+    empty: Callable[[], Any] = list
+
+
+@dataclass
+class DetectionResult:
+    """Values per source; sources in `stale` are last-known data."""
+
+    values: dict[str, Any]
+    stale: set[str] = field(default_factory=set)
+    errors: dict[str, str] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+
+class Detector:
+    """Runs sources concurrently with per-source deadlines."""
+
+    def __init__(self, sources: dict[str, Source], timeout: float = SOURCE_TIMEOUT):
+        self.sources = sources
+        self.timeout = timeout
+        self.last_known: dict[str, Any] = {}
+
+    async def detect(self, names: Optional[Iterable[str]] = None) -> DetectionResult:
+        """Fetch the named sources (default: all) concurrently."""
+        import asyncio
+
+        names = list(self.sources if names is None else names)
+        outcomes = await asyncio.gather(
+            *(self._fetch(name) for name in names),
+            return_exceptions=True,
+        )
+
+        result = DetectionResult(values={})
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                result.stale.add(name)
+                result.errors[name] = str(outcome) or type(outcome).__name__
+                if name not in self.last_known:
+                    self.last_known[name] = self.sources[name].empty()
+            else:
+                self.last_known[name] = outcome
+            result.values[name] = self.last_known[name]
+        return result
+
+    async def _fetch(self, name: str) -> Any:
+        import asyncio
+
+        try:
+            return await asyncio.wait_for(self.sources[name].fetch(), self.timeout)
+        except asyncio.TimeoutError:
+            raise SourceTimeout(f"{name} timed out after {self.timeout}s")
+
+
+def default_sources() -> dict[str, Source]:
+    """The built-in sources: Terminal windows, Claude processes, iTerm2 sessions, tmux panes."""
+    from .iterm2_integration import get_claude_iterm_sessions_async
+    from .tmux_backend import get_tmux_panes_async
+    from .window_detector import get_claude_processes_async, get_terminal_windows_async
+
+    return {
+        "terminal": Source(get_terminal_windows_async, list),
+        "processes": Source(get_claude_processes_async, dict),
+        "iterm2": Source(get_claude_iterm_sessions_async, list),
+        "tmux": Source(get_tmux_panes_async, list),
+    }
+
+
+_detector: Optional[Detector] = None
+
+
+def get_detector() -> Detector:
+    """Shared detector, so last-known data survives between calls."""
+    global _detector
+    if _detector is None:
+        _detector = Detector(default_sources())
+    return _detector
+
+
+def detect_sync(names: Optional[Iterable[str]] = None) -> DetectionResult:
+    """Blocking wrapper around `get_detector().detect()`."""
+    import asyncio
+
+    return asyncio.run(get_detector().detect(names))
@@ -0,0 +1,52 @@
+"""Diffing of session snapshots between refreshes."""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+
+def window_key(session) -> Hashable:
+    """Default diff key: the Terminal window id."""
+    return session.window_id
+
+
+@dataclass
+class SessionDiff:
+    """What changed between two snapshots."""
+
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    changed: list[tuple[Any, Any]] = field(default_factory=list)  # (old, new)
+    reordered: bool = False
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.reordered)
+
+    @property
+    def structural(self) -> bool:
+        """True if sessions were added, removed or moved."""
+        return bool(self.added or self.removed or self.reordered)
+
+
+def diff_sessions(
+    old: list,
+    new: list,
+    key: Callable[[Any], Hashable] = window_key,
+) -> SessionDiff:
+    """Compare two snapshots, matching sessions by `key`."""
+    old_by_key = {key(s): s for s in old}
+    new_by_key = {key(s): s for s in new}
+
+    diff = SessionDiff()
+    for k, session in new_by_key.items():
+        previous = old_by_key.get(k)
+        if previous is None:
+            diff.added.append(session)
+        elif previous is not session and previous != session:
+            diff.changed.append((previous, session))
+    diff.removed = [s for k, s in old_by_key.items() if k not in new_by_key]
+
+    kept_old = [k for k in old_by_key if k in new_by_key]
+    kept_new = [k for k in new_by_key if k in old_by_key]
+    diff.reordered = kept_old != kept_new
+    return diff
@@ -0,0 +1,178 @@
+"""Session change events, as streamed by `cwm watch`.
+
+The indexer diffs each changed snapshot against the previous one once and
+fans the resulting events out to every subscriber, so any number of
+status bars can follow sessions on one detection loop. Each event is one
+JSON object per line (format version 1):
+
+    {"v": 1, "event": "added", "time": 1767225600.0, "id": "iterm2:5F3A…", "session": {...}}
+    {"v": 1, "event": "renamed", ..., "changes": {"topic": ["Old", "New"]}}
+
+Events:
+
+- added / removed: a session appeared or went away ("initial": true on
+  the added events `--initial` starts with)
+- renamed: its title, project, topic or language changed
+- status: it started or stopped waiting for input, or its process changed
+
+"id" is stable for a session's lifetime: the backend plus its window id
+(Terminal), session id (iTerm2) or pane id (tmux). "session" has the
+fields in SESSION_FIELDS, null where a backend doesn't know one.
+"""
+
+import json
+import queue
+import threading
+from typing import Iterable, Optional
+
+VERSION = 1
+SESSION_FIELDS = (
+    "backend", "project", "topic", "language", "title",
+    "pid", "tty", "waiting", "last_activity", "window", "tab",
+)
+NAME_FIELDS = ("title", "project", "topic", "language")
+STATUS_FIELDS = ("waiting", "pid")
+SUBSCRIBER_BACKLOG = 1000  # Events a slow subscriber may fall behind by
+
+
+def session_id(session: dict, backend: str) -> str:
+    if backend == "iterm2":
+        return f"iterm2:{session['id']}"
+    if backend == "tmux":
+        return f"tmux:%{session['window_id']}"
+    return f"terminal:{session['window_id']}"
+
+
+def session_view(session: dict, backend: str) -> dict:
+    """A snapshot session as it appears in events."""
+    return {
+        "backend": backend,
+        "project": session.get("project") or None,
+        "topic": session.get("topic") or None,
+        "language": session.get("language"),
+        "title": session.get("window_name", session.get("name")),
+        "pid": session.get("pid"),
+        "tty": session.get("tty"),
+        "waiting": session.get("waiting_for_input"),
+        "last_activity": session.get("last_activity"),
+        # Terminal window id, or iTerm2 window and tab numbers
+        "window": session.get("window", session.get("window_id") if backend == "terminal" else None),
+        "tab": session.get("tab"),
+    }
+
+
+def snapshot_views(snapshot: dict) -> dict[str, dict]:
+    """Every session in an indexer snapshot, by event id."""
+    return {
+        session_id(session, backend): session_view(session, backend)
+        for backend in ("terminal", "iterm2", "tmux")
+        for session in snapshot.get(backend, [])
+    }
+
+
+def _event(name: str, time: float, sid: str, session: dict, **extra) -> dict:
+    return {"v": VERSION, "event": name, "time": time, "id": sid, "session": session, **extra}
+
+
+def diff_events(old: dict[str, dict], new: dict[str, dict], time: float) -> list[dict]:
+    """The events turning `old` views into `new` ones: removals first, then the rest in listed order."""
+    events = [_event("removed", time, sid, session) for sid, session in old.items() if sid not in new]
+    for sid, session in new.items():
+        previous = old.get(sid)
+        if previous is None:
+            events.append(_event("added", time, sid, session))
+            continue
+        for name, fields in (("renamed", NAME_FIELDS), ("status", STATUS_FIELDS)):
+            changes = {f: [previous[f], session[f]] for f in fields if previous[f] != session[f]}
+            if changes:
+                events.append(_event(name, time, sid, session, changes=changes))
+    return events
+
+
+def initial_events(views: dict[str, dict], time: float) -> list[dict]:
+    return [_event("added", time, sid, session, initial=True) for sid, session in views.items()]
+
+
+def select_fields(event: dict, fields: Optional[Iterable[str]]) -> dict:
+    """The event with only `fields` of its session (and of its changes)."""
+    if fields is None:
+        return event
+    event = dict(event)
+    event["session"] = {f: event["session"][f] for f in fields}
+    if "changes" in event:
+        event["changes"] = {f: v for f, v in event["changes"].items() if f in fields}
+    return event
+
+
+def format_event(event: dict) -> str:
+    """One NDJSON line (without the newline)."""
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+
+
+class ChangeFeed:
+    """
+    Turns the indexer's changed snapshots into events, once, for every
+    subscriber. A subscriber that falls SUBSCRIBER_BACKLOG events behind
+    is dropped (its queue gets None) rather than holding events forever.
+    """
+
+    def __init__(self):
+        self._views: dict[str, dict] = {}
+        self._time = 0.0
+        self._snapshot: Optional[dict] = None  # Not yet turned into views
+        self._subscribers: list[queue.Queue] = []
+        self._lock = threading.Lock()
+
+    def publish(self, snapshot: dict) -> None:
+        with self._lock:
+            if not self._subscribers:
+                self._snapshot = snapshot  # Diffed against when someone subscribes
+                return
+            views = snapshot_views(snapshot)
+            events = diff_events(self._current_views(), views, snapshot.get("updated_at", 0.0))
+            self._views, self._time = views, snapshot.get("updated_at", 0.0)
+            for subscriber in list(self._subscribers):
+                try:
+                    for event in events:
+                        subscriber.put_nowait(event)
+                except queue.Full:
+                    self._drop(subscriber)
+
+    def subscribe(self, initial: bool = False) -> queue.Queue:
+        """A queue of events from now on (preceded, if `initial`, by the current sessions)."""
+        with self._lock:
+            events = initial_events(self._current_views(), self._time) if initial else []
+            # Room for the initial events on top of the backlog, however
+            # many sessions there are
+            subscriber: queue.Queue = queue.Queue(len(events) + SUBSCRIBER_BACKLOG)
+            for event in events:
+                subscriber.put_nowait(event)
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def close(self) -> None:
+        """End every subscription."""
+        with self._lock:
+            for subscriber in list(self._subscribers):
+                self._drop(subscriber)
+
+    def _current_views(self) -> dict[str, dict]:
+        if self._snapshot is not None:
+            self._views = snapshot_views(self._snapshot)
+            self._time = self._snapshot.get("updated_at", 0.0)
+            self._snapshot = None
+        return self._views
+
+    def _drop(self, subscriber: queue.Queue) -> None:
+        self._subscribers.remove(subscriber)
+        while True:
+            try:
+                subscriber.put_nowait(None)
+                return
+            except queue.Full:
+                subscriber.get_nowait()  # Make room for the end marker
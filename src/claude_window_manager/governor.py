@@ -0,0 +1,198 @@
+"""Lower the priority of Claude sessions left idle.
+
+A session counts as active when its window title changes, its transcript
+records activity, or its process tree uses CPU. Once a session has been
+quiet for `idle_after` seconds, the governor lowers the priority of its
+process tree ("renice"). Sessions in the middle of a turn (the transcript
+says Claude isn't waiting for input) or using CPU are never touched.
+
+There is no suspending: a SIGSTOP to a shell's foreground job hands the
+terminal back to the shell, and SIGCONT doesn't return it, so the session
+would stay stopped in the background until someone typed `fg`.
+
+On Linux, an unprivileged process can raise a nice value but not lower it
+again (that needs CAP_SYS_NICE or a high enough RLIMIT_NICE). Resuming
+then leaves the session at IDLE_NICE, which only costs it CPU time while
+something else competes for it; macOS's background band has no such limit.
+
+Governed processes are recorded in the state dir, so `resume(pid)` works
+from any process: the switch functions call it before bringing a session
+to the front, and the governor lets go of everything when it stops.
+"""
+
+import fcntl
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from .paths import STATE_DIR
+from .sampler import Sample
+
+STATE_PATH = STATE_DIR / "governed.json"
+ACTIONS = ("renice",)
+IDLE_AFTER = float(os.environ.get("CWM_GOVERN_AFTER", 30 * 60))
+BUSY_CPU = 2.0  # Percent of a core; above this a session is busy
+IDLE_NICE = 10
+# macOS: the background band throttles CPU and I/O, and, unlike a raised
+# nice value, can be undone without root
+PRIO_DARWIN_PROCESS = 4
+PRIO_DARWIN_BG = 0x1000
+
+
+@contextmanager
+def _state(path=STATE_PATH):
+    """The governed-process record, locked for a read-modify-write."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            governed = json.loads(path.read_text())
+        except (OSError, ValueError):
+            governed = {}
+        before = dict(governed)
+        yield governed
+        if governed != before:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(governed))
+            os.replace(tmp, path)
+
+
+def lower_priority(pids: Iterable[int]) -> dict[str, int]:
+    """Deprioritize processes; returns each one's previous nice value."""
+    previous = {}
+    for pid in pids:
+        try:
+            if sys.platform == "darwin":
+                os.setpriority(PRIO_DARWIN_PROCESS, pid, PRIO_DARWIN_BG)
+                previous[str(pid)] = 0
+            else:
+                nice = os.getpriority(os.PRIO_PROCESS, pid)
+                os.setpriority(os.PRIO_PROCESS, pid, max(nice, IDLE_NICE))
+                previous[str(pid)] = nice
+        except OSError:
+            continue  # Exited, or not ours
+    return previous
+
+
+def restore_priority(previous: dict[str, int]) -> None:
+    """Undo `lower_priority`, as far as the OS allows."""
+    for pid, nice in previous.items():
+        try:
+            if sys.platform == "darwin":
+                os.setpriority(PRIO_DARWIN_PROCESS, int(pid), 0)
+            else:
+                os.setpriority(os.PRIO_PROCESS, int(pid), nice)
+        except PermissionError:
+            # Lowering nice needs privileges (see the module docstring): the
+            # process keeps running, just reniced
+            continue
+        except OSError:
+            continue  # Exited
+
+
+def _release(record: dict) -> None:
+    restore_priority(record["nice"])
+
+
+def resume(pid: Optional[int], state_path=STATE_PATH) -> bool:
+    """
+    Undo whatever the governor did to the session with Claude process
+    `pid`. Returns whether it was governed.
+    """
+    if not pid or not state_path.exists():
+        return False
+    with _state(state_path) as governed:
+        record = governed.pop(str(pid), None)
+    if record is None:
+        return False
+    _release(record)
+    return True
+
+
+class Governor:
+    """Tracks session activity and governs sessions idle past `idle_after`."""
+
+    def __init__(
+        self,
+        action: str = "renice",
+        idle_after: float = IDLE_AFTER,
+        state_path=STATE_PATH,
+        clock=time.monotonic,
+    ):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown governor action: {action!r}")
+        self.action = action
+        self.idle_after = idle_after
+        self.state_path = state_path
+        self.clock = clock
+        # pid -> (activity signature, when it last changed)
+        self._activity: dict[int, tuple[tuple, float]] = {}
+        self._governed: set[int] = set()  # As of the last tick
+
+    def update(
+        self,
+        sessions: list[dict],
+        samples: dict[int, Sample],
+        trees: dict[int, list[int]],
+    ) -> list[int]:
+        """
+        Record one tick of activity and govern sessions that went idle.
+        `samples` and `trees` come from the sampler's latest tick. Returns
+        the pids governed this tick.
+        """
+        now = self.clock()
+        current = {}
+        busy = set()
+        for session in sessions:
+            pid = session.get("pid")
+            if not pid:
+                continue
+            title = session.get("window_name") or session.get("name")
+            signature = (title, session.get("topic"), session.get("last_activity"))
+            previous = self._activity.get(pid)
+            sample = samples.get(pid)
+            if (
+                previous is None
+                or previous[0] != signature
+                or (sample is not None and sample.cpu >= BUSY_CPU)
+            ):
+                current[pid] = (signature, now)
+            else:
+                current[pid] = previous
+            # Mid-turn (e.g. waiting on the API or a quiet tool) is busy too
+            if session.get("waiting_for_input") is False:
+                busy.add(pid)
+
+        governed_now = []
+        with _state(self.state_path) as governed:
+            # Resumed by a switch (in any process) since the last tick: the
+            # idle time starts over
+            for pid in self._governed - {int(p) for p in governed}:
+                if pid in current:
+                    current[pid] = (current[pid][0], now)
+            for pid in list(governed):
+                # Let go of sessions that ended or came back to life, and of
+                # leftovers from a previous run (seen for the first time)
+                if int(pid) not in current or current[int(pid)][1] == now:
+                    _release(governed.pop(pid))
+            for pid, (_, since) in current.items():
+                if str(pid) in governed or pid in busy or now - since < self.idle_after:
+                    continue
+                tree = trees.get(pid) or [pid]
+                governed[str(pid)] = {"action": "renice", "nice": lower_priority(tree)}
+                governed_now.append(pid)
+            self._governed = {int(p) for p in governed}
+        self._activity = current
+        return governed_now
+
+    def release_all(self) -> None:
+        """Undo everything this governor (or a previous run) did."""
+        with _state(self.state_path) as governed:
+            records = list(governed.values())
+            governed.clear()
+        for record in records:
+            _release(record)
+
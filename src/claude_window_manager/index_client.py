@@ -0,0 +1,91 @@
+"""Client side of the session indexer: queries over its Unix socket.
+
+`cwm list` and `cwm switch` import this module for `IndexClient`, so it
+only needs json, socket and paths; what the fallback to direct detection
+needs is imported when there's no indexer to answer. See `indexer` for the
+protocol.
+"""
+
+import json
+import socket
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from .paths import SOCKET_PATH
+
+if TYPE_CHECKING:
+    from .session import ClaudeSession, RecordCache
+
+QUERY_TIMEOUT = 0.5
+REFRESH_TIMEOUT = 10.0
+
+
+def query(
+    cmd: str,
+    socket_path: Path = SOCKET_PATH,
+    timeout: float = QUERY_TIMEOUT,
+) -> Optional[dict]:
+    """Send a command to the indexer. Returns None if it isn't reachable."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps({"cmd": cmd}).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    try:
+        response = json.loads(line)
+    except ValueError:
+        return None
+    return response if response.get("ok") else None
+
+
+class IndexClient:
+    """Reads sessions from a running indexer, falling back to direct detection."""
+
+    def __init__(self, socket_path: Path = SOCKET_PATH):
+        self.socket_path = socket_path
+        # Records decoded from the previous snapshot per backend, reused
+        # while unchanged
+        self._records: dict[str, "RecordCache"] = {}
+
+    def terminal_sessions(self, fresh: bool = False) -> list["ClaudeSession"]:
+        if fresh:
+            response = query("refresh", socket_path=self.socket_path, timeout=REFRESH_TIMEOUT)
+        else:
+            response = query("snapshot", socket_path=self.socket_path)
+        if response is None:
+            from .window_detector import get_claude_sessions
+            return get_claude_sessions()
+        return self._decode(response["snapshot"]["terminal"], "terminal")
+
+    def iterm_sessions(self) -> list[dict]:
+        response = query("snapshot", socket_path=self.socket_path)
+        if response is None:
+            from .iterm2_integration import get_claude_iterm_sessions
+            return get_claude_iterm_sessions()
+        return response["snapshot"]["iterm2"]
+
+    def tmux_sessions(self) -> list["ClaudeSession"]:
+        response = query("snapshot", socket_path=self.socket_path)
+        if response is None:
+            from .tmux_backend import get_claude_tmux_sessions
+            return get_claude_tmux_sessions()
+        return self._decode(response["snapshot"].get("tmux", []), "tmux")
+
+    def resources(self) -> dict[str, dict]:
+        """The daemon's CPU and memory history per session pid; empty without one."""
+        response = query("top", socket_path=self.socket_path)
+        return response["resources"] if response is not None else {}
+
+    def request_refresh(self) -> None:
+        query("wake", socket_path=self.socket_path)
+
+    def _decode(self, data: list[dict], backend: str) -> list["ClaudeSession"]:
+        from .session import RecordCache, sessions_from_dicts
+
+        if backend not in self._records:
+            self._records[backend] = RecordCache()
+        return sessions_from_dicts(data, self._records[backend])
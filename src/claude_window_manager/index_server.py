@@ -0,0 +1,60 @@
+"""The indexer's Unix-socket server (see `indexer` for the protocol)."""
+
+import json
+import socketserver
+from pathlib import Path
+
+from .index_client import query
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Answers protocol requests, one JSON object per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("cmd") == "watch":
+                    self._watch(bool(request.get("initial")))
+                    return
+                response = self.server.indexer.handle_request(request)
+            except (ValueError, AttributeError) as e:
+                response = {"ok": False, "error": str(e)}
+            try:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+            except OSError:
+                return
+
+    def _watch(self, initial: bool) -> None:
+        """Stream events to the client until it disconnects or the indexer stops."""
+        from .events import format_event
+
+        indexer = self.server.indexer
+        indexer.snapshot  # Something to diff against
+        events = indexer.feed.subscribe(initial)
+        try:
+            self.wfile.write(b'{"ok": true}\n')
+            while (event := events.get()) is not None:
+                self.wfile.write(format_event(event).encode() + b"\n")
+        except OSError:
+            pass
+        finally:
+            indexer.feed.unsubscribe(events)
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(indexer, socket_path: Path) -> Server:
+    """Bind the socket, replacing a stale one left by a dead indexer."""
+    socket_path = Path(socket_path)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        if query("ping", socket_path=socket_path) is not None:
+            raise RuntimeError(f"Indexer already running on {socket_path}")
+        socket_path.unlink()
+    server = Server(str(socket_path), RequestHandler)
+    socket_path.chmod(0o600)
+    server.indexer = indexer
+    return server
@@ -0,0 +1,425 @@
+"""Background session indexer with a Unix-socket query API.
+
+The indexer keeps the latest session snapshot in memory and answers
+one-line JSON requests over a local socket, so `cwm list`/`cwm switch`
+and the menu bar apps don't have to run AppleScript themselves.
+
+Protocol: the client sends one JSON object per line, e.g.
+``{"cmd": "snapshot"}``, and receives one JSON object per line back.
+
+The client side (`query`, `IndexClient`) lives in `index_client`, so
+`cwm list` and `cwm switch` don't load the indexer's dependencies.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from .detection import detect_sync
+from .events import ChangeFeed
+from .governor import Governor
+from .index_client import REFRESH_TIMEOUT, IndexClient, query
+from .index_server import make_server
+from .iterm2_api import ITerm2Monitor, api_installed
+from .iterm2_writes import flush_writes
+from .metrics import METRICS, span
+from .paths import SOCKET_PATH
+from .refresh import SingleFlight
+from .sampler import Sampler
+from .scheduler import AdaptiveScheduler, Poller, SchedulerConfig
+from .session import ClaudeSession, RecordCache, sessions_from_dicts
+from .tmux_backend import TmuxControl, build_tmux_sessions, tmux_available
+from .transcripts import enrich_sessions, get_tailer, save_tailer
+from .watcher import PollingBackend, Watcher
+from .window_detector import build_claude_sessions
+# While file events announce changes, polling is only a safety net (for
+# windows closed without a final transcript write, for example)
+WATCHED_MIN_INTERVAL = 10.0
+
+
+# Records and their dicts from the last snapshot, reused for sessions that
+# haven't changed
+_records = RecordCache()
+# The last detection, before transcripts: (terminal sessions, tmux sessions,
+# iTerm2 sessions, stale sources), re-enriched when only transcripts change
+_detected: Optional[tuple] = None
+
+
+def collect_snapshot() -> dict:
+    """Run full detection and return a JSON-compatible snapshot."""
+    global _detected
+    # All sources run concurrently; slow ones contribute last-known data
+    result = detect_sync()
+    sessions = build_claude_sessions(result["terminal"], result["processes"], _records)
+    tmux_sessions = build_tmux_sessions(result["tmux"], result["processes"], _records)
+    # iTerm2 sessions only know their TTY; the process table has the pid
+    iterm2 = [
+        {**s, "pid": result["processes"].get(s["tty"], (None,))[0]}
+        for s in result["iterm2"]
+    ]
+    _detected = (sessions, tmux_sessions, iterm2, sorted(result.stale))
+    return _enriched_snapshot(get_tailer().update())
+
+
+def collect_transcript_snapshot(paths: Optional[Iterable[str]] = None) -> Optional[dict]:
+    """
+    The last detection with transcripts read again (only `paths`, if
+    given), without running AppleScript. None before the first detection.
+    """
+    if _detected is None:
+        return None
+    return _enriched_snapshot(get_tailer().update(paths))
+
+
+def _enriched_snapshot(statuses: dict) -> dict:
+    sessions, tmux_sessions, iterm2, stale = _detected
+    # Topic and status from transcripts, reading only what was appended
+    enriched = enrich_sessions(sessions + tmux_sessions, statuses, _records)
+    sessions, tmux_sessions = enriched[:len(sessions)], enriched[len(sessions):]
+    snapshot = {
+        "updated_at": time.time(),
+        "terminal": [_records.reuse(("dict", s), s.to_dict) for s in sessions],
+        "iterm2": iterm2,
+        "tmux": [_records.reuse(("dict", s), s.to_dict) for s in tmux_sessions],
+        "stale": stale,
+    }
+    # After a transcripts-only refresh the detection's own records are
+    # dropped too; the next detection just builds them again
+    _records.tick()
+    return snapshot
+
+
+def session_pids(snapshot: dict) -> set[int]:
+    """The Claude process of every session in a snapshot."""
+    return {s["pid"] for s in all_sessions(snapshot) if s.get("pid")}
+
+
+def all_sessions(snapshot: dict) -> list[dict]:
+    return [s for key in ("terminal", "iterm2", "tmux") for s in snapshot.get(key, [])]
+
+
+def _sessions_changed(old: Optional[dict], new: dict) -> bool:
+    if old is None:
+        return True
+    return any(old.get(key) != new.get(key) for key in ("terminal", "iterm2", "tmux"))
+
+
+class SessionIndexer:
+    """Keeps an up-to-date session snapshot and serves it over a Unix socket."""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        collect: Callable[[], dict] = collect_snapshot,
+        collect_transcripts: Optional[Callable[[set[str]], Optional[dict]]] = None,
+        scheduler: Optional[AdaptiveScheduler] = None,
+        watch: bool = True,
+        govern: Optional[str] = None,
+        iterm2_api: bool = True,
+    ):
+        """
+        `collect_transcripts(paths)` re-reads changed transcripts over the
+        last detection (None if there is none); it defaults to
+        `collect_transcript_snapshot` along with the default `collect`.
+        `govern` ("renice", default: $CWM_GOVERN) turns on the
+        idle-session governor; see `governor.Governor`. `iterm2_api` follows
+        iTerm2 through its Python API when the package is installed; see
+        `iterm2_api.ITerm2Monitor`.
+        """
+        if scheduler is None:
+            config = SchedulerConfig.from_env()
+            if interval is not None:
+                config.min_interval = interval
+            elif watch:
+                config.min_interval = max(config.min_interval, WATCHED_MIN_INTERVAL)
+            scheduler = AdaptiveScheduler(config)
+        self.scheduler = scheduler
+        self.collect = collect
+        if collect_transcripts is None and collect is collect_snapshot:
+            collect_transcripts = collect_transcript_snapshot
+        self.collect_transcripts = collect_transcripts
+        self.watch = watch
+        self.iterm2_api = iterm2_api
+        self.running = False
+        self.poller = Poller(scheduler, self._poll)
+        self.watchers: list = []  # Event sources that trigger refreshes
+        self.listeners: list[Callable[[dict], None]] = []  # Called when sessions change
+        self.feed = ChangeFeed()  # Session events for `cwm watch` subscribers
+        self.sampler = Sampler()  # CPU and memory per session, a sample per refresh
+        self.governor = None
+        govern = govern or os.environ.get("CWM_GOVERN")
+        if govern:
+            self.governor = Governor(govern)
+        self._terminal_records = RecordCache()  # See IndexClient
+        self._tmux_records = RecordCache()
+        # One refresh at a time, whether the poller or a socket request asks:
+        # detection state isn't thread-safe, and snapshots must publish in order
+        self._flight = SingleFlight(self._collect_and_publish)
+        # Held while collecting and publishing, so transcript-only refreshes
+        # (from the watcher's thread) don't interleave with full ones
+        self._publish_lock = threading.Lock()
+        self._snapshot: Optional[dict] = None
+        self._lock = threading.Lock()
+        self._server = None  # index_server.Server while serving
+
+    @property
+    def snapshot(self) -> dict:
+        """Latest snapshot, collecting one first if none exists yet."""
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    def refresh(self) -> dict:
+        """Collect a new snapshot and publish it."""
+        return self._refresh()[0]
+
+    def _refresh(self) -> tuple[dict, bool]:
+        """Refresh, or wait for the refresh already running and share its result."""
+        return self._flight.request().result()
+
+    def _collect_and_publish(self) -> tuple[dict, bool]:
+        with self._publish_lock:
+            with span("refresh"):
+                snapshot = self.collect()
+            with span("sample"):
+                samples = self.sampler.sample(session_pids(snapshot))
+            if self.governor is not None:
+                with span("govern"):
+                    self.governor.update(all_sessions(snapshot), samples, self.sampler.trees)
+            METRICS.tick()
+            return snapshot, self._publish(snapshot)
+
+    def refresh_transcripts(self, paths: set[str]) -> None:
+        """Re-read the transcripts at `paths` over the last detection, and publish."""
+        if self.collect_transcripts is None:
+            self.poller.poke(boost=False)
+            return
+        with self._publish_lock:
+            snapshot = self.collect_transcripts(paths)
+            if snapshot is not None:
+                self._publish(snapshot)
+
+    def _publish(self, snapshot: dict) -> bool:
+        """Make `snapshot` current and tell subscribers; True if sessions changed."""
+        with self._lock:
+            previous, self._snapshot = self._snapshot, snapshot
+        changed = _sessions_changed(previous, snapshot)
+        if changed:
+            self.feed.publish(snapshot)
+            for listener in self.listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    print(f"Error notifying listener: {e}")
+        # Badge/color writes queued since the last tick (listeners'
+        # included) go out together, as one script
+        with span("iterm2_writes"):
+            flush_writes(snapshot["iterm2"])
+        return changed
+
+    def _poll(self) -> bool:
+        return self._refresh()[1]
+
+    def add_listener(self, callback: Callable[[dict], None]) -> None:
+        """Call `callback(snapshot)` from the refreshing thread whenever sessions change."""
+        self.listeners.append(callback)
+
+    def request_refresh(self) -> None:
+        """Refresh immediately and keep polling fast for a while."""
+        self.poller.poke()
+
+    def _on_change_event(self, *_) -> None:
+        """Something changed outside (a transcript, a tmux notification): refresh soon."""
+        self.poller.poke(boost=False)
+
+    def _on_transcripts_changed(self, paths: set[str], structural: bool) -> None:
+        """
+        Transcripts created, deleted or moved mean sessions may have come or
+        gone: detect again. Appends only change topics and status, so just
+        the transcripts are read again.
+        """
+        if structural:
+            if self.collect is collect_snapshot:
+                get_tailer().changed(paths)  # For the detection to read
+            self.poller.poke(boost=False)
+        else:
+            self.refresh_transcripts(paths)
+
+    def terminal_sessions(self, fresh: bool = False) -> list[ClaudeSession]:
+        """Terminal.app sessions from the current (or, if `fresh`, a new) snapshot."""
+        snapshot = self.refresh() if fresh else self.snapshot
+        return sessions_from_dicts(snapshot["terminal"], self._terminal_records)
+
+    def iterm_sessions(self) -> list[dict]:
+        """iTerm2 sessions from the current snapshot."""
+        return self.snapshot["iterm2"]
+
+    def tmux_sessions(self) -> list[ClaudeSession]:
+        """tmux sessions from the current snapshot."""
+        return sessions_from_dicts(self.snapshot["tmux"], self._tmux_records)
+
+    def resources(self) -> dict[str, dict]:
+        """CPU and memory history per session pid (see `Sampler.report`)."""
+        return self.sampler.report()
+
+    def handle_request(self, request: dict) -> dict:
+        """Answer a single protocol request."""
+        cmd = request.get("cmd")
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "snapshot":
+            if self.scheduler.paused:
+                # Polling stopped while the user was away, so the snapshot may
+                # be a minute old; a query means they're back
+                self.poller.poke(boost=False)
+                return {"ok": True, "snapshot": self.refresh()}
+            return {"ok": True, "snapshot": self.snapshot}
+        if cmd == "refresh":
+            return {"ok": True, "snapshot": self.refresh()}
+        if cmd == "stats":
+            return {"ok": True, "stats": METRICS.snapshot()}
+        if cmd == "top":
+            return {"ok": True, "resources": self.resources()}
+        if cmd == "wake":
+            self.request_refresh()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command: {cmd!r}"}
+
+    def start(self, socket_path: Path = SOCKET_PATH) -> None:
+        """Start the refresh loop and socket server on background threads."""
+        self.running = True
+        self._server = make_server(self, socket_path)
+        self.poller.start()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+        transcripts = None
+        if self.watch:
+            transcripts = Watcher(self._on_transcripts_changed)
+            self.watchers.append(transcripts)
+        if tmux_available():
+            self.watchers.append(TmuxControl(self._on_change_event))
+        if self.iterm2_api and api_installed():
+            self.watchers.append(ITerm2Monitor(self._on_change_event))
+        for watcher in self.watchers:
+            watcher.start()
+        if transcripts is not None and self.collect is collect_snapshot:
+            # With file events, refreshes read only the transcripts they
+            # name; scans of everything are left to the polling fallback.
+            # Reporting the root has the next one scan once more, for
+            # changes made before the watch was in place
+            tailer = get_tailer()
+            tailer.watched = not isinstance(transcripts.backend, PollingBackend)
+            tailer.changed([str(transcripts.root)])
+
+    def serve_forever(self, socket_path: Path = SOCKET_PATH) -> None:
+        """Run the indexer in the foreground until interrupted."""
+        self.start(socket_path)
+        try:
+            while self.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop serving and remove the socket."""
+        self.running = False
+        self.poller.stop()
+        for watcher in self.watchers:
+            watcher.stop()
+        self.watchers.clear()
+        if self.collect is collect_snapshot:
+            get_tailer().watched = False
+            save_tailer()
+        self.feed.close()
+        if self.governor is not None:
+            self.governor.release_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            Path(self._server.server_address).unlink(missing_ok=True)
+            self._server = None
+
+
+def connect_or_start(socket_path: Path = SOCKET_PATH):
+    """
+    Attach to a running indexer, or host one in this process.
+
+    Used by the menu bar apps so that the app and the CLI share one
+    snapshot instead of each polling on its own.
+    """
+    if query("ping", socket_path=socket_path) is not None:
+        return IndexClient(socket_path)
+    indexer = SessionIndexer()
+    try:
+        indexer.start(socket_path)
+    except (OSError, RuntimeError):
+        return IndexClient(socket_path)
+    return indexer
+
+
+def watch_events(initial: bool = False, socket_path: Path = SOCKET_PATH) -> Iterator[dict]:
+    """
+    Session events (see `events`) from the running indexer, or from one
+    hosted in this process if none is running, which later watchers then
+    share. With `initial`, the current sessions come first, as "added"
+    events. Ends when the indexer stops.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(REFRESH_TIMEOUT)  # The first snapshot may need a refresh
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps({"cmd": "watch", "initial": initial}).encode() + b"\n")
+        stream = sock.makefile("rb")
+        ack = json.loads(stream.readline() or b"null")
+    except (OSError, ValueError):
+        ack = None
+    if isinstance(ack, dict) and ack.get("ok"):
+        sock.settimeout(None)
+        with sock, stream:
+            for line in stream:
+                yield json.loads(line)
+        return
+    sock.close()
+
+    index = connect_or_start(socket_path)
+    if not isinstance(index, SessionIndexer):
+        raise RuntimeError("The running indexer doesn't support watch; restart it")
+    index.snapshot  # Something to diff against
+    events = index.feed.subscribe(initial)
+    try:
+        while (event := events.get()) is not None:
+            yield event
+    finally:
+        index.feed.unsubscribe(events)
+
+
+def follow_changes(index, poller: Poller):
+    """
+    Wake an app's poller when sessions may have changed, leaving its timer
+    as a slow safety net.
+
+    An in-process indexer reports changed snapshots directly. With a
+    separate daemon, the app watches transcripts itself and then polls the
+    daemon closely for a while, which is cheap: it only reads the socket.
+    Returns the app's own watcher, if one was started.
+    """
+    config = poller.scheduler.config
+    config.min_interval = max(config.min_interval, WATCHED_MIN_INTERVAL)
+    add_listener = getattr(index, "add_listener", None)
+    if add_listener is not None:
+        add_listener(lambda snapshot: poller.poke(boost=False))
+        return None
+
+    # Appends may change a topic or waiting state, but not which sessions
+    # exist, so they don't warrant polling closely
+    watcher = Watcher(lambda paths, structural: poller.poke(boost=structural))
+    watcher.start()
+    return watcher
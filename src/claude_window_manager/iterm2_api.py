@@ -0,0 +1,204 @@
+"""iTerm2 sessions kept current by iTerm2's Python API.
+
+The AppleScript source walks every window, tab and session on each
+refresh, with an Apple Event per `variable named` read. `ITerm2Monitor`
+instead holds one connection to iTerm2's API and keeps an index in memory,
+updated from its notifications: new sessions, terminations, layout changes
+and changes to the user.claude_* variables. While it's connected, the
+"iterm2" detection source answers from that index; otherwise it falls back
+to AppleScript.
+
+Needs the optional `iterm2` package (`pip install
+'claude-window-manager[iterm2]'`) and the Python API enabled in iTerm2's
+settings (General > Magic). Window and tab numbers follow the API's window
+order, which can differ from AppleScript's front-to-back order; switching
+and badge, color and variable writes go by session id, so they aren't
+affected.
+"""
+
+import asyncio
+import importlib
+import importlib.util
+import threading
+import time
+from typing import Callable, Optional
+
+from .window_detector import normalize_tty
+
+RECONNECT_DELAY = 5.0
+# Session variable -> field of the session dict (as from ITERM_SESSIONS)
+VARIABLES = {
+    "user.claude_session": "name",
+    "user.claude_project": "project",
+    "user.claude_topic": "topic",
+}
+
+FIELDS = ("window", "tab", "id", "name", "project", "topic", "tty")
+
+_active: Optional["ITerm2Monitor"] = None
+
+
+def api_installed() -> bool:
+    return importlib.util.find_spec("iterm2") is not None
+
+
+def live_sessions() -> Optional[list[dict]]:
+    """The running monitor's Claude sessions, or None if none is connected."""
+    monitor = _active
+    return monitor.sessions() if monitor is not None else None
+
+
+class ITerm2Monitor:
+    """
+    Follows iTerm2 through its Python API and calls `on_event(name, args)`
+    when sessions come, go, move or change their Claude variables.
+
+    Reconnects while `running` if iTerm2 quits or the API is turned off, so
+    it can be started before iTerm2 is. `api` stands in for the `iterm2`
+    module (see `simulator.FakeITerm2`).
+    """
+
+    def __init__(self, on_event: Callable[[str, list[str]], None], api=None):
+        self.on_event = on_event
+        self.api = api
+        self.running = False
+        self.connected = False
+        # Session id -> session dict, for every session (Claude or not, so
+        # a session that becomes one is noticed through its variables)
+        self._records: dict[str, dict] = {}
+        self._watches: dict[str, list[asyncio.Task]] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._rescanning: Optional[asyncio.Lock] = None
+
+    def start(self) -> None:
+        global _active
+        self.running = True
+        _active = self
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self) -> None:
+        global _active
+        self.running = False
+        if _active is self:
+            _active = None
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # Disconnected already: the loop is closed
+
+    def run(self) -> None:
+        while self.running:
+            try:
+                asyncio.run(self._main())
+            except (Exception, asyncio.CancelledError):
+                pass  # iTerm2 not running, API disabled, connection lost, stopped
+            if self.running:
+                time.sleep(RECONNECT_DELAY)
+
+    def sessions(self) -> Optional[list[dict]]:
+        """Claude sessions in window and tab order; None while disconnected."""
+        if not self.connected:
+            return None
+        with self._lock:
+            records = [
+                {field: r[field] for field in FIELDS}
+                for r in self._records.values()
+                if r["name"] and r["project"]
+            ]
+        return sorted(records, key=lambda r: (r["window"], r["tab"]))
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.current_task()
+        if not self.running:
+            return
+        try:
+            await self._listen()
+        finally:
+            self.connected = False
+            for tasks in self._watches.values():
+                for task in tasks:
+                    task.cancel()
+            self._watches.clear()
+            with self._lock:
+                self._records.clear()
+
+    async def _listen(self) -> None:
+        api = self.api or importlib.import_module("iterm2")
+        connection = await api.Connection.async_create()
+        app = await api.async_get_app(connection)
+        monitors = [
+            ("new_session", api.NewSessionMonitor(connection)),
+            ("session_ended", api.SessionTerminationMonitor(connection)),
+            ("layout_changed", api.LayoutChangeMonitor(connection)),
+        ]
+        self._rescanning = asyncio.Lock()
+        await self._rescan(api, connection, app)
+        self.connected = True
+        self.on_event("connected", [])
+        await asyncio.gather(*(self._follow(name, monitor, api, connection, app) for name, monitor in monitors))
+
+    async def _follow(self, name: str, monitor, api, connection, app) -> None:
+        async with monitor as events:
+            while True:
+                value = await events.async_get()
+                # All three come down to which sessions are in which tabs;
+                # only new sessions' variables are fetched
+                async with self._rescanning:
+                    await app.async_refresh()
+                    await self._rescan(api, connection, app)
+                self.on_event(name, [value] if isinstance(value, str) else [])
+
+    async def _rescan(self, api, connection, app) -> None:
+        """Update positions from the app's layout; index sessions not seen before."""
+        positions = {}
+        for window_index, window in enumerate(app.terminal_windows, 1):
+            for tab_index, tab in enumerate(window.tabs, 1):
+                session = tab.current_session
+                if session is not None:
+                    positions[session.session_id] = (window_index, tab_index, session)
+        new = [(sid, session) for sid, (_, _, session) in positions.items() if sid not in self._records]
+        read = await asyncio.gather(*(self._read(session) for _, session in new))
+
+        with self._lock:
+            for sid in self._records.keys() - positions.keys():
+                del self._records[sid]
+                for task in self._watches.pop(sid, ()):
+                    task.cancel()
+            for (sid, _), record in zip(new, read):
+                record["id"] = sid
+                self._records[sid] = record
+            for sid, record in self._records.items():
+                record["window"], record["tab"], _ = positions[sid]
+        for sid, _ in new:
+            self._watches[sid] = [
+                asyncio.create_task(self._watch(api, connection, sid, variable))
+                for variable in VARIABLES
+            ]
+
+    @staticmethod
+    async def _read(session) -> dict:
+        names = [*VARIABLES, "tty"]
+        values = await asyncio.gather(*(session.async_get_variable(name) for name in names))
+        record = {VARIABLES.get(name, name): value or "" for name, value in zip(names, values)}
+        record["tty"] = normalize_tty(record["tty"])
+        return record
+
+    async def _watch(self, api, connection, sid: str, variable: str) -> None:
+        monitor = api.VariableMonitor(connection, api.VariableScopes.SESSION, variable, sid)
+        try:
+            async with monitor as changes:
+                while True:
+                    value = await changes.async_get()
+                    with self._lock:
+                        record = self._records.get(sid)
+                        if record is None:
+                            return
+                        record[VARIABLES[variable]] = value or ""
+                    self.on_event("variable_changed", [sid, variable])
+        except Exception:
+            return  # Connection lost: the layout monitors end the connection too
@@ -1,19 +1,125 @@
 """iTerm2 integration for Claude Code sessions."""
 
-import subprocess
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
+
+from .applescript import (
+    DEFAULT_TIMEOUT,
+    FIELD_SEP,
+    ScriptTemplate,
+    parse_records,
+    quote,
+    run_applescript,
+    run_template,
+)
+from .colors import COLORS  # noqa: F401 (re-exported)
+from .detection import detect_sync, run_applescript_async
+from .iterm2_writes import get_write_buffer
+from .window_detector import normalize_tty
+
+# One script run per refresh: session ids are fetched for all tabs of a
+# window in a single Apple Event, and the claude_* variables are only read
+# for tabs marked as Claude sessions. Output is delimiter-separated
+# records (see applescript.parse_records).
+ITERM_SESSIONS = '''
+set fieldSep to character id 31
+set sessionRecords to {}
+tell application "iTerm2"
+    set windowIndex to 0
+    repeat with w in windows
+        set windowIndex to windowIndex + 1
+        set currentSessions to current session of every tab of w
+        set sessionIds to id of current session of every tab of w
+        set sessionTtys to tty of current session of every tab of w
+        repeat with tabIndex from 1 to count of currentSessions
+            set s to item tabIndex of currentSessions
+            try
+                tell s to set claudeSession to variable named "user.claude_session"
+            on error
+                set claudeSession to missing value
+            end try
+            if claudeSession is not missing value and claudeSession is not "" then
+                try
+                    tell s to set claudeProject to variable named "user.claude_project"
+                    tell s to set claudeTopic to variable named "user.claude_topic"
+                on error
+                    set claudeProject to ""
+                    set claudeTopic to ""
+                end try
+                set end of sessionRecords to (windowIndex as text) & fieldSep & (tabIndex as text) & fieldSep & (item tabIndex of sessionIds) & fieldSep & claudeSession & fieldSep & (claudeProject as text) & fieldSep & (claudeTopic as text) & fieldSep & (item tabIndex of sessionTtys)
+            end if
+        end repeat
+    end repeat
+end tell
+set AppleScript's text item delimiters to character id 30
+return sessionRecords as text
+'''
+
+LAUNCH_SESSION = ScriptTemplate("launch_session", '''
+    set {projectName, topic, tabTitle, projectPath} to items 1 thru 4 of argv
+    set tabColor to {(item 5 of argv) as integer, (item 6 of argv) as integer, (item 7 of argv) as integer}
+    tell application "iTerm2"
+        activate
+
+        if (count of windows) = 0 then
+            create window with default profile
+        end if
+
+        tell current window
+            create tab with default profile
+
+            tell current session
+                -- Set user variable to identify Claude sessions
+                set variable named "user.claude_project" to projectName
+                set variable named "user.claude_topic" to topic
+                set variable named "user.claude_session" to "🤖 " & tabTitle
+
+                write text "cd " & quoted form of projectPath
+                write text "claude"
+            end tell
+        end tell
+
+        tell current session of current tab of current window
+            set background color to tabColor
+        end tell
+    end tell
+''')
+
+SWITCH_SESSION = ScriptTemplate("switch_session", '''
+    tell application "iTerm2"
+        activate
+        set targetWindow to window ((item 1 of argv) as integer)
+        select targetWindow
+        tell targetWindow
+            select tab ((item 2 of argv) as integer)
+        end tell
+    end tell
+''')
 
+SWITCH_SESSION_ID = ScriptTemplate("switch_session_id", '''
+    tell application "iTerm2"
+        repeat with w in windows
+            set sessionIds to id of current session of every tab of w
+            repeat with tabIndex from 1 to count of sessionIds
+                if item tabIndex of sessionIds is (item 1 of argv) then
+                    activate
+                    select w
+                    tell w to select tab tabIndex
+                    return "ok"
+                end if
+            end repeat
+        end repeat
+    end tell
+    return ""
+''')
 
-def run_applescript(script: str) -> str:
-    """Execute AppleScript and return output."""
-    result = subprocess.run(
-        ["osascript", "-e", script],
-        capture_output=True,
-        text=True,
-    )
-    return result.stdout.strip()
+# The id of the session in a tab, by AppleScript's window and tab numbers
+SESSION_ID_AT = ScriptTemplate("session_id_at", '''
+    tell application "iTerm2"
+        return id of current session of tab ((item 2 of argv) as integer) of window ((item 1 of argv) as integer)
+    end tell
+''')
 
 
 def launch_claude_session(
@@ -46,167 +152,196 @@ def launch_claude_session(
     g_as = int(g * 257)
     b_as = int(b * 257)
 
-    script = f'''
-tell application "iTerm2"
-    activate
-
-    if (count of windows) = 0 then
-        create window with default profile
-    end if
-
-    tell current window
-        create tab with default profile
-
-        tell current session
-            -- Set user variable to identify Claude sessions
-            set variable named "user.claude_project" to "{project_name}"
-            set variable named "user.claude_topic" to "{topic}"
-            set variable named "user.claude_session" to "🤖 {tab_title}"
-
-            write text "cd {project_path}"
-            write text "claude"
-        end tell
-    end tell
-
-    tell current session of current tab of current window
-        set background color to {{{r_as}, {g_as}, {b_as}}}
-    end tell
-end tell
-    '''
-
     try:
-        run_applescript(script)
+        run_template(
+            LAUNCH_SESSION,
+            project_name, topic, tab_title, project_path, r_as, g_as, b_as,
+        )
         return True
     except Exception as e:
         print(f"Error launching session: {e}")
         return False
 
 
-def get_claude_iterm_sessions() -> list[dict]:
-    """Get all iTerm2 sessions that are marked as Claude sessions."""
-    script = '''
-tell application "iTerm2"
-    set sessionList to {}
-    set windowIndex to 0
-    repeat with w in windows
-        set windowIndex to windowIndex + 1
-        set tabIndex to 0
-        repeat with t in tabs of w
-            set tabIndex to tabIndex + 1
-            tell current session of t
-                set sessionId to id
-                set sessionName to name
-                try
-                    set claudeSession to variable named "user.claude_session"
-                    set claudeProject to variable named "user.claude_project"
-                    set claudeTopic to variable named "user.claude_topic"
-                on error
-                    set claudeSession to ""
-                    set claudeProject to ""
-                    set claudeTopic to ""
-                end try
-                if claudeSession is not "" then
-                    set end of sessionList to (windowIndex as text) & "|||" & (tabIndex as text) & "|||" & sessionId & "|||" & claudeSession & "|||" & claudeProject & "|||" & claudeTopic
-                end if
-            end tell
-        end repeat
-    end repeat
-    return sessionList
-end tell
-    '''
-
-    output = run_applescript(script)
-    if not output:
+def build_launch_script(specs: list) -> str:
+    """
+    One script opening a tab per `manifest.LaunchSpec`, like LAUNCH_SESSION
+    but activating iTerm2 once. Each tab is created in its own try block;
+    the script returns "ok" or the error for each, FIELD_SEP-separated.
+    """
+    lines = [
+        "set launchResults to {}",
+        'tell application "iTerm2"',
+        "    activate",
+        "    if (count of windows) = 0 then",
+        "        create window with default profile",
+        "    end if",
+    ]
+    for spec in specs:
+        r, g, b = (c * 257 for c in spec.color)
+        lines += [
+            "    try",
+            "        tell current window",
+            "            set newTab to (create tab with default profile)",
+            "            tell current session of newTab",
+            f'                set variable named "user.claude_project" to {quote(Path(spec.path).name)}',
+            f'                set variable named "user.claude_topic" to {quote(spec.topic)}',
+            f'                set variable named "user.claude_session" to {quote("🤖 " + spec.title)}',
+            f"                set background color to {{{r}, {g}, {b}}}",
+            f'                write text "cd " & quoted form of {quote(spec.path)}',
+            '                write text "claude"',
+            "            end tell",
+            "        end tell",
+            '        set end of launchResults to "ok"',
+            "    on error errorMessage",
+            "        set end of launchResults to errorMessage",
+            "    end try",
+        ]
+    lines += [
+        "end tell",
+        "set AppleScript's text item delimiters to character id 31",
+        "return launchResults as text",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def launch_claude_sessions(specs: list) -> list[Optional[str]]:
+    """
+    Launch a session per `manifest.LaunchSpec` with a single script.
+    Returns, per spec, None if it launched or the error.
+    """
+    if not specs:
         return []
+    # Each tab takes iTerm2 a moment to set up
+    output = run_applescript(build_launch_script(specs), timeout=DEFAULT_TIMEOUT + len(specs))
+    results = output.split(FIELD_SEP) if output else []
+    if len(results) != len(specs):
+        return ["iTerm2 didn't run the launch script"] * len(specs)
+    return [None if result == "ok" else result or "unknown error" for result in results]
+
 
+def parse_iterm_sessions(output: str) -> list[dict]:
+    """Parse ITERM_SESSIONS output into session dicts."""
     sessions = []
-    for item in output.split(", "):
-        parts = item.split("|||")
-        if len(parts) >= 6:
-            project = parts[4]
-            topic = parts[5]
-            # Skip sessions with missing values (old test sessions)
-            if project == "missing value" or not project:
-                continue
+    for window, tab, session_id, name, project, topic, tty in parse_records(output, 7):
+        # Skip sessions with missing values (old test sessions)
+        if project == "missing value" or not project:
+            continue
+        try:
             sessions.append({
-                "window": int(parts[0]),
-                "tab": int(parts[1]),
-                "id": parts[2],
-                "name": parts[3],
+                "window": int(window),
+                "tab": int(tab),
+                "id": session_id,
+                "name": name,
                 "project": project,
                 "topic": topic if topic != "missing value" else "",
+                "tty": normalize_tty(tty),
             })
-
+        except ValueError:
+            continue
     return sessions
 
 
-def switch_to_session(window: int, tab: int) -> bool:
-    """Switch to a specific iTerm2 tab."""
-    script = f'''
-    tell application "iTerm2"
-        activate
-        set targetWindow to window {window}
-        select targetWindow
-        tell targetWindow
-            select tab {tab}
-        end tell
-    end tell
-    '''
+async def get_claude_iterm_sessions_async() -> list[dict]:
+    """
+    Get all iTerm2 sessions that are marked as Claude sessions: from the
+    Python API monitor's index while one is connected, else by AppleScript.
+    """
+    from .iterm2_api import live_sessions
+
+    sessions = live_sessions()
+    if sessions is not None:
+        return sessions
+    return parse_iterm_sessions(await run_applescript_async(ITERM_SESSIONS))
+
+
+def get_claude_iterm_sessions() -> list[dict]:
+    """Get all iTerm2 sessions that are marked as Claude sessions."""
+    return detect_sync(["iterm2"])["iterm2"]
 
+
+def switch_to_session(
+    window: int,
+    tab: int,
+    pid: Optional[int] = None,
+    session_id: Optional[str] = None,
+) -> bool:
+    """
+    Switch to a specific iTerm2 tab, resuming its session (`pid`) if
+    governed. With a `session_id`, the tab is found by it instead, since
+    window numbers from the Python API can differ from AppleScript's.
+    """
+    if pid:
+        from .governor import resume
+        resume(pid)
     try:
-        run_applescript(script)
+        if session_id:
+            return run_template(SWITCH_SESSION_ID, session_id) == "ok"
+        run_template(SWITCH_SESSION, window, tab)
         return True
     except Exception:
         return False
 
 
-def update_session_badge(window: int, tab: int, badge_text: str) -> bool:
-    """Update the badge text for a session."""
-    script = f'''
-    tell application "iTerm2"
-        tell window {window}
-            tell tab {tab}
-                tell current session
-                    set badge text to "{badge_text}"
-                end tell
-            end tell
-        end tell
-    end tell
-    '''
+def _session_args(session: Union[str, int], args: tuple) -> tuple[str, tuple]:
+    """
+    Split the arguments of the write functions into a session id and the
+    rest, resolving the older `(window, tab, ...)` form by AppleScript's
+    numbering, as it was written against.
+    """
+    if isinstance(session, str):
+        return session, args
+    tab, *rest = args
+    return run_template(SESSION_ID_AT, session, tab), tuple(rest)
+
 
+def update_session_badge(session: Union[str, int], *args, defer: bool = False) -> bool:
+    """
+    Update the badge text for a session: `update_session_badge(session_id,
+    text)`, by id as in the snapshot, or `update_session_badge(window, tab,
+    text)`. With `defer`, the write waits for the indexer's next flush (see
+    iterm2_writes), batched with the others.
+    """
     try:
-        run_applescript(script)
-        return True
+        session_id, (badge_text,) = _session_args(session, args)
+        if not session_id:
+            return False
+        writes = get_write_buffer()
+        writes.set_badge(session_id, badge_text)
+        return defer or writes.flush()
     except Exception:
         return False
 
 
-def set_session_color(window: int, tab: int, r: int, g: int, b: int) -> bool:
-    """Set the background color for a session."""
-    script = f'''
-    tell application "iTerm2"
-        tell window {window}
-            tell tab {tab}
-                tell current session
-                    set background color to {{{r * 257}, {g * 257}, {b * 257}}}
-                end tell
-            end tell
-        end tell
-    end tell
-    '''
-
+def set_session_color(session: Union[str, int], *args, defer: bool = False) -> bool:
+    """
+    Set the background color for a session: `set_session_color(session_id,
+    r, g, b)` or `(window, tab, r, g, b)` (as `update_session_badge`).
+    """
     try:
-        run_applescript(script)
-        return True
+        session_id, (r, g, b) = _session_args(session, args)
+        if not session_id:
+            return False
+        writes = get_write_buffer()
+        writes.set_color(session_id, r, g, b)
+        return defer or writes.flush()
     except Exception:
         return False
 
 
-# Predefined color schemes for different project types
-COLORS = {
-    "default": (147, 112, 219),   # Purple
-    "frontend": (100, 149, 237),  # Cornflower blue
-    "backend": (60, 179, 113),    # Medium sea green
-    "devops": (255, 165, 0),      # Orange
-    "urgent": (255, 99, 71),      # Tomato red
-}
+def set_session_variable(session: Union[str, int], *args, defer: bool = False) -> bool:
+    """
+    Set a session variable, e.g. "user.claude_topic":
+    `set_session_variable(session_id, name, value)` or `(window, tab, name,
+    value)` (as `update_session_badge`).
+    """
+    try:
+        session_id, (name, value) = _session_args(session, args)
+        if not session_id:
+            return False
+        writes = get_write_buffer()
+        writes.set_variable(session_id, name, value)
+        return defer or writes.flush()
+    except Exception:
+        return False
+
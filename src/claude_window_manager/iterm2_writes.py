@@ -0,0 +1,179 @@
+"""Batched writes to iTerm2 sessions: badges, colors and user variables.
+
+Writing each value with its own script means a process (or at least an
+Apple Event round trip) per tab per tick. `WriteBuffer` collects writes
+instead, keeps only the last one per session and property, drops those
+that would set what was already set, and flushes the rest as one generated
+script:
+
+    writes = WriteBuffer()
+    for s in sessions:
+        writes.set_badge(s["id"], status(s))
+    writes.flush()  # One script, only for badges that changed
+
+Sessions are addressed by id, not by window and tab number: numbers from
+the Python API (see iterm2_api) can differ from AppleScript's, and either
+changes when windows are reordered or tabs move.
+"""
+
+import threading
+from collections import Counter
+from typing import Callable, Iterable, Optional, Union
+
+from .applescript import FIELD_SEP, run_applescript, quote
+from .metrics import METRICS
+
+Value = Union[str, tuple[int, int, int]]
+
+
+def _statement(prop: str, value: Value) -> str:
+    """The AppleScript that sets one property of a session."""
+    if prop == "badge":
+        return f"set badge text to {quote(value)}"
+    if prop == "color":
+        r, g, b = (int(c) * 257 for c in value)  # 0-255 to AppleScript's 0-65535
+        return f"set background color to {{{r}, {g}, {b}}}"
+    name = prop.removeprefix("variable:")
+    return f"set variable named {quote(name)} to {quote(value)}"
+
+
+def build_script(writes: dict[str, dict[str, Value]]) -> str:
+    """
+    One script applying `writes` (by session id) in a single pass over the
+    tabs. A session that fails (closed since the snapshot, say) doesn't
+    stop the others; the script returns "ok" followed by the ids of the
+    sessions it wrote to.
+    """
+    branches = []
+    for session_id, props in writes.items():
+        branches += [
+            f"{'if' if not branches else 'else if'} sessionId is {quote(session_id)} then",
+            "    try",
+            "        tell current session of tab tabIndex of w",
+            *(f"            {_statement(prop, value)}" for prop, value in props.items()),
+            "        end tell",
+            "        set end of writtenIds to sessionId",
+            "    end try",
+        ]
+    branches.append("end if")
+    lines = [
+        "set writtenIds to {}",
+        'tell application "iTerm2"',
+        "    repeat with w in windows",
+        "        set sessionIds to id of current session of every tab of w",
+        "        repeat with tabIndex from 1 to count of sessionIds",
+        "            set sessionId to item tabIndex of sessionIds",
+        *(f"            {line}" for line in branches),
+        "        end repeat",
+        "    end repeat",
+        "end tell",
+        "set AppleScript's text item delimiters to character id 31",
+        'return "ok" & (character id 31) & (writtenIds as text)',
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class WriteBuffer:
+    """
+    Coalesces writes per (session id, property) and skips unchanged values.
+
+    Thread-safe: writes can be queued from any thread and flushed from
+    the refresh loop.
+    """
+
+    def __init__(self, run: Callable[[str], str] = run_applescript):
+        self.run = run
+        self.stats: Counter = Counter()  # queued, coalesced, skipped, written, flushes, failed
+        self._pending: dict[str, dict[str, Value]] = {}
+        self._applied: dict[str, dict[str, Value]] = {}  # As of the last successful flush
+        self._lock = threading.Lock()
+
+    def set_badge(self, session_id: str, text: str) -> None:
+        self._set(session_id, "badge", text)
+
+    def set_color(self, session_id: str, r: int, g: int, b: int) -> None:
+        """Set the background color (components 0-255)."""
+        self._set(session_id, "color", (int(r), int(g), int(b)))
+
+    def set_variable(self, session_id: str, name: str, value: str) -> None:
+        """Set a session variable, e.g. "user.claude_topic"."""
+        self._set(session_id, f"variable:{name}", str(value))
+
+    def _set(self, key: str, prop: str, value: Value) -> None:
+        with self._lock:
+            self._count("queued")
+            pending = self._pending.get(key, {})
+            if prop in pending:
+                self._count("coalesced")
+                del pending[prop]
+            if self._applied.get(key, {}).get(prop) == value:
+                self._count("skipped")
+            else:
+                self._pending.setdefault(key, pending)[prop] = value
+            if not pending:
+                self._pending.pop(key, None)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        self.stats[name] += n
+        METRICS.count(f"iterm2_writes_{name}", n)
+
+    def sync_sessions(self, session_ids: Iterable[str]) -> None:
+        """
+        Tell the buffer which sessions exist (from a snapshot). What was set
+        on sessions that are gone is forgotten.
+        """
+        current = set(session_ids)
+        with self._lock:
+            for key in self._applied.keys() - current:
+                del self._applied[key]
+
+    @property
+    def pending(self) -> int:
+        """Writes waiting for the next flush."""
+        with self._lock:
+            return sum(len(props) for props in self._pending.values())
+
+    def flush(self) -> bool:
+        """
+        Apply pending writes with a single script. Returns False if the
+        script failed as a whole (iTerm2 not running, say); failed writes
+        aren't remembered as applied, so they aren't skipped next time.
+        """
+        with self._lock:
+            writes, self._pending = self._pending, {}
+        if not writes:
+            return True
+        output = self.run(build_script(writes))
+        with self._lock:
+            self._count("flushes")
+            if not output.startswith("ok"):
+                self._count("failed", sum(len(props) for props in writes.values()))
+                return False
+            written = set(output.partition(FIELD_SEP)[2].strip().split(FIELD_SEP))
+            for key, props in writes.items():
+                if key not in written:
+                    self._count("failed", len(props))
+                    self._applied.pop(key, None)
+                    continue
+                self._applied.setdefault(key, {}).update(props)
+                self._count("written", len(props))
+        return True
+
+
+_buffer: Optional[WriteBuffer] = None
+
+
+def get_write_buffer() -> WriteBuffer:
+    """The shared buffer, flushed by the indexer after each refresh."""
+    global _buffer
+    if _buffer is None:
+        _buffer = WriteBuffer()
+    return _buffer
+
+
+def flush_writes(sessions: list[dict]) -> None:
+    """Flush the shared buffer, if anything used it, against a snapshot's iTerm2 sessions."""
+    if _buffer is None:
+        return
+    _buffer.sync_sessions(s["id"] for s in sessions)
+    _buffer.flush()
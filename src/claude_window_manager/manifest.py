@@ -0,0 +1,131 @@
+"""Session manifests for `cwm new --from FILE`.
+
+A manifest lists the sessions to open, as JSON, TOML or YAML (with PyYAML
+installed). Each entry has a path and optionally a topic and a color, either
+a scheme name from `colors.COLORS` or an [r, g, b] list; a bare string is a
+path. Relative paths are relative to the manifest. TOML needs a table name,
+so entries go under `sessions` (allowed in the other formats too):
+
+    [[sessions]]
+    path = "~/src/billing-service"
+    topic = "Invoice retries"
+    color = "backend"
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from .colors import COLORS
+
+DEFAULT_TOPIC = "New Session"
+
+
+class ManifestError(Exception):
+    """Raised when a manifest can't be read or has invalid entries."""
+
+
+class LaunchSpec(NamedTuple):
+    path: str  # Absolute
+    topic: str
+    color: tuple[int, int, int]
+
+    @property
+    def title(self) -> str:
+        """The tab title, as `launch_claude_session` sets it."""
+        return f"{Path(self.path).name} — ✳ {self.topic}"
+
+
+def _parse(path: Path, text: str):
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        return json.loads(text)
+    if suffix == ".toml":
+        import tomllib
+        return tomllib.loads(text)
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ManifestError(
+                "YAML manifests need PyYAML: pip install 'claude-window-manager[yaml]'"
+            ) from None
+        return yaml.safe_load(text)
+    raise ManifestError(f"Unknown manifest format {suffix or '(no extension)'}: use .json, .toml or .yaml")
+
+
+def _color(value) -> tuple[int, int, int]:
+    if value is None:
+        return COLORS["default"]
+    if isinstance(value, str):
+        if value not in COLORS:
+            raise ValueError(f"unknown color {value!r} (one of {', '.join(COLORS)})")
+        return COLORS[value]
+    if (
+        isinstance(value, (list, tuple))
+        and len(value) == 3
+        and all(isinstance(c, int) and 0 <= c <= 255 for c in value)
+    ):
+        return tuple(value)
+    raise ValueError(f"color must be a scheme name or [r, g, b] with 0-255 components, not {value!r}")
+
+
+def _spec(entry, base: Path) -> LaunchSpec:
+    if isinstance(entry, str):
+        entry = {"path": entry}
+    if not isinstance(entry, dict):
+        raise ValueError(f"expected a table with a path, not {entry!r}")
+    unknown = entry.keys() - {"path", "topic", "color"}
+    if unknown:
+        raise ValueError(f"unknown keys: {', '.join(sorted(unknown))}")
+    if not isinstance(entry.get("path"), str) or not entry["path"]:
+        raise ValueError("missing path")
+    path = (base / os.path.expanduser(entry["path"])).resolve()
+    if not path.is_dir():
+        raise ValueError(f"{path} is not a directory")
+    topic = entry.get("topic", DEFAULT_TOPIC)
+    if not isinstance(topic, str) or not topic.strip():
+        raise ValueError("topic must be a non-empty string")
+    return LaunchSpec(str(path), topic.strip(), _color(entry.get("color")))
+
+
+def load_manifest(path) -> list[LaunchSpec]:
+    """
+    Read and validate a manifest. Every entry is checked before anything
+    is launched, including for duplicates (same path and topic); all
+    problems are reported together in one ManifestError.
+    """
+    path = Path(path).expanduser()
+    try:
+        data = _parse(path, path.read_text())
+    except ManifestError:
+        raise
+    except OSError as e:
+        raise ManifestError(f"Can't read {path}: {e.strerror}") from None
+    except Exception as e:  # JSON, TOML or YAML syntax
+        raise ManifestError(f"Can't parse {path}: {e}") from None
+
+    if isinstance(data, dict):
+        data = data.get("sessions")
+    if not isinstance(data, list) or not data:
+        raise ManifestError(f"{path} lists no sessions (expected a list, or one under 'sessions')")
+
+    specs = []
+    errors = []
+    seen: dict[tuple[str, str], int] = {}  # (path, topic) -> entry number
+    for number, entry in enumerate(data, 1):
+        try:
+            spec = _spec(entry, path.parent)
+        except ValueError as e:
+            errors.append(f"  entry {number}: {e}")
+            continue
+        # Same title: the tabs couldn't be told apart
+        first = seen.setdefault((spec.path, spec.topic), number)
+        if first != number:
+            errors.append(f"  entry {number}: same path and topic as entry {first}")
+            continue
+        specs.append(spec)
+    if errors:
+        raise ManifestError(f"Invalid entries in {path}:\n" + "\n".join(errors))
+    return specs
@@ -0,0 +1,279 @@
+"""Hot-path instrumentation: timing spans, latency histograms, subprocess counts.
+
+Spans wrap the expensive steps of a refresh (AppleScript, the ps scan,
+title parsing, menu rebuilds). Recorded data can be viewed with
+`cwm stats`, dumped as a Chrome trace (`cwm --trace FILE ...`, open in
+chrome://tracing or Perfetto) or scraped in Prometheus text format from
+`cwm daemon --metrics-port PORT`.
+
+Instrumentation is off by default; when off, `span()` returns a shared
+no-op context manager and `timed` functions call straight through.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Optional
+
+HISTOGRAM_WINDOW = 1024
+TRACE_LIMIT = 100_000
+
+# inspect.CO_COROUTINE; inspect itself is too slow to import on the CLI path
+_CO_COROUTINE = 0x80
+
+
+class Histogram:
+    """Rolling window of recent durations plus lifetime count and sum."""
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.recent: deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.recent.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self) -> dict[str, float]:
+        """p50/p90/p99/max over the rolling window, in seconds."""
+        values = list(self.recent)
+        if not values:
+            return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+        if len(values) == 1:
+            return {"p50": values[0], "p90": values[0], "p99": values[0], "max": values[0]}
+        import statistics
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+        return {"p50": cuts[49], "p90": cuts[89], "p99": cuts[98], "max": max(values)}
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.record(self.name, self.start, time.perf_counter())
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Process-wide metrics registry."""
+
+    def __init__(self):
+        self.enabled = False
+        self.tracing = False
+        self.histograms: dict[str, Histogram] = {}
+        self.subprocesses: Counter = Counter()  # By command, lifetime
+        self.counters: Counter = Counter()  # Other events, by name
+        self.ticks = 0
+        self.tick_subprocesses: deque[int] = deque(maxlen=HISTOGRAM_WINDOW)
+        self.trace_events: deque[dict] = deque(maxlen=TRACE_LIMIT)
+        self._tick_count = 0
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter()
+
+    def span(self, name: str):
+        """Context manager timing a block under `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(end - start)
+            if self.tracing:
+                self.trace_events.append({
+                    "name": name,
+                    "ph": "X",
+                    "ts": (start - self._epoch) * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                })
+
+    def count_subprocess(self, command: str) -> None:
+        """Count one spawned process."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.subprocesses[Path(command).name] += 1
+            self._tick_count += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Count `n` events under `name`."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += n
+
+    def tick(self) -> None:
+        """Mark the end of a refresh cycle."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.ticks += 1
+            self.tick_subprocesses.append(self._tick_count)
+            self._tick_count = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.subprocesses.clear()
+            self.counters.clear()
+            self.ticks = 0
+            self.tick_subprocesses.clear()
+            self.trace_events.clear()
+            self._tick_count = 0
+
+    def snapshot(self) -> dict:
+        """JSON-compatible view of everything recorded."""
+        with self._lock:
+            spans = {
+                name: {"count": h.count, "total": h.total, **h.quantiles()}
+                for name, h in sorted(self.histograms.items())
+            }
+            per_tick = list(self.tick_subprocesses)
+            return {
+                "enabled": self.enabled,
+                "spans": spans,
+                "subprocesses": dict(self.subprocesses),
+                "counters": dict(self.counters),
+                "ticks": self.ticks,
+                "subprocesses_per_tick": sum(per_tick) / len(per_tick) if per_tick else 0.0,
+                "subprocesses_last_tick": per_tick[-1] if per_tick else 0,
+            }
+
+    def chrome_trace(self) -> dict:
+        with self._lock:
+            return {"traceEvents": list(self.trace_events), "displayTimeUnit": "ms"}
+
+    def write_trace(self, path) -> None:
+        """Write recorded spans as a Chrome trace JSON file."""
+        Path(path).write_text(json.dumps(self.chrome_trace()))
+
+    def prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = [
+            "# HELP cwm_span_duration_seconds Duration of instrumented steps (rolling window quantiles).",
+            "# TYPE cwm_span_duration_seconds summary",
+        ]
+        for name, s in snap["spans"].items():
+            for q, key in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99")):
+                lines.append(f'cwm_span_duration_seconds{{span="{name}",quantile="{q}"}} {s[key]:.9f}')
+            lines.append(f'cwm_span_duration_seconds_sum{{span="{name}"}} {s["total"]:.9f}')
+            lines.append(f'cwm_span_duration_seconds_count{{span="{name}"}} {s["count"]}')
+        lines += [
+            "# HELP cwm_subprocesses_total Processes spawned, by command.",
+            "# TYPE cwm_subprocesses_total counter",
+        ]
+        for command, count in sorted(snap["subprocesses"].items()):
+            lines.append(f'cwm_subprocesses_total{{command="{command}"}} {count}')
+        lines += [
+            "# HELP cwm_events_total Other counted events, by name.",
+            "# TYPE cwm_events_total counter",
+        ]
+        for name, count in sorted(snap["counters"].items()):
+            lines.append(f'cwm_events_total{{name="{name}"}} {count}')
+        lines += [
+            "# HELP cwm_refresh_ticks_total Completed refresh cycles.",
+            "# TYPE cwm_refresh_ticks_total counter",
+            f"cwm_refresh_ticks_total {snap['ticks']}",
+            "# HELP cwm_subprocesses_per_tick Mean processes spawned per refresh cycle.",
+            "# TYPE cwm_subprocesses_per_tick gauge",
+            f"cwm_subprocesses_per_tick {snap['subprocesses_per_tick']:.3f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def configure(enabled: Optional[bool] = None, tracing: bool = False) -> None:
+    """
+    Turn instrumentation on or off. `enabled=None` enables it unless the
+    CWM_METRICS environment variable is "0".
+    """
+    if enabled is None:
+        enabled = os.environ.get("CWM_METRICS", "1") != "0"
+    METRICS.enabled = enabled or tracing
+    METRICS.tracing = tracing
+
+
+def span(name: str):
+    """Time a block: ``with span("run_applescript"): ...``."""
+    return METRICS.span(name)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function (sync or async)."""
+    def decorate(fn):
+        if fn.__code__.co_flags & _CO_COROUTINE:
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not METRICS.enabled:
+                    return await fn(*args, **kwargs)
+                with _Span(METRICS, name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            with _Span(METRICS, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def serve_prometheus(port: int, host: str = "127.0.0.1"):
+    """Serve /metrics on a local port from a background thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class PrometheusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = METRICS.prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), PrometheusHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,163 @@
+"""Warm AppleScript interpreter process used by `applescript.ScriptRunner`.
+
+Reads one JSON request per line on stdin and writes one JSON response per
+line on stdout:
+
+    request:  {"id": 1, "source": "...", "args": ["a", "b"] | null}
+    response: {"id": 1, "ok": true, "result": "...", "compiled": false}
+
+When `args` is given, `source` is a template and its `cwm` handler is
+called with the argument list; otherwise the script's run handler runs.
+Compiled scripts are cached by source text, so repeated template calls
+skip compilation.
+
+Run with ``--fake`` for a platform-independent interpreter that speaks the
+same protocol (used for testing and benchmarking on Linux).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+TEMPLATE_HANDLER = "cwm"
+
+
+def _fourcc(code: str) -> int:
+    return int.from_bytes(code.encode("ascii"), "big")
+
+
+class NSAppleScriptBackend:
+    """Compiles and runs scripts in-process through NSAppleScript."""
+
+    def __init__(self):
+        import Foundation  # pyobjc, provided alongside rumps
+
+        self.Foundation = Foundation
+        self.cache = {}
+
+    def _compile(self, source: str):
+        script = self.cache.get(source)
+        if script is not None:
+            return script, False
+        script = self.Foundation.NSAppleScript.alloc().initWithSource_(source)
+        ok, error = script.compileAndReturnError_(None)
+        if not ok:
+            raise RuntimeError(_error_message(error))
+        self.cache[source] = script
+        return script, True
+
+    def execute(self, source: str, args):
+        script, compiled = self._compile(source)
+        if args is None:
+            result, error = script.executeAndReturnError_(None)
+        else:
+            result, error = script.executeAppleEvent_error_(self._handler_event(args), None)
+        if result is None:
+            raise RuntimeError(_error_message(error))
+        return _descriptor_text(result), compiled
+
+    def _handler_event(self, args):
+        NSAppleEventDescriptor = self.Foundation.NSAppleEventDescriptor
+        event = NSAppleEventDescriptor.appleEventWithEventClass_eventID_targetDescriptor_returnID_transactionID_(
+            _fourcc("ascr"), _fourcc("psbr"), NSAppleEventDescriptor.nullDescriptor(), -1, 0
+        )
+        event.setParamDescriptor_forKeyword_(
+            NSAppleEventDescriptor.descriptorWithString_(TEMPLATE_HANDLER), _fourcc("snam")
+        )
+        argv = NSAppleEventDescriptor.listDescriptor()
+        for idx, arg in enumerate(args, 1):
+            argv.insertDescriptor_atIndex_(NSAppleEventDescriptor.descriptorWithString_(str(arg)), idx)
+        params = NSAppleEventDescriptor.listDescriptor()
+        params.insertDescriptor_atIndex_(argv, 1)
+        event.setParamDescriptor_forKeyword_(params, _fourcc("----"))
+        return event
+
+
+def _descriptor_text(desc) -> str:
+    """Render a result descriptor the way `osascript` prints it."""
+    if desc.descriptorType() == _fourcc("list"):
+        return ", ".join(
+            _descriptor_text(desc.descriptorAtIndex_(i))
+            for i in range(1, desc.numberOfItems() + 1)
+        )
+    return desc.stringValue() or ""
+
+
+def _error_message(error) -> str:
+    if not error:
+        return "unknown AppleScript error"
+    return str(error.get("NSAppleScriptErrorMessage", error))
+
+
+class OsascriptBackend:
+    """Fallback when PyObjC is unavailable: one `osascript` call per request."""
+
+    def execute(self, source: str, args):
+        argv = ["osascript", "-e", source]
+        if args is not None:
+            argv.extend(str(a) for a in args)
+        result = subprocess.run(argv, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+        # Bulk scripts end in separators, which str.strip() would eat
+        return result.stdout.rstrip("\n"), True
+
+
+class FakeBackend:
+    """
+    Stand-in interpreter for tests and benchmarks.
+
+    Returns the script text (or the template arguments joined with "|").
+    Scripts starting with "sleep N", "crash" or "error" simulate a hung
+    script, an interpreter crash and a script error.
+    """
+
+    def __init__(self):
+        self.cache = set()
+
+    def execute(self, source: str, args):
+        command = source.strip()
+        if command.startswith("sleep "):
+            time.sleep(float(command.split()[1]))
+        elif command == "crash":
+            os._exit(1)
+        elif command == "error":
+            raise RuntimeError("fake script error")
+        compiled = source not in self.cache
+        self.cache.add(source)
+        if args is not None:
+            return "|".join(str(a) for a in args), compiled
+        return source.strip(" \n"), compiled  # Keeping separators, as osascript does
+
+
+def make_backend(fake: bool = False):
+    if fake:
+        return FakeBackend()
+    try:
+        return NSAppleScriptBackend()
+    except ImportError:
+        return OsascriptBackend()
+
+
+def serve(backend, stdin=sys.stdin, stdout=sys.stdout) -> None:
+    """Answer requests until stdin is closed."""
+    for line in stdin:
+        request = json.loads(line)
+        response = {"id": request.get("id")}
+        try:
+            result, compiled = backend.execute(request["source"], request.get("args"))
+            response.update(ok=True, result=result, compiled=compiled)
+        except Exception as e:
+            response.update(ok=False, error=str(e))
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
+
+
+def main():
+    serve(make_backend(fake="--fake" in sys.argv[1:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""Filesystem locations used by Claude Window Manager."""
+
+import os
+from pathlib import Path
+
+# Per-user state directory (sockets, caches)
+STATE_DIR = Path(os.environ.get("CWM_STATE_DIR", "~/.claude-wm")).expanduser()
+
+# Unix socket served by the session indexer (`cwm daemon`)
+SOCKET_PATH = Path(os.environ.get("CWM_SOCKET", str(STATE_DIR / "index.sock"))).expanduser()
+
+# Claude Code's own data; session transcripts live under projects/
+CLAUDE_DIR = Path(os.environ.get("CLAUDE_CONFIG_DIR", "~/.claude")).expanduser()
+CLAUDE_PROJECTS_DIR = CLAUDE_DIR / "projects"
@@ -0,0 +1,119 @@
+"""Interactive type-to-filter session picker for the terminal.
+
+Type to filter by project, topic and language; ↑/↓ (or Ctrl-P/Ctrl-N)
+move the selection, Enter picks it and Esc or Ctrl-C cancels. Each
+keystroke refines the previous results (see `search.Search`) and redraws
+only the picker's own lines below the cursor.
+"""
+
+import os
+import select
+import shutil
+import sys
+from typing import Optional, Union
+
+from .search import Search, SearchIndex
+
+MAX_ROWS = 10
+PROMPT = "Switch to: "
+ESCAPE_TIMEOUT = 0.05  # A bare Esc isn't followed by the rest of a sequence
+
+_KEYS = {
+    b"\x1b[A": "up", b"\x1bOA": "up", b"\x10": "up",
+    b"\x1b[B": "down", b"\x1bOB": "down", b"\x0e": "down",
+    b"\r": "enter", b"\n": "enter",
+    b"\x1b": "cancel", b"\x03": "cancel", b"\x04": "cancel",
+    b"\x7f": "backspace", b"\x08": "backspace",
+    b"\x15": "clear",  # Ctrl-U
+}
+
+
+def describe(session: dict) -> str:
+    topic = f" — ✳ {session['topic']}" if session.get("topic") else ""
+    language = f" ({session['language']})" if session.get("language") else ""
+    return f"{session['project']}{topic}{language}"
+
+
+def render(
+    sessions: list[dict],
+    query: str,
+    results: list[int],
+    selected: int,
+    width: int = 80,
+    rows: int = MAX_ROWS,
+) -> str:
+    """
+    The escape sequence that redraws the picker: the prompt line, then up
+    to `rows` results, leaving the cursor after the query.
+    """
+    lines = [f"\r\x1b[J{PROMPT}{query}"]
+    first = max(0, selected - rows + 1)
+    for position, i in enumerate(results[first:first + rows], first):
+        line = f"  {describe(sessions[i])}"[:width - 1]
+        lines.append(f"\x1b[7m{line}\x1b[0m" if position == selected else line)
+    lines.append(f"  \x1b[2m{len(results)}/{len(sessions)}\x1b[0m")
+    column = len(PROMPT) + len(query)
+    # Raw mode: no newline translation, so return the carriage explicitly
+    return "\r\n".join(lines) + f"\x1b[{len(lines) - 1}A\r" + (f"\x1b[{column}C" if column else "")
+
+
+def read_key(fd: int) -> Union[str, bytes]:
+    """A named key from `_KEYS`, or the typed bytes."""
+    data = os.read(fd, 1)
+    if data == b"\x1b":
+        # Collect the rest of an escape sequence, if one follows
+        while select.select([fd], [], [], ESCAPE_TIMEOUT)[0]:
+            data += os.read(fd, 1)
+            if len(data) >= 3:
+                break
+    elif data and data[0] >= 0xC0:
+        # Rest of a UTF-8 character
+        length = 2 if data[0] < 0xE0 else 3 if data[0] < 0xF0 else 4
+        data += os.read(fd, length - 1)
+    return _KEYS.get(data, data)
+
+
+def pick(sessions: list[dict]) -> Optional[dict]:
+    """Let the user pick a session; None if they cancel."""
+    import termios
+    import tty
+
+    search = Search(SearchIndex(sessions))
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    out = sys.stdout
+    query = ""
+    selected = 0
+    try:
+        tty.setraw(fd)
+        while True:
+            results = search.update(query)
+            selected = min(selected, max(len(results) - 1, 0))
+            width = shutil.get_terminal_size().columns
+            out.write(render(sessions, query, results, selected, width))
+            out.flush()
+
+            key = read_key(fd)
+            if key == "enter":
+                return sessions[results[selected]] if results else None
+            if key == "cancel":
+                return None
+            if key == "up":
+                selected = max(selected - 1, 0)
+            elif key == "down":
+                selected = min(selected + 1, max(len(results) - 1, 0))
+            elif key == "backspace":
+                query = query[:-1]
+                selected = 0
+            elif key == "clear":
+                query = ""
+                selected = 0
+            elif isinstance(key, bytes):
+                text = key.decode(errors="ignore")
+                if text.isprintable():
+                    query += text
+                    selected = 0
+    finally:
+        out.write("\r\x1b[J")
+        out.flush()
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
@@ -0,0 +1,58 @@
+"""Background refresh with single-flight coalescing."""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Runs `work` on a background thread, one run at a time.
+
+    Requests made while a run is in flight share that run's result instead
+    of starting an overlapping one. `on_result` is called once per run, on
+    the worker thread; UI code should hop back to its main thread there.
+    """
+
+    def __init__(
+        self,
+        work: Callable[..., T],
+        on_result: Optional[Callable[[T], None]] = None,
+    ):
+        self.work = work
+        self.on_result = on_result
+        self.runs = 0
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> bool:
+        with self._lock:
+            return self._future is not None and not self._future.done()
+
+    def request(self, *args, **kwargs) -> Future:
+        """Start a run, or join the one already in flight."""
+        with self._lock:
+            if self._future is not None and not self._future.done():
+                return self._future
+            future: Future = Future()
+            self._future = future
+            self.runs += 1
+        threading.Thread(target=self._run, args=(future, args, kwargs), daemon=True).start()
+        return future
+
+    def _run(self, future: Future, args: tuple, kwargs: dict) -> None:
+        try:
+            result = self.work(*args, **kwargs)
+        except Exception as e:
+            print(f"Error refreshing: {e}")
+            future.set_exception(e)
+            return
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                print(f"Error applying refresh: {e}")
+        future.set_result(result)
@@ -0,0 +1,201 @@
+"""CPU and memory sampling for Claude sessions and their child processes.
+
+Each tick reads the whole process table once (/proc on Linux, a single
+`ps` elsewhere) and sums CPU and RSS over every session's process tree, so
+the cost doesn't grow with the number of sessions. CPU% comes from the
+change in cumulative CPU time between ticks. History is kept in
+fixed-size ring buffers per session, and sessions that go away are
+dropped, so memory stays flat however long the sampler runs.
+"""
+
+import os
+import subprocess
+import time
+from collections import deque
+from typing import Iterable, NamedTuple, Optional
+
+from .metrics import METRICS
+
+SAMPLES = 60  # Ring buffer length per session
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+class ProcessInfo(NamedTuple):
+    ppid: int
+    cpu_time: float  # Seconds, user + system
+    rss: int  # Bytes
+
+
+class Sample(NamedTuple):
+    time: float  # Epoch seconds
+    cpu: float  # Percent of one core, summed over the process tree
+    rss: int  # Bytes, summed over the process tree
+    processes: int
+
+
+def parse_cpu_time(text: str) -> float:
+    """Parse ps's cumulative time: "1:02.50" (macOS) or "[dd-]hh:mm:ss" (Linux)."""
+    days, _, clock = text.rpartition("-")
+    seconds = 0.0
+    for part in clock.split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds + int(days or 0) * 86400
+
+
+def parse_ps_table(output: str) -> dict[int, ProcessInfo]:
+    """Parse `ps -axo pid=,ppid=,time=,rss=` output (RSS in KiB)."""
+    table = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) != 4:
+            continue
+        try:
+            table[int(fields[0])] = ProcessInfo(int(fields[1]), parse_cpu_time(fields[2]), int(fields[3]) * 1024)
+        except ValueError:
+            continue
+    return table
+
+
+def _read_proc_table() -> dict[int, ProcessInfo]:
+    ticks = os.sysconf("SC_CLK_TCK")
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    table = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                data = f.read()
+        except OSError:
+            continue  # Exited since listing
+        # The command name is parenthesized and may contain spaces
+        fields = data[data.rfind(b")") + 2:].split()
+        try:
+            table[int(name)] = ProcessInfo(
+                int(fields[1]),
+                (int(fields[11]) + int(fields[12])) / ticks,
+                int(fields[21]) * page_size,
+            )
+        except (IndexError, ValueError):
+            continue
+    return table
+
+
+def read_process_table() -> dict[int, ProcessInfo]:
+    """Every process's parent, CPU time and RSS, in one pass."""
+    if os.path.isdir("/proc/self"):
+        return _read_proc_table()
+    METRICS.count_subprocess("ps")
+    try:
+        result = subprocess.run(
+            ["ps", "-axo", "pid=,ppid=,time=,rss="],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return {}
+    return parse_ps_table(result.stdout)
+
+
+def process_tree(root: int, children: dict[int, list[int]]) -> list[int]:
+    """`root` and all its descendants."""
+    tree = [root]
+    for pid in tree:
+        tree.extend(children.get(pid, ()))
+    return tree
+
+
+class Sampler:
+    """Per-session CPU and RSS history, sampled a tick at a time."""
+
+    def __init__(self, capacity: int = SAMPLES, read_table=read_process_table):
+        self.capacity = capacity
+        self.read_table = read_table
+        self.history: dict[int, deque[Sample]] = {}
+        self.trees: dict[int, list[int]] = {}  # Process tree per session, as of the last tick
+        # CPU time per process at the last tick, for the processes in
+        # sampled trees only
+        self._cpu_times: dict[int, float] = {}
+        self._last_tick: Optional[float] = None
+
+    def sample(self, pids: Iterable[int]) -> dict[int, Sample]:
+        """Sample the process trees rooted at `pids`; returns the new samples."""
+        pids = {pid for pid in pids if pid}
+        table = self.read_table()
+        now = time.monotonic()
+        elapsed = now - self._last_tick if self._last_tick is not None else None
+        self._last_tick = now
+
+        children: dict[int, list[int]] = {}
+        for pid, info in table.items():
+            children.setdefault(info.ppid, []).append(pid)
+
+        cpu_times = {}
+        samples = {}
+        self.trees = {}
+        for root in pids:
+            if root not in table:
+                continue
+            tree = self.trees[root] = process_tree(root, children)
+            busy = 0.0
+            rss = 0
+            for pid in tree:
+                info = table[pid]
+                cpu_times[pid] = info.cpu_time
+                # Processes new since the last tick count from zero
+                busy += info.cpu_time - self._cpu_times.get(pid, 0.0)
+                rss += info.rss
+            history = self.history.get(root)
+            if history is None:
+                # Nothing to measure CPU against until the next tick
+                self.history[root] = deque(maxlen=self.capacity)
+                continue
+            if not elapsed:
+                continue
+            sample = Sample(time.time(), max(busy, 0.0) / elapsed * 100, rss, len(tree))
+            history.append(sample)
+            samples[root] = sample
+
+        for gone in self.history.keys() - pids:
+            del self.history[gone]
+        self._cpu_times = cpu_times
+        return samples
+
+    def report(self) -> dict[str, dict]:
+        """JSON-compatible history per session pid."""
+        return {
+            str(pid): {
+                "cpu": [round(s.cpu, 1) for s in history],
+                "rss": [s.rss for s in history],
+                "processes": history[-1].processes if history else 0,
+            }
+            for pid, history in self.history.items()
+        }
+
+
+def sparkline(values: list[float], top: Optional[float] = None) -> str:
+    """One block character per value, scaled to `top` (default: the largest value)."""
+    if not values:
+        return ""
+    top = top or max(values) or 1.0
+    last = len(SPARK_CHARS) - 1
+    return "".join(SPARK_CHARS[min(last, max(0, round(v / top * last)))] for v in values)
+
+
+def format_bytes(count: int) -> str:
+    """Compact size: 512K, 310M, 1.2G."""
+    if count >= 1 << 30:
+        return f"{count / (1 << 30):.1f}G"
+    if count >= 1 << 20:
+        return f"{count >> 20}M"
+    return f"{count >> 10}K"
+
+
+def describe_usage(usage: Optional[dict], width: int = 12) -> str:
+    """Sparkline, current CPU% and RSS for one `Sampler.report()` entry."""
+    if not usage or not usage["cpu"]:
+        return ""
+    cpu = usage["cpu"][-width:]
+    # Scaled to at least 100% so an idle session doesn't look busy
+    return f"{sparkline(cpu, max(100.0, *cpu))} {cpu[-1]:.0f}% · {format_bytes(usage['rss'][-1])}"
@@ -0,0 +1,187 @@
+"""Adaptive polling schedule for session refreshes.
+
+Polls fast while the user is interacting (menu open, right after a switch
+or launch), backs off exponentially while snapshots stay the same, and
+stops polling while the machine is idle.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+def get_idle_seconds() -> Optional[float]:
+    """Seconds since the last keyboard/mouse input, or None if unknown."""
+    if sys.platform != "darwin":
+        return None
+    try:
+        result = subprocess.run(
+            ["ioreg", "-c", "IOHIDSystem", "-d", "4"],
+            capture_output=True,
+            text=True,
+            timeout=2,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = re.search(r'"HIDIdleTime"\s*=\s*(\d+)', result.stdout)
+    if not match:
+        return None
+    return int(match.group(1)) / 1e9
+
+
+@dataclass
+class SchedulerConfig:
+    """Polling policy settings (seconds)."""
+
+    min_interval: float = 2.0
+    max_interval: float = 60.0
+    backoff: float = 2.0
+    boost_duration: float = 30.0
+    idle_after: float = 300.0
+
+    @classmethod
+    def from_env(cls) -> "SchedulerConfig":
+        """
+        Read overrides from the environment: CWM_POLL_MIN, CWM_POLL_MAX,
+        CWM_POLL_BACKOFF, CWM_POLL_BOOST and CWM_IDLE_AFTER.
+        """
+        config = cls()
+        for name, var in (
+            ("min_interval", "CWM_POLL_MIN"),
+            ("max_interval", "CWM_POLL_MAX"),
+            ("backoff", "CWM_POLL_BACKOFF"),
+            ("boost_duration", "CWM_POLL_BOOST"),
+            ("idle_after", "CWM_IDLE_AFTER"),
+        ):
+            if var in os.environ:
+                setattr(config, name, float(os.environ[var]))
+        return config
+
+
+class AdaptiveScheduler:
+    """
+    Decides when the next refresh is due.
+
+    Call `due()` to check, `record(changed)` after each refresh, and
+    `boost()` on user activity. `clock` and `idle_seconds` can be replaced
+    for deterministic testing.
+    """
+
+    def __init__(
+        self,
+        config: Optional[SchedulerConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+        idle_seconds: Callable[[], Optional[float]] = get_idle_seconds,
+    ):
+        self.config = config or SchedulerConfig.from_env()
+        self.clock = clock
+        self.idle_seconds = idle_seconds
+        self.interval = self.config.min_interval
+        self.menu_open = False
+        self.paused = False
+        self._next_due = clock()
+        self._boost_until = 0.0
+        # Set when a refresh is requested while one may be running, so that
+        # `record()` doesn't push the request back by a whole interval
+        self._expedited = False
+
+    @property
+    def boosted(self) -> bool:
+        return self.menu_open or self.clock() < self._boost_until
+
+    def due(self) -> bool:
+        """True if a refresh should run now."""
+        now = self.clock()
+        if now < self._next_due:
+            return False
+        if not self.boosted:
+            idle = self.idle_seconds()
+            self.paused = idle is not None and idle >= self.config.idle_after
+            if self.paused:
+                # Check again later; nothing changes while nobody is around
+                self._next_due = now + self.config.max_interval
+                return False
+        self._expedited = False
+        return True
+
+    def record(self, changed: bool) -> None:
+        """Schedule the next refresh after one completed."""
+        if changed or self.boosted:
+            self.interval = self.config.min_interval
+        else:
+            self.interval = min(self.interval * self.config.backoff, self.config.max_interval)
+        if self._expedited:
+            # Requested during this refresh; it may not have seen the change
+            self._expedited = False
+        else:
+            self._next_due = self.clock() + self.interval
+
+    def boost(self, duration: Optional[float] = None) -> None:
+        """Poll fast for a while, starting now (after a switch or launch)."""
+        now = self.clock()
+        self._boost_until = max(self._boost_until, now + (duration or self.config.boost_duration))
+        self.interval = self.config.min_interval
+        self.paused = False
+        self.expedite()
+
+    def expedite(self) -> None:
+        """Make a refresh due now without changing the interval (an external change event)."""
+        self._next_due = self.clock()
+        self._expedited = True
+
+    def set_menu_open(self, is_open: bool) -> None:
+        """Poll fast for as long as the menu is open."""
+        self.menu_open = is_open
+        if is_open:
+            self.boost()
+
+    def sleep_time(self) -> float:
+        """Seconds until the next refresh is due."""
+        return max(0.0, self._next_due - self.clock())
+
+
+class Poller:
+    """
+    Runs `refresh` on a background thread whenever the scheduler says it's due.
+
+    `refresh` returns whether the snapshot changed, which drives the backoff.
+    """
+
+    def __init__(self, scheduler: AdaptiveScheduler, refresh: Callable[[], bool]):
+        self.scheduler = scheduler
+        self.refresh = refresh
+        self.running = False
+        self._wakeup = threading.Event()
+
+    def start(self) -> None:
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self) -> None:
+        self.running = False
+        self._wakeup.set()
+
+    def poke(self, boost: bool = True) -> None:
+        """Refresh now and, if `boost`, keep polling fast for a while."""
+        if boost:
+            self.scheduler.boost()
+        else:
+            self.scheduler.expedite()
+        self._wakeup.set()
+
+    def run(self) -> None:
+        while self.running:
+            if self.scheduler.due():
+                try:
+                    changed = self.refresh()
+                except Exception as e:
+                    print(f"Error refreshing sessions: {e}")
+                    changed = False
+                self.scheduler.record(changed)
+            self._wakeup.wait(self.scheduler.sleep_time())
+            self._wakeup.clear()
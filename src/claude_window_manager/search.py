@@ -0,0 +1,159 @@
+"""Type-to-filter search over a snapshot of sessions.
+
+`SearchIndex` is built once per snapshot. It maps every trigram of each
+session's project, topic and language (plus single letters and pairs, for
+the first keystrokes) to the sessions containing it, so a query only
+looks at sessions that share its trigrams. `Search` remembers the result
+of each query typed so far: a keystroke that extends the query narrows
+the previous results, and backspace returns to a cached one.
+
+    search = Search(SearchIndex(sessions))
+    for query in ("b", "bi", "bil"):
+        matches = search.update(query)  # indexes into `sessions`, best first
+"""
+
+import re
+from datetime import datetime
+from typing import Optional
+
+# field -> weight of a match in it
+FIELDS = {"project": 3.0, "topic": 2.0, "language": 1.0}
+GRAM = 3
+WORD_START_BONUS = 2.0  # Match at the start of a word ("bil" in "billing-service")
+FIELD_START_BONUS = 1.5  # ...and of the whole field
+_SEPARATORS = re.compile(r"[\W_]+")
+
+
+def _timestamp(value) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def grams(text: str) -> set[str]:
+    """Every substring of `text` up to GRAM characters long."""
+    return {text[i:i + n] for n in range(1, GRAM + 1) for i in range(len(text) - n + 1)}
+
+
+def query_terms(query: str) -> list[str]:
+    return query.lower().split()
+
+
+class SearchIndex:
+    """N-gram index over sessions (dicts with project, topic and language)."""
+
+    def __init__(self, sessions: list[dict]):
+        self.sessions = sessions
+        # Per field, one entry per session: the lowercased text, and the
+        # same with separators replaced by spaces (for word-start matches)
+        self.columns: list[tuple[float, list[str], list[str]]] = []
+        self.haystacks: list[str] = []
+        self.grams: dict[str, set[int]] = {}
+        rows = [tuple((s.get(name) or "").lower() for name in FIELDS) for s in sessions]
+        for weight, column in zip(FIELDS.values(), zip(*rows) if rows else [()] * len(FIELDS)):
+            words = [" " + _SEPARATORS.sub(" ", text) for text in column]
+            self.columns.append((weight, list(column), words))
+        for i, fields in enumerate(rows):
+            # NUL can't be typed, so terms never match across fields (and
+            # the grams spanning two fields are never looked up)
+            haystack = "\0".join(fields)
+            self.haystacks.append(haystack)
+            for gram in grams(haystack):
+                self.grams.setdefault(gram, set()).add(i)
+
+        # Recency as a tie-breaker in [0, 1): most recently active first;
+        # sessions without activity keep their listed order
+        activity = [_timestamp(s.get("last_activity")) for s in sessions]
+        recent = sorted((t, i) for i, t in enumerate(activity) if t is not None)
+        self.recency = [0.0] * len(sessions)
+        for rank, (_, i) in enumerate(recent):
+            self.recency[i] = (rank + 1) / (len(recent) + 1)
+        self.by_recency = sorted(range(len(sessions)), key=lambda i: -self.recency[i])
+
+    def lookup(self, terms: list[str]) -> list[int]:
+        """Sessions containing every term, in listed order."""
+        if not terms:
+            return list(range(len(self.sessions)))
+        candidates: Optional[set[int]] = None
+        for term in terms:
+            for gram in grams(term) if len(term) > GRAM else (term,):
+                found = self.grams.get(gram)
+                if not found:
+                    return []
+                candidates = set(found) if candidates is None else candidates & found
+        if all(len(term) <= GRAM for term in terms):
+            return sorted(candidates)  # Short terms are grams themselves: exact
+        # Sharing every trigram doesn't guarantee a contiguous match
+        return self.filter(sorted(candidates), terms)
+
+    def filter(self, candidates: list[int], terms: list[str]) -> list[int]:
+        """The candidates containing every term."""
+        haystacks = self.haystacks
+        return [i for i in candidates if all(term in haystacks[i] for term in terms)]
+
+    def scores(self, matches: list[int], terms: list[str]) -> list[float]:
+        """
+        Each match's score: per term, the best weighted match over the
+        fields, plus recency. Computed a field at a time, which keeps the
+        per-session work in comprehensions.
+        """
+        totals = [self.recency[i] for i in matches]
+        for term in terms:
+            word = " " + term
+            best = [0.0] * len(matches)
+            for weight, texts, words in self.columns:
+                start = weight * WORD_START_BONUS * FIELD_START_BONUS
+                inner = weight * WORD_START_BONUS
+                column = [
+                    start if texts[i].startswith(term)
+                    else inner if word in words[i]
+                    else weight if term in texts[i]
+                    else 0.0
+                    for i in matches
+                ]
+                best = list(map(max, best, column))
+            totals = list(map(float.__add__, totals, best))
+        return totals
+
+    def rank(self, matches: list[int], terms: list[str]) -> list[int]:
+        """Best first; ties keep the listed order."""
+        if not terms:
+            matched = set(matches)
+            return [i for i in self.by_recency if i in matched]
+        scores = self.scores(matches, terms)
+        order = sorted(range(len(matches)), key=scores.__getitem__, reverse=True)
+        return [matches[k] for k in order]
+
+
+class Search:
+    """Incremental queries against one `SearchIndex`."""
+
+    def __init__(self, index: SearchIndex):
+        self.index = index
+        # (query, matches, ranked) for each query the current one extends
+        matches = index.lookup([])
+        self._history: list[tuple[str, list[int], list[int]]] = [("", matches, index.rank(matches, []))]
+
+    def update(self, query: str) -> list[int]:
+        """Indexes of the sessions matching `query`, best first."""
+        query = query.lower().lstrip()
+        # Drop results for queries this one doesn't extend (backspace, edits)
+        while len(self._history) > 1 and not query.startswith(self._history[-1][0]):
+            self._history.pop()
+        previous, matches, ranked = self._history[-1]
+        if query == previous:
+            return ranked
+        terms = query_terms(query)
+        # Anything containing the new query contains the old one
+        if previous:
+            matches = self.index.filter(matches, terms)
+        else:
+            matches = self.index.lookup(terms)
+        ranked = self.index.rank(matches, terms)
+        self._history.append((query, matches, ranked))
+        return ranked
@@ -1,13 +1,43 @@
-"""Data models for Claude Code sessions."""
+"""Data models for Claude Code sessions.
 
-from dataclasses import dataclass
+Sessions are immutable, so a refresh can hand out last tick's record for
+every session that hasn't changed (see `RecordCache`) instead of building
+a new one; menus and diffs then compare them by identity first.
+"""
+
+import sys
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def format_runtime(runtime: timedelta) -> str:
+    """Compact runtime: 2d 3h, 4h 12m, 7m."""
+    total_seconds = int(runtime.total_seconds())
+    days = total_seconds // 86400
+    hours = (total_seconds % 86400) // 3600
+    minutes = (total_seconds % 3600) // 60
 
+    if days > 0:
+        return f"{days}d {hours}h"
+    elif hours > 0:
+        return f"{hours}h {minutes}m"
+    else:
+        return f"{minutes}m"
 
-@dataclass
+
+def _intern(text: Optional[str]) -> Optional[str]:
+    return sys.intern(text) if text else text
+
+
+@dataclass(frozen=True, slots=True)
 class ClaudeSession:
-    """Represents a running Claude Code session."""
+    """
+    Represents a running Claude Code session. Immutable: use
+    `dataclasses.replace` for a changed copy.
+    """
 
     window_id: int
     window_name: str
@@ -17,32 +47,36 @@ class ClaudeSession:
     pid: Optional[int]
     tty: Optional[str]
     start_time: Optional[datetime]
+    # From the session's transcript, when one could be matched
+    last_activity: Optional[datetime] = None
+    waiting_for_input: Optional[bool] = None
+
+    def __post_init__(self):
+        # The same few projects, topics and languages recur across sessions
+        # and ticks; share one string for each
+        for name in ("window_name", "project", "topic", "language", "tty"):
+            object.__setattr__(self, name, _intern(getattr(self, name)))
+
+    def runtime_at(self, now: datetime) -> Optional[timedelta]:
+        """How long the session had been running at `now`."""
+        if self.start_time is None:
+            return None
+        return now - self.start_time
+
+    def runtime_display_at(self, now: datetime) -> str:
+        """Runtime at `now`, formatted for display."""
+        runtime = self.runtime_at(now)
+        return format_runtime(runtime) if runtime is not None else ""
 
     @property
     def runtime(self) -> Optional[timedelta]:
         """Calculate how long the session has been running."""
-        if self.start_time is None:
-            return None
-        return datetime.now() - self.start_time
+        return self.runtime_at(datetime.now())
 
     @property
     def runtime_display(self) -> str:
         """Format runtime for display."""
-        runtime = self.runtime
-        if runtime is None:
-            return ""
-
-        total_seconds = int(runtime.total_seconds())
-        days = total_seconds // 86400
-        hours = (total_seconds % 86400) // 3600
-        minutes = (total_seconds % 3600) // 60
-
-        if days > 0:
-            return f"{days}d {hours}h"
-        elif hours > 0:
-            return f"{hours}h {minutes}m"
-        else:
-            return f"{minutes}m"
+        return self.runtime_display_at(datetime.now())
 
     @property
     def display_name(self) -> str:
@@ -54,7 +88,60 @@ class ClaudeSession:
         """Get the topic for display."""
         return self.topic or "No topic"
 
+    def to_dict(self) -> dict:
+        """Serialize to a JSON-compatible dict."""
+        data = {name: getattr(self, name) for name in _FIELD_NAMES}
+        for key in ("start_time", "last_activity"):
+            if data[key] is not None:
+                data[key] = data[key].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ClaudeSession":
+        """Rebuild a session from `to_dict()` output."""
+        data = dict(data)
+        for key in ("start_time", "last_activity"):
+            if data.get(key):
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
+
     def __str__(self) -> str:
-        runtime_str = f" ({self.runtime_display})" if self.runtime else ""
+        runtime = self.runtime
+        runtime_str = f" ({format_runtime(runtime)})" if runtime else ""
         topic_str = f" - {self.topic}" if self.topic else ""
         return f"{self.project}{topic_str}{runtime_str}"
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(ClaudeSession))
+
+
+class RecordCache:
+    """
+    Values from the previous tick, by key. `reuse(key, make)` returns the
+    value stored under `key` last tick (or earlier this tick), making it
+    only if there is none; `tick()` then forgets the keys this tick didn't
+    use. Keys must capture everything the value is made from.
+    """
+
+    def __init__(self):
+        self._previous: dict[Hashable, object] = {}
+        self._current: dict[Hashable, object] = {}
+
+    def reuse(self, key: Hashable, make: Callable[[], T]) -> T:
+        value = self._current.get(key)
+        if value is None:
+            value = self._previous.get(key)
+            if value is None:
+                value = make()
+            self._current[key] = value
+        return value
+
+    def tick(self) -> None:
+        self._previous, self._current = self._current, {}
+
+
+def sessions_from_dicts(data: list[dict], cache: RecordCache) -> list[ClaudeSession]:
+    """`ClaudeSession.from_dict` for a snapshot, reusing records for unchanged dicts."""
+    sessions = [cache.reuse(tuple(d.values()), lambda d=d: ClaudeSession.from_dict(d)) for d in data]
+    cache.tick()
+    return sessions
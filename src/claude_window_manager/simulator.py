@@ -0,0 +1,418 @@
+"""Synthetic Terminal/iTerm2/ps backend for testing and benchmarking off macOS.
+
+`Simulator` generates realistic output for the detection scripts and for
+macOS `ps -eo pid,tty,lstart,comm`, at any scale, and can stand in for
+both `osascript` and `ps`:
+
+    sim = Simulator(windows=100, processes=5000)
+    with sim.install():
+        sessions = get_claude_sessions()
+"""
+
+import json
+import random
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from functools import cached_property
+from pathlib import Path
+from typing import Optional
+
+from .applescript import FIELD_SEP, RECORD_SEP, use_runner
+from .detection import use_command_backend
+
+PROJECTS = [
+    "ai-app-builder", "claude-window-manager", "billing-service", "infra",
+    "web-frontend", "data-pipeline", "mobile-app", "docs", "ml-training",
+    "auth-gateway", "search-indexer", "analytics",
+]
+TOPICS = [
+    "Evaluations Package", "Fix flaky tests", "Refactor parser, again",
+    "Add OAuth login", "Migrate to Postgres 16", "Investigate memory leak",
+    "Write release notes", "Speed up CI", "Dark mode - settings page",
+    "Review PR #482",
+]
+LANGUAGES = ["Python", "TypeScript", "Rust", "Go", "Swift", "Kotlin"]
+OTHER_TITLES = ["zsh", "bash — 80×24", "vim — main.py", "htop", "ssh build-01", "python3 — manage.py, shell"]
+SYSTEM_COMMANDS = [
+    "/sbin/launchd", "/usr/libexec/logd", "/usr/sbin/mDNSResponder",
+    "/System/Library/CoreServices/Finder.app/Contents/MacOS/Finder",
+    "/Applications/Safari.app/Contents/MacOS/Safari", "/usr/libexec/trustd",
+    "-zsh", "/bin/zsh", "node", "/usr/local/bin/python3",
+]
+
+
+def format_lstart(dt: datetime) -> str:
+    """Format a time the way macOS `ps -o lstart` does ("Mon Jan  4 14:30:00 2025")."""
+    return f"{dt:%a %b} {dt.day:2d} {dt:%H:%M:%S %Y}"
+
+
+def title_corpus(count: int, seed: int = 0, claude_ratio: float = 0.8) -> list[str]:
+    """Window titles in the formats seen in practice, Claude and otherwise."""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        if rng.random() >= claude_ratio:
+            titles.append(rng.choice(OTHER_TITLES))
+            continue
+        project = rng.choice(PROJECTS)
+        topic = rng.choice(TOPICS)
+        style = rng.random()
+        if style < 0.6:
+            titles.append(f"{project} — ✳ {topic} — {rng.choice(LANGUAGES)} ◂ claude")
+        elif style < 0.85:
+            titles.append(f"{project} — ✳ {topic} ◂ claude")
+        else:
+            titles.append(f"{project} — claude")
+    return titles
+
+
+def session_dicts(count: int, seed: int = 0, now: Optional[datetime] = None) -> list[dict]:
+    """Sessions as the index serves them, with varied topics and activity."""
+    rng = random.Random(seed)
+    now = now or datetime(2025, 1, 6, 12, 0, 0)
+    return [
+        {
+            "window_id": i + 1,
+            "project": rng.choice(PROJECTS),
+            "topic": f"{rng.choice(TOPICS)} {i}",
+            "language": rng.choice(LANGUAGES + [None]),
+            "last_activity": (now - timedelta(minutes=rng.randint(0, 10000))).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def write_transcripts(
+    root: Path,
+    files: int = 32,
+    messages: int = 500,
+    seed: int = 0,
+    start: Optional[datetime] = None,
+) -> list[Path]:
+    """
+    Write Claude Code-style JSONL transcripts under `root`, one project
+    directory per project: user prompts, assistant turns split into one
+    line per content block (sharing a message id and usage) and bulky tool
+    results, spread over several days.
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2025, 1, 6, 9, 0, 0)
+    paths = []
+    for i in range(files):
+        project = PROJECTS[i % len(PROJECTS)]
+        cwd = f"/Users/dev/Projects/{project}"
+        directory = Path(root) / cwd.replace("/", "-")
+        directory.mkdir(parents=True, exist_ok=True)
+        session_id = f"{rng.getrandbits(128):032x}"
+        when = start + timedelta(days=rng.randint(0, 13), minutes=rng.randint(0, 600))
+        lines = []
+        for m in range(messages):
+            when += timedelta(seconds=rng.randint(5, 240))
+            stamp = when.isoformat(timespec="milliseconds") + "Z"
+            base = {"cwd": cwd, "sessionId": session_id, "timestamp": stamp, "isSidechain": False}
+            lines.append({**base, "type": "user", "message": {"role": "user", "content": rng.choice(TOPICS)}})
+            usage = {
+                "input_tokens": rng.randint(5, 2000),
+                "output_tokens": rng.randint(20, 1500),
+                "cache_creation_input_tokens": rng.randint(0, 4000),
+                "cache_read_input_tokens": rng.randint(0, 60000),
+            }
+            message = {"id": f"msg_{i:04d}_{m:06d}", "role": "assistant", "usage": usage, "stop_reason": "tool_use"}
+            for block in ("thinking", "tool_use"):
+                lines.append({**base, "type": "assistant", "message": {**message, "content": [{"type": block, "text": "x" * rng.randint(50, 400)}]}})
+            lines.append({**base, "type": "user", "toolUseResult": {"stdout": "y" * rng.randint(200, 3000)}})
+        path = directory / f"{session_id}.jsonl"
+        path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+        paths.append(path)
+    return paths
+
+
+class Simulator:
+    """
+    Generates consistent window, iTerm2 session and process data.
+
+    Outputs are rendered once and reused, so benchmarks measure parsing
+    rather than the simulator.
+    """
+
+    def __init__(
+        self,
+        windows: int = 10,
+        iterm_sessions: Optional[int] = None,
+        processes: int = 1000,
+        claude_ratio: float = 0.8,
+        seed: int = 0,
+        now: Optional[datetime] = None,
+    ):
+        rng = random.Random(seed)
+        now = now or datetime.now().replace(microsecond=0)
+        self.calls: Counter = Counter()  # By command name
+        self.write_scripts: list[str] = []  # Batched iTerm2 writes, as run
+        self.launch_scripts: list[str] = []  # Batched iTerm2 launches, as run
+
+        # Terminal windows, each on its own TTY
+        self.windows = [
+            (1000 + i, title, f"ttys{i:03d}")
+            for i, title in enumerate(title_corpus(windows, seed, claude_ratio))
+        ]
+
+        # iTerm2 sessions: (window, tab, id, name, project, topic, tty)
+        self.iterm = []
+        count = windows if iterm_sessions is None else iterm_sessions
+        for i in range(count):
+            project = rng.choice(PROJECTS)
+            topic = rng.choice(TOPICS)
+            self.iterm.append((
+                i // 8 + 1, i % 8 + 1, f"w{i // 8}t{i % 8}p0:{i:08X}",
+                f"🤖 {project} — ✳ {topic}", project, topic, f"ttys{500 + i:03d}",
+            ))
+
+        # Process table: a Claude process on every Claude window's TTY, a
+        # shell on every other TTY, and background processes filling the rest
+        rows = []
+        pid = 100
+        for _, title, tty in self.windows:
+            started = now - timedelta(minutes=rng.randint(1, 60 * 24 * 3))
+            rows.append((pid, tty, started, "-zsh"))
+            pid += rng.randint(1, 5)
+            if "claude" in title.lower():
+                rows.append((pid, tty, started + timedelta(seconds=5), "claude"))
+                pid += rng.randint(1, 5)
+        while len(rows) < processes:
+            started = now - timedelta(minutes=rng.randint(1, 60 * 24 * 30))
+            rows.append((pid, "??", started, rng.choice(SYSTEM_COMMANDS)))
+            pid += rng.randint(1, 5)
+        self.processes = rows
+
+    @cached_property
+    def terminal_output(self) -> str:
+        """Output of window_detector.TERMINAL_WINDOWS."""
+        columns = [
+            FIELD_SEP.join(str(w[0]) for w in self.windows),
+            FIELD_SEP.join(w[1] for w in self.windows),
+            FIELD_SEP.join(f"/dev/{w[2]}" for w in self.windows),
+        ]
+        return RECORD_SEP.join(columns)
+
+    @cached_property
+    def iterm_output(self) -> str:
+        """Output of iterm2_integration.ITERM_SESSIONS."""
+        return RECORD_SEP.join(
+            FIELD_SEP.join([str(w), str(t), sid, name, project, topic, f"/dev/{tty}"])
+            for w, t, sid, name, project, topic, tty in self.iterm
+        )
+
+    @cached_property
+    def ps_output(self) -> str:
+        """Output of macOS `ps -eo pid,tty,lstart,comm`."""
+        lines = ["  PID TTY      STARTED                      COMM"]
+        for pid, tty, started, comm in self.processes:
+            lines.append(f"{pid:5d} {tty:<8} {format_lstart(started)}     {comm}")
+        return "\n".join(lines)
+
+    def respond(self, argv: list[str]) -> str:
+        """Answer a command the way macOS would."""
+        self.calls[argv[0]] += 1
+        if argv[0] == "ps":
+            return self.ps_output
+        if argv[0] == "osascript":
+            script = argv[-1] if argv[1] == "-e" else ""
+            return self.run(script)
+        return ""
+
+    async def run_command(self, argv: list[str], timeout: float) -> str:
+        return self.respond(argv)
+
+    # ScriptRunner interface, for run_applescript()/run_template()
+    def run(self, script: str, timeout: Optional[float] = None) -> str:
+        if 'application "Terminal"' in script and "every window" in script:
+            return self.terminal_output
+        if "set writtenIds" in script:
+            return self.apply_writes(script)
+        if "set launchResults" in script:
+            self.launch_scripts.append(script)
+            return FIELD_SEP.join(["ok"] * script.count("create tab with"))
+        if 'application "iTerm2"' in script and "user.claude_session" in script:
+            return self.iterm_output
+        return ""
+
+    def apply_writes(self, script: str) -> str:
+        """Record an iterm2_writes script; sessions that don't exist fail."""
+        self.write_scripts.append(script)
+        ids = {sid for _, _, sid, *_ in self.iterm}
+        written = [sid for sid in re.findall(r'if sessionId is "([^"]*)" then', script) if sid in ids]
+        return "ok" + FIELD_SEP + FIELD_SEP.join(written)
+
+    def run_template(self, template, *args, timeout: Optional[float] = None) -> str:
+        return ""
+
+    @contextmanager
+    def install(self):
+        """Serve `osascript` and `ps` calls from this simulator."""
+        with ExitStack() as stack:
+            stack.enter_context(use_command_backend(self.run_command))
+            stack.enter_context(use_runner(self))
+            yield self
+
+
+class _FakeSession:
+    def __init__(self, api: "FakeITerm2", session_id: str, variables: dict[str, str]):
+        self.api = api
+        self.session_id = session_id
+        self.variables = variables
+
+    async def async_get_variable(self, name: str):
+        self.api.requests += 1
+        return self.variables.get(name)
+
+
+class _FakeTab:
+    def __init__(self, session: _FakeSession):
+        self.current_session = session
+
+
+class _FakeWindow:
+    def __init__(self, tabs: list[_FakeTab]):
+        self.tabs = tabs
+
+
+class _FakeApp:
+    def __init__(self, api: "FakeITerm2"):
+        self.api = api
+
+    @property
+    def terminal_windows(self) -> list[_FakeWindow]:
+        with self.api.lock:
+            return [_FakeWindow([_FakeTab(s) for s in tabs]) for tabs in self.api.windows if tabs]
+
+    async def async_refresh(self) -> None:
+        self.api.requests += 1
+
+
+class _FakeMonitor:
+    """A notification subscription: `async_get()` waits for the next event."""
+
+    def __init__(self, api: "FakeITerm2", topic: tuple):
+        self.api = api
+        self.topic = topic
+
+    async def __aenter__(self):
+        import asyncio
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        with self.api.lock:
+            self.api.subscribers.append(self)
+        return self
+
+    async def __aexit__(self, *exc):
+        with self.api.lock:
+            self.api.subscribers.remove(self)
+        return False
+
+    async def async_get(self):
+        value = await self.queue.get()
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+class FakeITerm2:
+    """
+    Stands in for the `iterm2` package (the parts `iterm2_api` uses),
+    serving a simulator's iTerm2 sessions. Changes made with
+    `add_session`, `close_session`, `move_session` and `set_variable` are
+    pushed to subscribed monitors, as iTerm2 would; `disconnect` ends them
+    all.
+    `requests` counts round trips to "iTerm2".
+    """
+
+    class VariableScopes:
+        SESSION = "session"
+
+    def __init__(self, sim: Simulator):
+        import threading
+        from types import SimpleNamespace
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.subscribers: list[_FakeMonitor] = []
+        self.windows: list[list[_FakeSession]] = []
+        for window, tab, session_id, name, project, topic, tty in sim.iterm:
+            while len(self.windows) < window:
+                self.windows.append([])
+            self.windows[window - 1].append(self._session(session_id, name, project, topic, f"/dev/{tty}"))
+        self.app = _FakeApp(self)
+        self.Connection = SimpleNamespace(async_create=self._connect)
+
+    def _session(self, session_id: str, name: str, project: str, topic: str, tty: str) -> _FakeSession:
+        return _FakeSession(self, session_id, {
+            "user.claude_session": name,
+            "user.claude_project": project,
+            "user.claude_topic": topic,
+            "tty": tty,
+        })
+
+    async def _connect(self):
+        self.requests += 1
+        return self
+
+    async def async_get_app(self, connection) -> _FakeApp:
+        self.requests += 1
+        return self.app
+
+    def NewSessionMonitor(self, connection) -> _FakeMonitor:
+        return _FakeMonitor(self, ("new",))
+
+    def SessionTerminationMonitor(self, connection) -> _FakeMonitor:
+        return _FakeMonitor(self, ("terminated",))
+
+    def LayoutChangeMonitor(self, connection) -> _FakeMonitor:
+        return _FakeMonitor(self, ("layout",))
+
+    def VariableMonitor(self, connection, scope: str, name: str, identifier: str) -> _FakeMonitor:
+        return _FakeMonitor(self, ("variable", name, identifier))
+
+    def _publish(self, topic: tuple, value) -> None:
+        with self.lock:
+            subscribers = [m for m in self.subscribers if m.topic == topic or topic == ("*",)]
+        for monitor in subscribers:
+            monitor.loop.call_soon_threadsafe(monitor.queue.put_nowait, value)
+
+    def add_session(self, window: int, session_id: str, name: str = "", project: str = "", topic: str = "") -> None:
+        with self.lock:
+            while len(self.windows) < window:
+                self.windows.append([])
+            self.windows[window - 1].append(self._session(session_id, name, project, topic, "/dev/ttys900"))
+        self._publish(("new",), session_id)
+        self._publish(("layout",), None)
+
+    def close_session(self, session_id: str) -> None:
+        with self.lock:
+            for tabs in self.windows:
+                tabs[:] = [s for s in tabs if s.session_id != session_id]
+        self._publish(("terminated",), session_id)
+        self._publish(("layout",), None)
+
+    def move_session(self, session_id: str, window: int) -> None:
+        """Move a session's tab to the end of `window` (as by dragging it)."""
+        with self.lock:
+            moved = [s for tabs in self.windows for s in tabs if s.session_id == session_id]
+            for tabs in self.windows:
+                tabs[:] = [s for s in tabs if s.session_id != session_id]
+            while len(self.windows) < window:
+                self.windows.append([])
+            self.windows[window - 1].extend(moved)
+        self._publish(("layout",), None)
+
+    def set_variable(self, session_id: str, name: str, value: str) -> None:
+        with self.lock:
+            for tabs in self.windows:
+                for session in tabs:
+                    if session.session_id == session_id:
+                        session.variables[name] = value
+        self._publish(("variable", name, session_id), value)
+
+    def disconnect(self) -> None:
+        self._publish(("*",), ConnectionError("iTerm2 went away"))
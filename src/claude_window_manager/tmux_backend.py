@@ -0,0 +1,253 @@
+"""Detect and switch to Claude Code sessions running in tmux panes."""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Callable, NamedTuple, Optional
+
+from .applescript import FIELD_SEP
+from .detection import detect_sync, get_detector, run_command
+from .session import ClaudeSession, RecordCache
+from .window_detector import is_claude_title, normalize_tty, parse_window_name
+
+# Every pane on the server in one call, one line per pane
+PANE_FIELDS = (
+    "session_name", "window_index", "pane_index", "pane_id",
+    "pane_tty", "pane_pid", "pane_title", "pane_current_command", "pane_current_path",
+)
+PANE_FORMAT = FIELD_SEP.join(f"#{{{field}}}" for field in PANE_FIELDS)
+
+# Control-mode notifications that can change the session list
+EVENTS = {
+    "%window-add", "%window-close", "%window-renamed",
+    "%unlinked-window-add", "%unlinked-window-close", "%unlinked-window-renamed",
+    "%sessions-changed", "%session-renamed", "%layout-change",
+    "%subscription-changed",
+}
+# Pane titles have no notification of their own; a subscription reports
+# changes to the format (at most once a second) across all panes
+TITLE_SUBSCRIPTION = "cwm-titles:%*:#{pane_title}"
+RECONNECT_DELAY = 5.0
+
+
+class TmuxPane(NamedTuple):
+    session: str
+    window: int
+    pane: int
+    pane_id: str  # "%12"
+    tty: Optional[str]
+    pid: int
+    title: str
+    command: str
+    path: str
+
+
+def tmux_available() -> bool:
+    return shutil.which("tmux") is not None
+
+
+def parse_panes(output: str) -> list[TmuxPane]:
+    """Parse `list-panes -a -F PANE_FORMAT` output."""
+    panes = []
+    for line in output.splitlines():
+        fields = line.split(FIELD_SEP)
+        if len(fields) != len(PANE_FIELDS):
+            continue
+        session, window, pane, pane_id, tty, pid, title, command, path = fields
+        try:
+            panes.append(TmuxPane(
+                session, int(window), int(pane), pane_id,
+                normalize_tty(tty), int(pid), title, command, path,
+            ))
+        except ValueError:
+            continue
+    return panes
+
+
+async def get_tmux_panes_async() -> list[TmuxPane]:
+    """All panes of the local tmux server (empty if none is running)."""
+    try:
+        output = await run_command(["tmux", "list-panes", "-a", "-F", PANE_FORMAT])
+    except FileNotFoundError:
+        return []
+    return parse_panes(output)
+
+
+def get_tmux_panes() -> list[TmuxPane]:
+    return detect_sync(["tmux"])["tmux"]
+
+
+def build_tmux_sessions(
+    panes: list[TmuxPane],
+    processes: dict[str, tuple[int, datetime]],
+    cache: Optional[RecordCache] = None,
+) -> list[ClaudeSession]:
+    """
+    Build sessions from tmux panes joined with the process table.
+
+    A pane is a Claude session if its title mentions Claude or a Claude
+    process runs on its TTY. Panes whose title doesn't follow the Claude
+    format (tmux defaults it to the hostname) are named after their
+    working directory. The window id is the numeric pane id. A `cache`
+    works as in `build_claude_sessions`.
+    """
+    cache = cache or RecordCache()
+    sessions = []
+    for pane in panes:
+        claude = processes.get(pane.tty)
+        if claude is None and not is_claude_title(pane.title):
+            continue
+        pid, start_time = claude or (None, None)
+        sessions.append(cache.reuse(("tmux", pane, pid, start_time), lambda: _tmux_session(pane, pid, start_time)))
+    return sessions
+
+
+def _tmux_session(pane: TmuxPane, pid: Optional[int], start_time: Optional[datetime]) -> ClaudeSession:
+    if is_claude_title(pane.title):
+        project, topic, language = parse_window_name(pane.title)
+    else:
+        project, topic, language = os.path.basename(pane.path) or pane.path, None, None
+    return ClaudeSession(
+        window_id=int(pane.pane_id.lstrip("%")),
+        window_name=pane.title,
+        project=project,
+        topic=topic,
+        language=language,
+        pid=pid,
+        tty=pane.tty,
+        start_time=start_time,
+    )
+
+
+async def get_claude_tmux_sessions_async() -> list[ClaudeSession]:
+    """Get all Claude Code sessions from tmux panes."""
+    result = await get_detector().detect(["tmux", "processes"])
+    return build_tmux_sessions(result["tmux"], result["processes"])
+
+
+def get_claude_tmux_sessions() -> list[ClaudeSession]:
+    """Get all Claude Code sessions from tmux panes."""
+    result = detect_sync(["tmux", "processes"])
+    return build_tmux_sessions(result["tmux"], result["processes"])
+
+
+def launch_claude_tmux_session(project_path: Optional[str] = None, topic: str = "New Session") -> bool:
+    """Open a tmux window running Claude Code, titled like the iTerm2 tabs."""
+    project_path = project_path or os.getcwd()
+    title = f"{os.path.basename(os.path.abspath(project_path))} — ✳ {topic}"
+    argv = [
+        "tmux", "new-window", "-c", project_path, "-n", title, "claude",
+        ";", "select-pane", "-T", title,
+    ]
+    try:
+        result = subprocess.run(argv, capture_output=True, timeout=5)
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+def launch_claude_tmux_sessions(specs: list) -> list[Optional[str]]:
+    """
+    Open a window per `manifest.LaunchSpec` with a single tmux command.
+    Returns, per spec, None if it launched or the error.
+    """
+    if not specs:
+        return []
+    argv = ["tmux"]
+    for spec in specs:
+        # -P prints each new window's id: tmux stops at the first failing
+        # command, so the ids show which windows were created
+        argv += [
+            "new-window", "-P", "-F", "#{window_id}", "-c", spec.path, "-n", spec.title, "claude",
+            ";", "select-pane", "-T", spec.title, ";",
+        ]
+    try:
+        result = subprocess.run(argv[:-1], capture_output=True, text=True, timeout=5 + len(specs))
+    except Exception as e:
+        return [str(e)] * len(specs)
+    launched = len(result.stdout.split())
+    error = result.stderr.strip() or f"tmux exited with status {result.returncode}"
+    return [None if i < launched else error for i in range(len(specs))]
+
+
+def switch_to_pane(pane_id: int, pid: Optional[int] = None) -> bool:
+    """
+    Select a pane and its window. From inside tmux, also move this
+    client to the pane's session. The session's Claude `pid`, if given,
+    is restored first if the idle governor deprioritized it.
+    """
+    if pid:
+        from .governor import resume
+        resume(pid)
+    target = f"%{pane_id}"
+    argv = ["tmux", "select-window", "-t", target, ";", "select-pane", "-t", target]
+    if os.environ.get("TMUX"):
+        argv += [";", "switch-client", "-t", target]
+    try:
+        result = subprocess.run(argv, capture_output=True, timeout=5)
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+class TmuxControl:
+    """
+    Watches the tmux server through a control-mode client (`tmux -C`) and
+    calls `on_event(name, args)` for window, session and title changes.
+
+    Reconnects while `running` if the server or the attached session goes
+    away, so it can be started before tmux is.
+    """
+
+    def __init__(self, on_event: Callable[[str, list[str]], None]):
+        self.on_event = on_event
+        self.running = False
+        self._process: Optional[subprocess.Popen] = None
+
+    def start(self) -> None:
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self) -> None:
+        self.running = False
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+
+    def run(self) -> None:
+        while self.running:
+            try:
+                self._listen()
+            except OSError:
+                pass
+            if self.running:
+                time.sleep(RECONNECT_DELAY)
+
+    def _listen(self) -> None:
+        # no-output: skip pane output; ignore-size: don't resize anyone's windows
+        self._process = subprocess.Popen(
+            ["tmux", "-C", "attach-session", "-f", "no-output,ignore-size"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1,
+        )
+        subscribed = False
+        for line in self._process.stdout:
+            name, *args = line.rstrip("\n").split(" ")
+            if name == "%exit":
+                break
+            if name == "%session-changed" and not subscribed:
+                # Commands sent before the client is attached fail with
+                # "no current client"
+                self._process.stdin.write(f"refresh-client -B '{TITLE_SUBSCRIPTION}'\n")
+                self._process.stdin.flush()
+                subscribed = True
+            if name in EVENTS:
+                self.on_event(name, args)
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait()
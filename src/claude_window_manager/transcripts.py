@@ -0,0 +1,315 @@
+"""Live session status from Claude Code's JSONL transcripts.
+
+Each session appends to ~/.claude/projects/<project>/<session-id>.jsonl.
+`TranscriptTailer` keeps a byte offset per file and reads only what was
+appended since the last update (with `os.pread`), so the per-tick cost
+follows new data, not file size. A transcript it hasn't seen before is
+read from its first and last few KB, not in full. While a file watcher
+reports which transcripts changed (`changed()`), only those are read;
+otherwise every update lists the directory. Offsets and the status derived
+so far are persisted in the state dir, so a restart doesn't reread
+everything.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .metrics import timed
+from .paths import CLAUDE_PROJECTS_DIR, STATE_DIR
+from .session import ClaudeSession, RecordCache
+
+STATE_PATH = STATE_DIR / "transcripts.json"
+CHUNK_SIZE = 1 << 20
+# A new transcript longer than HEAD_SIZE + TAIL_SIZE is read from its head
+# (where the working directory is) and its tail (the latest activity)
+HEAD_SIZE = 16 << 10
+TAIL_SIZE = 16 << 10
+SAVE_INTERVAL = 30.0  # At most one state write per interval, in seconds
+# An assistant turn that stopped for one of these is waiting on the user;
+# "tool_use" means a tool is about to run
+WAITING_STOP_REASONS = {"end_turn", "stop_sequence", "max_tokens"}
+
+
+def _parse_timestamp(value: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+@dataclass
+class TranscriptStatus:
+    """What a transcript says about its session so far."""
+
+    cwd: Optional[str] = None  # Where the session was started
+    topic: Optional[str] = None
+    last_activity: Optional[float] = None  # Epoch seconds
+    waiting_for_input: bool = False
+
+    def apply(self, entry: dict) -> None:
+        """Fold one transcript entry into the status."""
+        kind = entry.get("type")
+        if kind == "summary" and entry.get("summary"):
+            self.topic = entry["summary"]
+        elif kind == "custom-title" and entry.get("customTitle"):
+            self.topic = entry["customTitle"]
+        elif kind in ("user", "assistant") and not entry.get("isSidechain"):
+            self.cwd = self.cwd or entry.get("cwd")
+            timestamp = _parse_timestamp(entry.get("timestamp"))
+            if timestamp is not None:
+                self.last_activity = max(self.last_activity or 0.0, timestamp)
+            if kind == "assistant":
+                stop_reason = (entry.get("message") or {}).get("stop_reason")
+                self.waiting_for_input = stop_reason in WAITING_STOP_REASONS
+            else:
+                self.waiting_for_input = False
+
+
+@dataclass
+class _FileState:
+    inode: int
+    offset: int  # End of the last complete line read
+    status: TranscriptStatus
+
+
+class TranscriptTailer:
+    """Incrementally reads transcripts and tracks each session's status."""
+
+    def __init__(self, root: Path = CLAUDE_PROJECTS_DIR, state_path: Optional[Path] = STATE_PATH):
+        self.root = Path(root)
+        self.state_path = state_path
+        self.files: dict[str, _FileState] = {}
+        self.bytes_read = 0  # Total, for instrumentation
+        # Set while a file watcher calls `changed()`; updates then read only
+        # the changed transcripts, after one full scan
+        self.watched = False
+        self._scanned = False
+        self._pending: set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        self.load()
+
+    def load(self) -> None:
+        """Restore offsets and statuses saved by a previous run."""
+        if self.state_path is None:
+            return
+        try:
+            data = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            return
+        for path, entry in data.get("files", {}).items():
+            try:
+                self.files[path] = _FileState(
+                    entry["inode"], entry["offset"], TranscriptStatus(**entry["status"])
+                )
+            except (KeyError, TypeError):
+                continue
+
+    def save(self, force: bool = False) -> None:
+        """
+        Persist offsets and statuses if anything changed, at most once per
+        SAVE_INTERVAL unless `force`d. Offsets lost in a crash only mean
+        rereading a little.
+        """
+        if self.state_path is None or not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved_at < SAVE_INTERVAL:
+            return
+        self._saved_at = now
+        data = {"files": {path: asdict(state) for path, state in self.files.items()}}
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.state_path)
+        self._dirty = False
+
+    def changed(self, paths: Iterable[str]) -> None:
+        """Note paths a file watcher reported, for the next `update()`."""
+        with self._pending_lock:
+            self._pending.update(paths)
+
+    @timed("transcripts")
+    def update(self, paths: Optional[Iterable[str]] = None) -> dict[str, TranscriptStatus]:
+        """
+        Read new data from `paths` (default: the transcripts reported as
+        changed while watched, else every transcript under the root) and
+        return the status of every known transcript.
+        """
+        if paths is None:
+            with self._pending_lock:
+                pending, self._pending = self._pending, set()
+            # Anything but a transcript (a directory, the root after events
+            # were dropped) could hide changes: list everything
+            if self.watched and self._scanned and all(p.endswith(".jsonl") for p in pending):
+                paths = pending
+            else:
+                paths = self._scan()
+        for path in paths:
+            if self._is_transcript(path):
+                self._read(path)
+        self.save()
+        return {path: state.status for path, state in self.files.items()}
+
+    def _scan(self) -> set[str]:
+        current = {str(p) for p in self.root.glob("*/*.jsonl")}
+        for gone in self.files.keys() - current:
+            del self.files[gone]
+            self._dirty = True
+        self._scanned = True
+        return current
+
+    def _is_transcript(self, path: str) -> bool:
+        return path.endswith(".jsonl") and os.path.dirname(os.path.dirname(path)) == str(self.root)
+
+    def _read(self, path: str) -> None:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            if self.files.pop(path, None) is not None:
+                self._dirty = True
+            return
+        try:
+            st = os.fstat(fd)
+            state = self.files.get(path)
+            if state is None or state.inode != st.st_ino or st.st_size < state.offset:
+                # New, replaced or truncated: start over
+                state = self.files[path] = _FileState(st.st_ino, 0, TranscriptStatus())
+                self._dirty = True
+                if st.st_size > HEAD_SIZE + TAIL_SIZE:
+                    self._skip_to_tail(fd, state, st.st_size)
+            position = state.offset
+            pending = b""
+            while position < st.st_size:
+                chunk = os.pread(fd, min(CHUNK_SIZE, st.st_size - position), position)
+                if not chunk:
+                    break
+                position += len(chunk)
+                self.bytes_read += len(chunk)
+                pending += chunk
+                end = pending.rfind(b"\n")
+                if end < 0:
+                    continue  # Line longer than a chunk; keep reading
+                for line in pending[:end].split(b"\n"):
+                    self._apply_line(state.status, line)
+                state.offset += end + 1
+                pending = pending[end + 1:]
+                self._dirty = True
+            # A trailing partial line is left for the next update
+        finally:
+            os.close(fd)
+
+    def _skip_to_tail(self, fd: int, state: _FileState, size: int) -> None:
+        """Apply the complete lines in the head and the tail, skipping what's between."""
+        head = os.pread(fd, HEAD_SIZE, 0)
+        tail_start = size - TAIL_SIZE
+        tail = os.pread(fd, TAIL_SIZE, tail_start)
+        self.bytes_read += len(head) + len(tail)
+        first, last = tail.find(b"\n"), tail.rfind(b"\n")
+        if first == last or head.rfind(b"\n") < 0:
+            return  # Lines too long to find in the windows; read it all
+        for line in head[:head.rfind(b"\n")].split(b"\n"):
+            self._apply_line(state.status, line)
+        for line in tail[first + 1:last].split(b"\n"):
+            self._apply_line(state.status, line)
+        state.offset = tail_start + last + 1
+
+    @staticmethod
+    def _apply_line(status: TranscriptStatus, line: bytes) -> None:
+        if not line.strip():
+            return
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        if isinstance(entry, dict):
+            status.apply(entry)
+
+
+_tailer: Optional[TranscriptTailer] = None
+
+
+def get_tailer() -> TranscriptTailer:
+    """Shared tailer, so offsets carry over between refreshes."""
+    global _tailer
+    if _tailer is None:
+        _tailer = TranscriptTailer()
+    return _tailer
+
+
+def save_tailer() -> None:
+    """Persist the shared tailer's state now, if it was used."""
+    if _tailer is not None:
+        _tailer.save(force=True)
+
+
+def process_cwd(pid: Optional[int]) -> Optional[str]:
+    """A process's working directory, where the OS exposes it cheaply (/proc)."""
+    if pid is None:
+        return None
+    try:
+        return os.readlink(f"/proc/{pid}/cwd")
+    except OSError:
+        return None
+
+
+def project_dir_name(cwd: str) -> str:
+    """The directory under ~/.claude/projects that Claude Code uses for `cwd`."""
+    return re.sub(r"[^A-Za-z0-9]", "-", cwd)
+
+
+def enrich_sessions(
+    sessions: list[ClaudeSession],
+    statuses: dict[str, TranscriptStatus],
+    cache: Optional[RecordCache] = None,
+) -> list[ClaudeSession]:
+    """
+    The sessions with topic, last activity and waiting state filled in
+    from transcripts. With a `cache`, an enriched session that hasn't
+    changed since last tick is last tick's record.
+
+    Sessions are matched to transcripts by the process's working directory
+    where it is known (Linux), otherwise by project name (the basename of
+    the directory the session started in). Several sessions in one project
+    are paired with that project's transcripts, most recently active first.
+    """
+    by_key: dict[str, list[TranscriptStatus]] = {}
+    for path, status in statuses.items():
+        if status.cwd is None or status.last_activity is None:
+            continue
+        by_key.setdefault(os.path.basename(os.path.dirname(path)), []).append(status)
+        by_key.setdefault(os.path.basename(status.cwd), []).append(status)
+    for candidates in by_key.values():
+        candidates.sort(key=lambda s: s.last_activity, reverse=True)
+
+    cache = cache or RecordCache()
+    used: set[int] = set()
+    enriched = []
+    for session in sessions:
+        enriched.append(session)
+        cwd = process_cwd(session.pid)
+        candidates = by_key.get(project_dir_name(cwd) if cwd else session.project)
+        if not candidates:
+            continue
+        start = session.start_time.timestamp() if session.start_time else 0.0
+        for status in candidates:
+            if id(status) in used or status.last_activity < start:
+                continue
+            used.add(id(status))
+            key = (session, status.topic, status.last_activity, status.waiting_for_input)
+            enriched[-1] = cache.reuse(key, lambda: replace(
+                session,
+                topic=status.topic or session.topic,
+                last_activity=datetime.fromtimestamp(status.last_activity),
+                waiting_for_input=status.waiting_for_input,
+            ))
+            break
+    return enriched
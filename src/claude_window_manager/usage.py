@@ -0,0 +1,200 @@
+"""Historical token and session usage from Claude Code transcripts.
+
+`cwm stats usage` scans every transcript under ~/.claude/projects with a
+process pool, streaming each file line by line. Per-file totals are cached
+by (path, size, mtime), so a re-run only scans files that changed.
+"""
+
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .paths import CLAUDE_PROJECTS_DIR, STATE_DIR
+
+CACHE_PATH = STATE_DIR / "usage-cache.json"
+CACHE_VERSION = 1
+COUNTERS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+@dataclass
+class FileUsage:
+    """Usage recorded in one transcript, per day (YYYY-MM-DD, UTC)."""
+
+    project: Optional[str] = None
+    session_id: Optional[str] = None
+    days: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+def scan_file(path: str) -> FileUsage:
+    """
+    Total one transcript's token usage per day.
+
+    Streams the file and only decodes lines that carry usage (or, until
+    it's known, the working directory). Claude Code writes one line per
+    content block with the same message id and usage, so each message is
+    counted once.
+    """
+    usage = FileUsage(session_id=Path(path).stem)
+    seen: set[str] = set()
+    with open(path, "rb") as f:
+        for line in f:
+            if b'"usage"' not in line and (usage.project is not None or b'"cwd"' not in line):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            if usage.project is None and entry.get("cwd"):
+                usage.project = os.path.basename(entry["cwd"].rstrip("/")) or entry["cwd"]
+            message = entry.get("message")
+            if entry.get("type") != "assistant" or not isinstance(message, dict):
+                continue
+            tokens = message.get("usage")
+            if not isinstance(tokens, dict):
+                continue
+            message_id = message.get("id") or entry.get("uuid")
+            if message_id in seen:
+                continue
+            seen.add(message_id)
+            day = (entry.get("timestamp") or "unknown")[:10]
+            totals = usage.days.setdefault(day, dict.fromkeys((*COUNTERS, "messages"), 0))
+            for counter in COUNTERS:
+                totals[counter] += tokens.get(counter) or 0
+            totals["messages"] += 1
+    return usage
+
+
+def _scan_readable(path: str) -> Optional[FileUsage]:
+    """`scan_file`, or None if the file can't be read (e.g. it was deleted meanwhile)."""
+    try:
+        return scan_file(path)
+    except OSError:
+        return None
+
+
+def _load_cache(path: Optional[Path]) -> dict:
+    if path is None:
+        return {}
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return data.get("files", {}) if data.get("version") == CACHE_VERSION else {}
+
+
+def _save_cache(path: Optional[Path], files: dict) -> None:
+    if path is None:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "files": files}))
+    os.replace(tmp, path)
+
+
+def collect_usage(
+    root: Path = CLAUDE_PROJECTS_DIR,
+    jobs: Optional[int] = None,
+    cache_path: Optional[Path] = CACHE_PATH,
+) -> tuple[list[FileUsage], int]:
+    """
+    Usage for every transcript under `root`, scanning changed files with
+    `jobs` processes (default: one per CPU). Returns the per-file usage and
+    how many files had to be scanned. Files that can't be read are left out.
+    """
+    cache = _load_cache(cache_path)
+    entries = {}
+    stale = []
+    for path in map(str, Path(root).glob("*/*.jsonl")):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        cached = cache.get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            entries[path] = cached
+        else:
+            entries[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            stale.append(path)
+
+    # Biggest files first, so one large file doesn't finish last on its own
+    stale.sort(key=lambda p: entries[p]["size"], reverse=True)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(stale))) as pool:
+            results = list(pool.map(_scan_readable, stale))
+    else:
+        results = [_scan_readable(path) for path in stale]
+    for path, usage in zip(stale, results):
+        if usage is None:
+            del entries[path]  # Skipped, and scanned again next time
+        else:
+            entries[path]["usage"] = asdict(usage)
+
+    if stale or len(entries) != len(cache):
+        _save_cache(cache_path, entries)
+    return [FileUsage(**entry["usage"]) for entry in entries.values()], len(stale)
+
+
+def summarize(
+    usages: Iterable[FileUsage],
+    daily: bool = False,
+    since: Optional[str] = None,
+) -> list[dict]:
+    """
+    Rows of totals per project (and per day if `daily`), busiest first.
+    `since` (YYYY-MM-DD) drops earlier days.
+    """
+    rows: dict[tuple, dict] = {}
+    sessions: dict[tuple, set] = defaultdict(set)
+    for usage in usages:
+        project = usage.project or "unknown"
+        for day, totals in usage.days.items():
+            if since and day < since:
+                continue
+            key = (project, day) if daily else (project,)
+            row = rows.setdefault(key, {
+                "project": project,
+                **({"day": day} if daily else {}),
+                **dict.fromkeys((*COUNTERS, "messages"), 0),
+            })
+            for counter, value in totals.items():
+                row[counter] = row.get(counter, 0) + value
+            sessions[key].add(usage.session_id)
+    for key, row in rows.items():
+        row["sessions"] = len(sessions[key])
+        row["total_tokens"] = sum(row[c] for c in COUNTERS)
+    if daily:
+        return sorted(rows.values(), key=lambda r: (r["day"], -r["total_tokens"]))
+    return sorted(rows.values(), key=lambda r: -r["total_tokens"])
+
+
+def format_tokens(count: int) -> str:
+    """Compact token count: 950, 12.3K, 4.56M."""
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.2f}M"
+    if count >= 1_000:
+        return f"{count / 1_000:.1f}K"
+    return str(count)
+
+
+def print_usage_table(rows: list[dict]) -> None:
+    daily = bool(rows) and "day" in rows[0]
+    day_header = f"{'day':<11}" if daily else ""
+    print(
+        f"  {day_header}{'project':<28} {'sessions':>8} {'messages':>9} "
+        f"{'input':>9} {'output':>9} {'cache wr':>9} {'cache rd':>9} {'total':>9}"
+    )
+    for r in rows:
+        day = f"{r['day']:<11}" if daily else ""
+        print(
+            f"  {day}{r['project'][:28]:<28} {r['sessions']:>8} {r['messages']:>9} "
+            f"{format_tokens(r['input_tokens']):>9} {format_tokens(r['output_tokens']):>9} "
+            f"{format_tokens(r['cache_creation_input_tokens']):>9} "
+            f"{format_tokens(r['cache_read_input_tokens']):>9} {format_tokens(r['total_tokens']):>9}"
+        )
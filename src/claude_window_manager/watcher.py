@@ -0,0 +1,368 @@
+"""Filesystem watching of Claude Code's session transcripts.
+
+Claude Code writes a transcript per session under ~/.claude/projects/, so
+sessions starting, ending or being renamed show up as file activity.
+`Watcher` reports changed transcript paths, debounced and coalesced, using
+FSEvents on macOS (with PyObjC), inotify on Linux, or periodic stat
+scans anywhere else. Each report says whether files were created, deleted
+or moved ("structural"), or only appended to, which every active session
+does every second or two:
+
+    watcher = Watcher(on_change=lambda paths, structural: ...)
+    watcher.start()
+"""
+
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .paths import CLAUDE_PROJECTS_DIR
+
+DEBOUNCE = 0.5  # Quiet time before reporting a burst of changes
+MAX_DELAY = 2.0  # Report at least this often while changes keep coming
+POLL_INTERVAL = 2.0  # Stat-scan interval for the polling backend
+
+
+def is_relevant(path: str) -> bool:
+    """
+    Transcripts and directories matter; editor and temp files don't.
+    Paths that no longer exist count, since their type can't be checked.
+    """
+    name = os.path.basename(path)
+    if name.startswith("."):
+        return False
+    return name.endswith(".jsonl") or os.path.isdir(path) or not os.path.exists(path)
+
+
+class Debouncer:
+    """
+    Collects changed paths and calls `callback(paths, structural)` once
+    things settle: after `debounce` seconds without a change, or
+    `max_delay` seconds after the first one, whichever comes first.
+    `structural` is true if any of the changes was.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[set[str], bool], None],
+        debounce: float = DEBOUNCE,
+        max_delay: float = MAX_DELAY,
+    ):
+        self.callback = callback
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.running = False
+        self._pending: set[str] = set()
+        self._structural = False
+        self._first = 0.0
+        self._last = 0.0
+        self._cond = threading.Condition()
+
+    def start(self) -> None:
+        self.running = True
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+
+    def add(self, paths: Iterable[str], structural: bool = False) -> None:
+        paths = {p for p in paths if is_relevant(p)}
+        if not paths:
+            return
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first = now
+            self._pending |= paths
+            self._structural |= structural
+            self._last = now
+            self._cond.notify()
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                while self.running and not self._pending:
+                    self._cond.wait()
+                if not self.running:
+                    return
+                due = min(self._last + self.debounce, self._first + self.max_delay)
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                paths, self._pending = self._pending, set()
+                structural, self._structural = self._structural, False
+            try:
+                self.callback(paths, structural)
+            except Exception as e:
+                print(f"Error handling file changes: {e}")
+
+
+class PollingBackend:
+    """Finds changes by comparing stat results between periodic scans."""
+
+    def __init__(self, root: Path, interval: float = POLL_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._stop = threading.Event()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        """{path: (mtime_ns, size)} for everything relevant under the root."""
+        entries = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            for name in dirnames + filenames:
+                path = os.path.join(dirpath, name)
+                if not is_relevant(path):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries[path] = (st.st_mtime_ns, st.st_size)
+        return entries
+
+    def start(self, emit: Callable[[Iterable[str], bool], None]) -> None:
+        self._stop.clear()
+        threading.Thread(target=self._run, args=(emit,), daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, emit) -> None:
+        previous = self.scan()
+        while not self._stop.wait(self.interval):
+            current = self.scan()
+            structural = previous.keys() ^ current.keys()
+            if structural:
+                emit(structural, True)
+            modified = {p for p in previous.keys() & current.keys() if previous[p] != current[p]}
+            if modified:
+                emit(modified, False)
+            previous = current
+
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_INOTIFY_STRUCTURAL = _INOTIFY_MASK & ~IN_MODIFY
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyBackend:
+    """Linux inotify through ctypes, with a watch on every directory under the root."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = -1
+        self._wds: dict[int, str] = {}
+        self._wake_r, self._wake_w = -1, -1
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith("linux") and hasattr(ctypes.CDLL(None), "inotify_init1")
+
+    def start(self, emit: Callable[[Iterable[str], bool], None]) -> None:
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wake_r, self._wake_w = os.pipe()
+        for dirpath, _, _ in os.walk(self.root):
+            self._add_watch(dirpath)
+        threading.Thread(target=self._run, args=(emit,), daemon=True).start()
+
+    def stop(self) -> None:
+        if self._wake_w >= 0:
+            os.write(self._wake_w, b"x")
+
+    def _add_watch(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _INOTIFY_MASK)
+        if wd >= 0:
+            self._wds[wd] = path
+
+    def _run(self, emit) -> None:
+        try:
+            while True:
+                ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    return
+                try:
+                    data = os.read(self._fd, 65536)
+                except BlockingIOError:
+                    continue
+                modified, structural = self._parse(data)
+                if structural:
+                    emit(structural, True)
+                if modified:
+                    emit(modified, False)
+        finally:
+            for fd in (self._fd, self._wake_r, self._wake_w):
+                os.close(fd)
+            self._fd = self._wake_r = self._wake_w = -1
+            self._wds.clear()
+
+    def _parse(self, data: bytes) -> tuple[set[str], set[str]]:
+        """Paths that were (only) modified, and paths created, deleted or moved."""
+        modified, paths = set(), set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; report the root so callers rescan
+                paths.add(str(self.root))
+                continue
+            directory = self._wds.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if not mask & _INOTIFY_STRUCTURAL:
+                modified.add(path)
+                continue
+            paths.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Watch the new directory, and report what was created in
+                # it before the watch was in place
+                for dirpath, dirnames, filenames in os.walk(path):
+                    self._add_watch(dirpath)
+                    paths.update(os.path.join(dirpath, n) for n in dirnames + filenames)
+            if mask & IN_DELETE_SELF:
+                self._wds.pop(wd, None)
+        return modified - paths, paths
+
+
+class FSEventsBackend:
+    """macOS FSEvents through PyObjC, on its own run loop thread."""
+
+    def __init__(self, root: Path, latency: float = 0.1):
+        self.root = root
+        self.latency = latency
+        self._stream = None
+        self._loop = None
+
+    @staticmethod
+    def available() -> bool:
+        if sys.platform != "darwin":
+            return False
+        try:
+            import FSEvents  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def start(self, emit: Callable[[Iterable[str], bool], None]) -> None:
+        import FSEvents
+
+        structural_flags = (
+            FSEvents.kFSEventStreamEventFlagItemCreated
+            | FSEvents.kFSEventStreamEventFlagItemRemoved
+            | FSEvents.kFSEventStreamEventFlagItemRenamed
+            | FSEvents.kFSEventStreamEventFlagMustScanSubDirs
+            | FSEvents.kFSEventStreamEventFlagRootChanged
+        )
+
+        def callback(stream, info, count, paths, flags, ids):
+            structural = [p for p, f in zip(paths, flags) if f & structural_flags]
+            if structural:
+                emit(structural, True)
+            modified = [p for p, f in zip(paths, flags) if not f & structural_flags]
+            if modified:
+                emit(modified, False)
+
+        self._stream = FSEvents.FSEventStreamCreate(
+            None,
+            callback,
+            None,
+            [str(self.root)],
+            FSEvents.kFSEventStreamEventIdSinceNow,
+            self.latency,
+            FSEvents.kFSEventStreamCreateFlagFileEvents
+            | FSEvents.kFSEventStreamCreateFlagNoDefer
+            | FSEvents.kFSEventStreamCreateFlagUseCFTypes,
+        )
+        started = threading.Event()
+        threading.Thread(target=self._run, args=(started,), daemon=True).start()
+        started.wait()
+
+    def _run(self, started: threading.Event) -> None:
+        import FSEvents
+        from CoreFoundation import CFRunLoopGetCurrent, CFRunLoopRun, kCFRunLoopDefaultMode
+
+        self._loop = CFRunLoopGetCurrent()
+        FSEvents.FSEventStreamScheduleWithRunLoop(self._stream, self._loop, kCFRunLoopDefaultMode)
+        FSEvents.FSEventStreamStart(self._stream)
+        started.set()
+        CFRunLoopRun()
+
+    def stop(self) -> None:
+        import FSEvents
+        from CoreFoundation import CFRunLoopStop
+
+        if self._stream is None:
+            return
+        FSEvents.FSEventStreamStop(self._stream)
+        FSEvents.FSEventStreamInvalidate(self._stream)
+        FSEvents.FSEventStreamRelease(self._stream)
+        self._stream = None
+        if self._loop is not None:
+            CFRunLoopStop(self._loop)
+            self._loop = None
+
+
+def select_backend(root: Path):
+    """The best available backend for this platform and root."""
+    if root.is_dir():
+        if FSEventsBackend.available():
+            return FSEventsBackend(root)
+        if InotifyBackend.available():
+            return InotifyBackend(root)
+    # Also covers a root that doesn't exist yet: scans notice it appearing
+    return PollingBackend(root)
+
+
+class Watcher:
+    """Calls `on_change(paths, structural)` when transcripts under `root` change, debounced."""
+
+    def __init__(
+        self,
+        on_change: Callable[[set[str], bool], None],
+        root: Path = CLAUDE_PROJECTS_DIR,
+        debounce: float = DEBOUNCE,
+        max_delay: float = MAX_DELAY,
+        backend=None,
+    ):
+        self.root = Path(root)
+        self.backend = backend or select_backend(self.root)
+        self.debouncer = Debouncer(on_change, debounce, max_delay)
+
+    def start(self) -> None:
+        self.debouncer.start()
+        try:
+            self.backend.start(self.debouncer.add)
+        except OSError:
+            # e.g. out of inotify instances: scanning still works
+            self.backend = PollingBackend(self.root)
+            self.backend.start(self.debouncer.add)
+
+    def stop(self) -> None:
+        self.backend.stop()
+        self.debouncer.stop()
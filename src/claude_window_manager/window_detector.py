@@ -1,53 +1,100 @@
 """Detect Terminal windows running Claude Code using AppleScript."""
 
 import re
-import subprocess
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
-from .session import ClaudeSession
+from .applescript import ScriptTemplate, parse_columns, run_applescript, run_template
+from .detection import detect_sync, get_detector, run_applescript_async, run_command
+from .metrics import timed
+from .session import ClaudeSession, RecordCache
+
+# Fetch each property for all windows in a single Apple Event and return
+# them as delimiter-separated columns (see applescript.parse_columns)
+TERMINAL_WINDOWS = '''
+tell application "Terminal"
+    set windowIds to id of every window
+    set windowNames to name of every window
+    set windowTtys to tty of selected tab of every window
+end tell
+set AppleScript's text item delimiters to character id 31
+set fieldColumns to {windowIds as text, windowNames as text, windowTtys as text}
+set AppleScript's text item delimiters to character id 30
+return fieldColumns as text
+'''
+
+SWITCH_WINDOW = ScriptTemplate("switch_window", '''
+    tell application "Terminal"
+        set targetWindow to window id ((item 1 of argv) as integer)
+        set index of targetWindow to 1
+        activate
+    end tell
+''')
 
 
-def run_applescript(script: str) -> str:
-    """Execute AppleScript and return output."""
-    result = subprocess.run(
-        ["osascript", "-e", script],
-        capture_output=True,
-        text=True,
-    )
-    return result.stdout.strip()
+def normalize_tty(tty: str) -> Optional[str]:
+    """Convert a device path like "/dev/ttys003" to ps's "ttys003" form."""
+    if not tty or tty in ("?", "??", "missing value"):
+        return None
+    return tty.removeprefix("/dev/")
 
 
-def get_terminal_windows() -> list[tuple[int, str]]:
-    """Get all Terminal.app windows with their IDs and names."""
-    script = '''
-    tell application "Terminal"
-        set windowList to {}
-        repeat with w in windows
-            set end of windowList to (id of w as text) & "|||" & (name of w as text)
-        end repeat
-        return windowList
-    end tell
-    '''
-    output = run_applescript(script)
-    if not output:
-        return []
-
+def parse_terminal_windows(output: str) -> list[tuple[int, str, Optional[str]]]:
+    """Parse TERMINAL_WINDOWS output into (window_id, name, tty) tuples."""
     windows = []
-    # Output format: "id|||name, id|||name, ..."
-    for item in output.split(", "):
-        if "|||" in item:
-            parts = item.split("|||", 1)
-            try:
-                window_id = int(parts[0])
-                window_name = parts[1]
-                windows.append((window_id, window_name))
-            except (ValueError, IndexError):
-                continue
-
+    for window_id, window_name, tty in parse_columns(output, 3):
+        try:
+            windows.append((int(window_id), window_name, normalize_tty(tty)))
+        except ValueError:
+            continue
     return windows
 
 
+async def get_terminal_windows_async() -> list[tuple[int, str, Optional[str]]]:
+    """Get all Terminal.app windows with their IDs, names and selected tab's TTY."""
+    return parse_terminal_windows(await run_applescript_async(TERMINAL_WINDOWS))
+
+
+def get_terminal_windows() -> list[tuple[int, str, Optional[str]]]:
+    """Get all Terminal.app windows with their IDs, names and selected tab's TTY."""
+    return detect_sync(["terminal"])["terminal"]
+
+
+# Every title format in one pattern; the first alternative that matches
+# anywhere wins, as when they were separate patterns tried in turn:
+#   "project — ✳ topic — language ◂ claude"   (full)
+#   "project — ✳ topic"                       (topic only, ignoring the rest)
+#   "project — anything"                      (fallback: up to the first separator)
+TITLE_PATTERN = re.compile(
+    r"^(?:"
+    r"(?P<project>.+?)\s*[—-]\s*✳\s*(?P<full_topic>.+?)\s*[—-]\s*(?P<language>\w+)\s*◂\s*claude"
+    r"|(?P<topic_project>.+?)\s*[—-]\s*✳\s*(?P<topic>.+?)(?:\s*[—-]|$)"
+    r"|(?P<head>(?s:.*?))(?:\s*[—-]|$)"
+    r")",
+    re.IGNORECASE,
+)
+# Titles rarely change between ticks, so parses are memoized
+TITLE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def _parse_title(name: str) -> tuple[bool, str, Optional[str], Optional[str]]:
+    if "claude" not in name.lower():
+        return False, name, None, None
+    match = TITLE_PATTERN.match(name)  # The fallback always matches
+    if match["language"] is not None:
+        return True, match["project"].strip(), match["full_topic"].strip(), match["language"].strip()
+    if match["topic"] is not None:
+        return True, match["topic_project"].strip(), match["topic"].strip(), None
+    return True, match["head"].strip(), None, None
+
+
+def is_claude_title(name: str) -> bool:
+    """Whether a window or pane title belongs to a Claude session."""
+    return _parse_title(name)[0]
+
+
 def parse_window_name(name: str) -> tuple[str, Optional[str], Optional[str]]:
     """
     Parse Terminal window name to extract project, topic, and language.
@@ -55,118 +102,134 @@ def parse_window_name(name: str) -> tuple[str, Optional[str], Optional[str]]:
     Expected format: "project — ✳ topic — language ◂ claude"
     Example: "ai-app-builder — ✳ Evaluations Package — Python ◂ claude"
     """
-    project = name
-    topic = None
-    language = None
+    return _parse_title(name)[1:]
 
-    # Check if this is a Claude window
-    if "claude" not in name.lower():
-        return project, topic, language
-
-    # Try to parse the structured format
-    # Pattern: project — ✳ topic — language ◂ claude
-    match = re.match(
-        r'^(.+?)\s*[—-]\s*✳\s*(.+?)\s*[—-]\s*(\w+)\s*◂\s*claude',
-        name,
-        re.IGNORECASE
-    )
-    if match:
-        project = match.group(1).strip()
-        topic = match.group(2).strip()
-        language = match.group(3).strip()
-        return project, topic, language
-
-    # Try simpler pattern: project — ✳ topic
-    match = re.match(r'^(.+?)\s*[—-]\s*✳\s*(.+?)(?:\s*[—-]|$)', name)
-    if match:
-        project = match.group(1).strip()
-        topic = match.group(2).strip()
-        return project, topic, language
-
-    # Fall back to just using the first part before any separator
-    parts = re.split(r'\s*[—-]\s*', name)
-    if parts:
-        project = parts[0].strip()
-
-    return project, topic, language
 
+# Parsing lstart is the expensive part of the process scan, and a pid's
+# start time never changes, so parsed times are cached per pid. The raw
+# lstart text is kept alongside to detect pid reuse.
+_start_times: dict[int, tuple[str, datetime]] = {}
 
-def get_claude_processes() -> dict[str, tuple[int, datetime]]:
+
+def parse_process_table(output: str) -> dict[str, tuple[int, datetime]]:
     """
-    Get running Claude processes with their TTY and start time.
-    Returns: {tty: (pid, start_time)}
+    Parse `ps -eo pid,tty,lstart,comm` output.
+    Returns: {tty: (pid, start_time)} for Claude processes with a TTY
     """
-    result = subprocess.run(
-        ["ps", "-eo", "pid,tty,lstart,comm"],
-        capture_output=True,
-        text=True,
-    )
-
     processes = {}
-    for line in result.stdout.strip().split("\n")[1:]:  # Skip header
-        if "claude" in line.lower():
-            parts = line.split()
-            if len(parts) >= 8:
-                try:
-                    pid = int(parts[0])
-                    tty = parts[1]
-                    # lstart format: "Mon Jan  4 14:30:00 2025"
-                    time_str = " ".join(parts[2:7])
-                    start_time = datetime.strptime(time_str, "%a %b %d %H:%M:%S %Y")
-                    processes[tty] = (pid, start_time)
-                except (ValueError, IndexError):
-                    continue
+    seen = set()
+    for line in output.strip().split("\n")[1:]:  # Skip header
+        if "claude" not in line.lower():
+            continue
+        parts = line.split(None, 7)
+        if len(parts) < 8:
+            continue
+        try:
+            pid = int(parts[0])
+        except ValueError:
+            continue
+        tty = normalize_tty(parts[1])
+        if tty is None:
+            continue
+
+        # lstart format: "Mon Jan  4 14:30:00 2025"
+        time_str = " ".join(parts[2:7])
+        cached = _start_times.get(pid)
+        if cached is not None and cached[0] == time_str:
+            start_time = cached[1]
+        else:
+            try:
+                start_time = datetime.strptime(time_str, "%a %b %d %H:%M:%S %Y")
+            except ValueError:
+                continue
+            _start_times[pid] = (time_str, start_time)
+        seen.add(pid)
+
+        # Keep the oldest Claude process on each TTY (the session itself,
+        # not anything it spawned)
+        if tty in processes and processes[tty][1] <= start_time:
+            continue
+        processes[tty] = (pid, start_time)
+
+    for pid in _start_times.keys() - seen:
+        _start_times.pop(pid, None)
 
     return processes
 
 
-def get_claude_sessions() -> list[ClaudeSession]:
-    """Get all Claude Code sessions from Terminal windows."""
-    windows = get_terminal_windows()
-    processes = get_claude_processes()
+@timed("get_claude_processes")
+async def get_claude_processes_async() -> dict[str, tuple[int, datetime]]:
+    """
+    Get running Claude processes with their TTY and start time.
+    Returns: {tty: (pid, start_time)}
+    """
+    return parse_process_table(await run_command(["ps", "-eo", "pid,tty,lstart,comm"]))
+
+
+def get_claude_processes() -> dict[str, tuple[int, datetime]]:
+    """
+    Get running Claude processes with their TTY and start time.
+    Returns: {tty: (pid, start_time)}
+    """
+    return detect_sync(["processes"])["processes"]
+
 
+@timed("build_sessions")
+def build_claude_sessions(
+    windows: list[tuple[int, str, Optional[str]]],
+    processes: dict[str, tuple[int, datetime]],
+    cache: Optional[RecordCache] = None,
+) -> list[ClaudeSession]:
+    """
+    Build sessions from Terminal windows joined with the process table.
+    With a `cache` (ticked by the caller), windows whose title and process
+    haven't changed get last tick's record.
+    """
+    cache = cache or RecordCache()
     sessions = []
-    for window_id, window_name in windows:
+    for window_id, window_name, tty in windows:
         # Check if this window is running Claude
-        if "claude" not in window_name.lower():
+        if not is_claude_title(window_name):
             continue
 
-        project, topic, language = parse_window_name(window_name)
-
-        # Try to match with a process (best effort)
-        pid = None
-        start_time = None
-        tty = None
+        # Join with the process table on the window's TTY
+        pid, start_time = processes.get(tty, (None, None))
 
-        # We can't directly map window to TTY, so we just use process info as available
-        # For now, we'll show processes but can't guarantee mapping
-
-        session = ClaudeSession(
-            window_id=window_id,
-            window_name=window_name,
-            project=project,
-            topic=topic,
-            language=language,
+        key = ("terminal", window_id, window_name, tty, pid, start_time)
+        sessions.append(cache.reuse(key, lambda: ClaudeSession(
+            window_id,
+            window_name,
+            *parse_window_name(window_name),
             pid=pid,
             tty=tty,
             start_time=start_time,
-        )
-        sessions.append(session)
+        )))
 
     return sessions
 
 
-def switch_to_window(window_id: int) -> bool:
-    """Bring a Terminal window to the front."""
-    script = f'''
-    tell application "Terminal"
-        set targetWindow to window id {window_id}
-        set index of targetWindow to 1
-        activate
-    end tell
-    '''
+async def get_claude_sessions_async() -> list[ClaudeSession]:
+    """Get all Claude Code sessions from Terminal windows."""
+    result = await get_detector().detect(["terminal", "processes"])
+    return build_claude_sessions(result["terminal"], result["processes"])
+
+
+def get_claude_sessions() -> list[ClaudeSession]:
+    """Get all Claude Code sessions from Terminal windows."""
+    result = detect_sync(["terminal", "processes"])
+    return build_claude_sessions(result["terminal"], result["processes"])
+
+
+def switch_to_window(window_id: int, pid: Optional[int] = None) -> bool:
+    """
+    Bring a Terminal window to the front. Pass the session's Claude `pid`
+    to restore it first if the idle governor deprioritized it.
+    """
+    if pid:
+        from .governor import resume
+        resume(pid)
     try:
-        run_applescript(script)
+        run_template(SWITCH_WINDOW, window_id)
         return True
     except Exception:
         return False
@@ -175,4 +238,4 @@ def switch_to_window(window_id: int) -> bool:
 def get_session_count() -> int:
     """Quick count of Claude sessions without full parsing."""
     windows = get_terminal_windows()
-    return sum(1 for _, name in windows if "claude" in name.lower())
+    return sum(1 for _, name, _ in windows if is_claude_title(name))
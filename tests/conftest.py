@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Keep tests away from the real state dir, socket and transcripts; paths
+# are read once, when claude_window_manager.paths is first imported
+_root = tempfile.mkdtemp(prefix="cwm-tests-")
+os.environ["CWM_STATE_DIR"] = os.path.join(_root, "state")
+os.environ["CWM_SOCKET"] = os.path.join(_root, "state", "index.sock")
+os.environ["CLAUDE_CONFIG_DIR"] = os.path.join(_root, "claude")
@@ -0,0 +1,104 @@
+import os
+import threading
+
+import pytest
+
+# No icon is shown; this also works without a display
+os.environ.setdefault("PYSTRAY_BACKEND", "dummy")
+pytest.importorskip("pystray")
+pytest.importorskip("PIL")
+
+from claude_window_manager import app_pystray  # noqa: E402
+from claude_window_manager.session import ClaudeSession  # noqa: E402
+
+
+class CountingIndex:
+    """An index that counts detections and blocks each until released."""
+
+    def __init__(self):
+        self.detections = 0
+        self.fresh_detections = 0
+        self.resource_queries = 0
+        self.usage = {}
+        self.release = threading.Event()
+        self.release.set()
+        self.sessions = [
+            ClaudeSession(1, "web — ✳ Fix tests — claude", "web", "Fix tests", None, 4242, "ttys001", None)
+        ]
+
+    def terminal_sessions(self, fresh: bool = False):
+        self.detections += 1
+        self.fresh_detections += fresh
+        self.release.wait(5)
+        return self.sessions
+
+    def resources(self):
+        self.resource_queries += 1
+        return self.usage
+
+class FakeIcon:
+    def __init__(self):
+        self.icon = None
+        self.menu_updates = 0
+
+    def update_menu(self):
+        self.menu_updates += 1
+
+
+@pytest.fixture
+def tray(monkeypatch):
+    index = CountingIndex()
+    monkeypatch.setattr(app_pystray, "connect_or_start", lambda: index)
+    tray = app_pystray.ClaudeWindowManagerTray()
+    tray.icon = FakeIcon()
+    return tray
+
+
+def test_one_detection_per_tick(tray):
+    tray._poll()
+    assert tray.index.detections == 1
+    assert tray.index.resource_queries == 1
+    tray._poll()
+    assert tray.index.detections == 2
+
+
+def test_ticks_during_a_refresh_join_it(tray):
+    tray.index.release.clear()
+    first = tray.refresher.request()
+    threads = [threading.Thread(target=tray._poll) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    tray.index.release.set()
+    for thread in threads:
+        thread.join(5)
+    first.result(5)
+    assert tray.index.detections == 1
+
+
+def test_refresh_click_pokes_the_poller_for_a_fresh_tick(tray, monkeypatch):
+    pokes = []
+    monkeypatch.setattr(tray.poller, "poke", lambda: pokes.append(True))
+    tray.on_refresh()
+    assert pokes == [True]
+    assert tray.index.detections == 0
+    tray._poll()
+    tray._poll()
+    assert (tray.index.detections, tray.index.fresh_detections) == (2, 1)
+
+
+def test_unchanged_ticks_push_nothing(tray):
+    tray._poll()
+    icon = tray.icon.icon
+    updates = tray.icon.menu_updates
+    tray._poll()
+    assert tray.icon.icon is icon
+    assert tray.icon.menu_updates == updates
+
+
+def test_new_samples_update_the_menu(tray):
+    tray._poll()
+    updates = tray.icon.menu_updates
+    tray.index.usage = {"4242": {"cpu": [12.5], "rss": [300 << 20], "processes": 3}}
+    tray._poll()
+    assert tray.icon.menu_updates == updates + 1
+    assert "300M" in tray._labels[1]
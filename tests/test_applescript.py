@@ -0,0 +1,153 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from claude_window_manager import applescript
+from claude_window_manager.applescript import (
+    FIELD_SEP,
+    RECORD_SEP,
+    AppleScriptError,
+    AppleScriptTimeout,
+    ScriptRunner,
+    ScriptTemplate,
+    parse_columns,
+    parse_records,
+    quote,
+)
+from claude_window_manager.iterm2_integration import parse_iterm_sessions
+from claude_window_manager.window_detector import parse_terminal_windows
+
+F, R = FIELD_SEP, RECORD_SEP
+
+# Recorded from osascript with TERMINAL_WINDOWS: three windows, one titled
+# with commas, one whose selected tab has no tty yet
+TERMINAL_OUTPUT = (
+    f"4711{F}4712{F}4790"
+    f"{R}billing-service — ✳ Retries, backoff, and jitter — claude{F}~ — -zsh{F}notes — ✳ Plan — claude"
+    f"{R}/dev/ttys003{F}/dev/ttys004{F}missing value"
+)
+
+# Recorded from osascript with ITERM_SESSIONS: two Claude tabs in window 1
+# and one in window 2, one from an old version without a project
+ITERM_OUTPUT = (
+    f"1{F}1{F}5F3A0C2E-1D4B-4C5A-9A57-2B9E0D7C1A10{F}billing-service — Retries, backoff{F}billing-service{F}Retries, backoff{F}/dev/ttys007"
+    f"{R}1{F}3{F}0B61E7A4-96C1-4E51-8C1B-7C2F6A3E9D22{F}notes{F}missing value{F}missing value{F}/dev/ttys008"
+    f"{R}2{F}1{F}C2D9B5F0-7A3E-4B1D-9E6C-5A8F3D2B1E33{F}web — New Session{F}web{F}missing value{F}/dev/ttys011"
+)
+
+
+def test_parse_terminal_windows_keeps_commas_in_titles():
+    assert parse_terminal_windows(TERMINAL_OUTPUT) == [
+        (4711, "billing-service — ✳ Retries, backoff, and jitter — claude", "ttys003"),
+        (4712, "~ — -zsh", "ttys004"),
+        (4790, "notes — ✳ Plan — claude", None),
+    ]
+
+
+def test_parse_terminal_windows_without_windows():
+    assert parse_terminal_windows("") == []
+    # Terminal running with no windows returns three empty columns
+    assert parse_terminal_windows(f"{R}{R}") == []
+
+
+def test_parse_columns_rejects_columns_of_different_lengths():
+    # A window closed between `id of every window` and `name of every window`
+    assert parse_columns(f"1{F}2{R}only one{R}ttys001{F}ttys002", 3) == []
+
+
+def test_parse_iterm_sessions():
+    assert parse_iterm_sessions(ITERM_OUTPUT) == [
+        {
+            "window": 1,
+            "tab": 1,
+            "id": "5F3A0C2E-1D4B-4C5A-9A57-2B9E0D7C1A10",
+            "name": "billing-service — Retries, backoff",
+            "project": "billing-service",
+            "topic": "Retries, backoff",
+            "tty": "ttys007",
+        },
+        {
+            "window": 2,
+            "tab": 1,
+            "id": "C2D9B5F0-7A3E-4B1D-9E6C-5A8F3D2B1E33",
+            "name": "web — New Session",
+            "project": "web",
+            "topic": "",
+            "tty": "ttys011",
+        },
+    ]
+
+
+def test_parse_iterm_sessions_without_sessions():
+    assert parse_iterm_sessions("") == []
+
+
+def test_parse_records_pads_short_and_skips_long_records():
+    output = f"a{F}b{R}a{F}b{F}c{F}d{R}a{F}b{F}c"
+    assert parse_records(output, 3) == [["a", "b", ""], ["a", "b", "c"]]
+
+
+def test_quote_escapes_quotes_and_backslashes():
+    assert quote('say "hi" \\ bye') == '"say \\"hi\\" \\\\ bye"'
+
+
+FAKE_SERVER = [sys.executable, "-m", "claude_window_manager.osa_server", "--fake"]
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", str(Path(__file__).resolve().parents[1] / "src"))
+    runner = ScriptRunner(FAKE_SERVER, timeout=5.0)
+    yield runner
+    runner.close()
+
+
+def test_runner_keeps_trailing_separators(runner):
+    assert runner.run(f"a{F}b{R}") == f"a{F}b{R}"
+
+
+def test_runner_calls_templates_with_arguments(runner):
+    template = ScriptTemplate("echo", "return item 1 of argv")
+    assert runner.run_template(template, "x", 2) == "x|2"
+    assert runner.run_template(template, 'quo"te') == 'quo"te'
+
+
+def test_script_errors_leave_the_interpreter_running(runner):
+    with pytest.raises(AppleScriptError, match="fake script error"):
+        runner.run("error")
+    assert runner.run("hello") == "hello"
+    assert runner.restarts == 0
+
+
+def test_timeout_kills_and_restarts_the_interpreter(runner):
+    with pytest.raises(AppleScriptTimeout):
+        runner.run("sleep 5", timeout=0.2)
+    assert runner.run("hello") == "hello"
+    assert runner.restarts == 1
+
+
+def test_crashed_interpreter_is_restarted(runner):
+    with pytest.raises(AppleScriptError, match="exited"):
+        runner.run("crash")
+    assert runner.run("hello") == "hello"
+    assert runner.restarts == 1
+
+
+def test_malformed_response_raises_and_restarts(monkeypatch):
+    # Answers the first request with garbage, as a broken interpreter might
+    runner = ScriptRunner([sys.executable, "-c", "import sys; sys.stdin.readline(); print('garbage', flush=True)"])
+    try:
+        with pytest.raises(AppleScriptError, match="malformed"):
+            runner.run("hello", timeout=5.0)
+        with pytest.raises(AppleScriptError):
+            runner.run("hello", timeout=5.0)
+        assert runner.restarts == 1
+    finally:
+        runner.close()
+
+
+def test_run_applescript_goes_through_the_active_runner(runner):
+    with applescript.use_runner(runner):
+        assert applescript.run_applescript("hello") == "hello"
+        assert applescript.run_applescript("error") == ""
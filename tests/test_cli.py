@@ -0,0 +1,41 @@
+import sys
+
+from claude_window_manager import cli, sampler, tmux_backend
+from claude_window_manager.indexer import SessionIndexer
+from claude_window_manager.paths import SOCKET_PATH
+
+
+class FakeSampler:
+    """The daemon's history, without reading the process table."""
+
+    trees: dict = {}
+
+    def sample(self, pids):
+        return {}
+
+    def report(self):
+        return {"4242": {"cpu": [3.0, 55.5], "rss": [100 << 20, 300 << 20], "processes": 4}}
+
+
+def test_top_shows_the_daemons_samples(monkeypatch, capsys):
+    monkeypatch.setattr(tmux_backend, "tmux_available", lambda: False)
+    session = {"window": 1, "tab": 1, "id": "s1", "tty": "/dev/ttys001", "pid": 4242,
+               "project": "web", "topic": "Fix tests"}
+    indexer = SessionIndexer(
+        collect=lambda: {"updated_at": 0.0, "terminal": [], "iterm2": [session], "tmux": [], "stale": []},
+        watch=False,
+        iterm2_api=False,
+    )
+    indexer.sampler = FakeSampler()
+    monkeypatch.setattr(sampler, "Sampler", None)  # Sampling locally would fail
+    indexer.start(SOCKET_PATH)
+    try:
+        monkeypatch.setattr(sys, "argv", ["cwm", "--backend", "iterm2", "top", "--once"])
+        cli.main()
+    finally:
+        indexer.stop()
+
+    out = capsys.readouterr().out
+    assert "55.5" in out
+    assert "300M" in out
+    assert "web — ✳ Fix tests" in out
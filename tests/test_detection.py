@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+import pytest
+
+from claude_window_manager.applescript import AppleScriptError, use_runner
+from claude_window_manager.detection import (
+    Detector,
+    Source,
+    SourceTimeout,
+    run_applescript_async,
+    run_command,
+    use_command_backend,
+)
+
+
+class FakeSource:
+    """Returns queued outcomes in order: values, exceptions, or "hang"."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if outcome == "hang":
+            await asyncio.sleep(3600)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def detect(detector: Detector, names=None):
+    return asyncio.run(detector.detect(names))
+
+
+def test_hung_source_returns_last_known_data_at_its_deadline():
+    hung = FakeSource(["window 1"], "hang")
+    fast = FakeSource({"ttys001": 1}, {"ttys001": 1, "ttys002": 2})
+    detector = Detector({"terminal": Source(hung), "processes": Source(fast, dict)}, timeout=0.1)
+    detect(detector)
+
+    started = time.monotonic()
+    result = detect(detector)
+
+    assert time.monotonic() - started < 1
+    assert result["terminal"] == ["window 1"]
+    assert result["processes"] == {"ttys001": 1, "ttys002": 2}
+    assert result.stale == {"terminal"}
+    assert "timed out" in result.errors["terminal"]
+
+
+def test_hung_source_without_earlier_data_returns_its_empty_value():
+    detector = Detector({"processes": Source(FakeSource("hang"), dict)}, timeout=0.05)
+    result = detect(detector)
+    assert result["processes"] == {}
+    assert result.stale == {"processes"}
+
+
+def test_failing_source_is_stale_and_others_are_not():
+    failing = FakeSource(["tab 1"], RuntimeError("iTerm2 got an error"))
+    ok = FakeSource(["window 1"], ["window 2"])
+    detector = Detector({"iterm2": Source(failing), "terminal": Source(ok)})
+    detect(detector)
+
+    result = detect(detector)
+
+    assert result["iterm2"] == ["tab 1"]
+    assert result["terminal"] == ["window 2"]
+    assert result.stale == {"iterm2"}
+    assert result.errors == {"iterm2": "iTerm2 got an error"}
+
+
+def test_stale_source_recovers_on_next_success():
+    source = FakeSource(["a"], ValueError(), ["b"])
+    detector = Detector({"terminal": Source(source)})
+    detect(detector)
+    assert detect(detector).stale == {"terminal"}
+
+    result = detect(detector)
+
+    assert result["terminal"] == ["b"]
+    assert result.stale == set()
+
+
+def test_detect_fetches_only_named_sources():
+    terminal, iterm2 = FakeSource(["w"]), FakeSource(["t"])
+    detector = Detector({"terminal": Source(terminal), "iterm2": Source(iterm2)})
+    result = detect(detector, ["terminal"])
+    assert result.values == {"terminal": ["w"]}
+    assert iterm2.calls == 0
+
+
+def test_run_command_kills_a_command_at_its_deadline():
+    started = time.monotonic()
+    with pytest.raises(SourceTimeout):
+        asyncio.run(run_command(["sleep", "30"], timeout=0.1))
+    assert time.monotonic() - started < 5
+
+
+class RecordingRunner:
+    def __init__(self, reply="", error=None):
+        self.reply, self.error, self.scripts = reply, error, []
+
+    def run(self, script, timeout=None):
+        self.scripts.append((script, timeout))
+        if self.error:
+            raise self.error
+        return self.reply
+
+
+def test_applescript_goes_through_the_active_runner():
+    commands = []
+
+    async def backend(argv, timeout):
+        commands.append(argv)
+        return "forked"
+
+    runner = RecordingRunner("warm")
+    with use_command_backend(backend), use_runner(runner):
+        assert asyncio.run(run_applescript_async("return 1", timeout=2)) == "warm"
+    assert runner.scripts == [("return 1", 2)]
+    assert commands == []
+
+    with use_command_backend(backend):
+        assert asyncio.run(run_applescript_async("return 1")) == "forked"
+    assert commands == [["osascript", "-e", "return 1"]]
+
+
+def test_runner_errors_mark_the_source_stale():
+    async def fetch():
+        return await run_applescript_async("return 1")
+
+    detector = Detector({"terminal": Source(fetch)}, timeout=1)
+    with use_runner(RecordingRunner(error=AppleScriptError("boom"))):
+        result = detect(detector)
+    assert "terminal" in result.stale
@@ -0,0 +1,100 @@
+import json
+
+from claude_window_manager.events import (
+    SUBSCRIBER_BACKLOG,
+    ChangeFeed,
+    diff_events,
+    format_event,
+    select_fields,
+    snapshot_views,
+)
+
+T = 1767225600.0
+
+
+def tmux(pane: int, topic: str = "Fix tests", waiting: bool = False, pid: int = 4242) -> dict:
+    return {
+        "window_id": pane, "window_name": f"api — ✳ {topic}", "project": "api", "topic": topic,
+        "language": None, "pid": pid, "tty": "/dev/ttys003", "start_time": None,
+        "last_activity": "2026-01-01T00:00:00", "waiting_for_input": waiting,
+    }
+
+
+def views(*sessions: dict) -> dict:
+    return snapshot_views({"tmux": list(sessions)})
+
+
+def lines(old: dict, new: dict, fields=None) -> list[str]:
+    return [format_event(select_fields(e, fields)) for e in diff_events(old, new, T)]
+
+
+SESSION = (
+    '{"backend":"tmux","project":"api","topic":"Fix tests","language":null,'
+    '"title":"api — ✳ Fix tests","pid":4242,"tty":"/dev/ttys003","waiting":false,'
+    '"last_activity":"2026-01-01T00:00:00","window":null,"tab":null}'
+)
+
+
+def test_added_line():
+    assert lines({}, views(tmux(3))) == [
+        '{"v":1,"event":"added","time":1767225600.0,"id":"tmux:%3","session":' + SESSION + "}"
+    ]
+
+
+def test_removed_line():
+    assert lines(views(tmux(3)), {}) == [
+        '{"v":1,"event":"removed","time":1767225600.0,"id":"tmux:%3","session":' + SESSION + "}"
+    ]
+
+
+def test_renamed_line():
+    [line] = lines(views(tmux(3)), views(tmux(3, topic="Retries")))
+    assert line == (
+        '{"v":1,"event":"renamed","time":1767225600.0,"id":"tmux:%3","session":'
+        + SESSION.replace("Fix tests", "Retries")
+        + ',"changes":{"title":["api — ✳ Fix tests","api — ✳ Retries"],"topic":["Fix tests","Retries"]}}'
+    )
+
+
+def test_status_line():
+    [line] = lines(views(tmux(3)), views(tmux(3, waiting=True)))
+    assert line == (
+        '{"v":1,"event":"status","time":1767225600.0,"id":"tmux:%3","session":'
+        + SESSION.replace('"waiting":false', '"waiting":true')
+        + ',"changes":{"waiting":[false,true]}}'
+    )
+
+
+def test_renamed_and_status_changes_are_separate_events():
+    events = diff_events(views(tmux(3)), views(tmux(3, topic="Retries", pid=5151)), T)
+    assert [e["event"] for e in events] == ["renamed", "status"]
+    assert events[1]["changes"] == {"pid": [4242, 5151]}
+
+
+def test_fields_select_session_and_change_fields():
+    [line] = lines(views(tmux(3)), views(tmux(3, topic="Retries")), fields=["project", "topic"])
+    assert line == (
+        '{"v":1,"event":"renamed","time":1767225600.0,"id":"tmux:%3",'
+        '"session":{"project":"api","topic":"Retries"},"changes":{"topic":["Fix tests","Retries"]}}'
+    )
+
+
+def test_removals_come_first():
+    events = diff_events(views(tmux(3)), views(tmux(4)), T)
+    assert [(e["event"], e["id"]) for e in events] == [("removed", "tmux:%3"), ("added", "tmux:%4")]
+
+
+def test_initial_events_for_more_sessions_than_the_backlog():
+    feed = ChangeFeed()
+    count = SUBSCRIBER_BACKLOG + 500
+    feed.publish({"updated_at": T, "tmux": [tmux(i) for i in range(count)]})
+
+    subscriber = feed.subscribe(initial=True)
+
+    events = [subscriber.get_nowait() for _ in range(count)]
+    assert all(e["event"] == "added" and e["initial"] for e in events)
+    assert subscriber.empty()
+    # Later changes queue up behind them as usual
+    feed.publish({"updated_at": T + 1, "tmux": []})
+    assert subscriber.qsize() == count
+    assert json.loads(format_event(subscriber.get_nowait()))["event"] == "removed"
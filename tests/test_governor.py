@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from claude_window_manager.governor import IDLE_NICE, Governor, resume
+from claude_window_manager.sampler import Sample
+
+
+@pytest.fixture
+def child():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield process.pid
+    process.kill()
+    process.wait()
+
+
+def test_stop_is_not_an_action():
+    with pytest.raises(ValueError):
+        Governor("stop")
+
+
+def test_idle_sessions_are_reniced_and_restored_on_resume(tmp_path, child):
+    clock = [0.0]
+    state_path = tmp_path / "governed.json"
+    governor = Governor("renice", idle_after=60, state_path=state_path, clock=lambda: clock[0])
+    session = {"pid": child, "window_name": "web — claude", "waiting_for_input": True}
+    idle = {child: Sample(0.0, 0.0, 0, 1)}
+
+    assert governor.update([session], idle, {child: [child]}) == []
+    clock[0] = 61.0
+    assert governor.update([session], idle, {child: [child]}) == [child]
+    if sys.platform != "darwin":
+        assert os.getpriority(os.PRIO_PROCESS, child) >= IDLE_NICE
+
+    assert resume(child, state_path)
+    assert json.loads(state_path.read_text()) == {}
+    assert not resume(child, state_path)
+
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="nice values are Linux-only here")
+def test_resume_without_privileges_leaves_the_session_reniced(tmp_path, child, monkeypatch):
+    state_path = tmp_path / "governed.json"
+    state_path.write_text(json.dumps({str(child): {"action": "renice", "nice": {str(child): 0}}}))
+    os.setpriority(os.PRIO_PROCESS, child, IDLE_NICE)
+
+    real_setpriority = os.setpriority
+
+    def setpriority(which, pid, nice):
+        if nice < os.getpriority(which, pid):
+            raise PermissionError(1, "Operation not permitted")
+        real_setpriority(which, pid, nice)
+
+    monkeypatch.setattr("claude_window_manager.governor.os.setpriority", setpriority)
+    assert resume(child, state_path)
+    assert json.loads(state_path.read_text()) == {}
+    assert os.getpriority(os.PRIO_PROCESS, child) == IDLE_NICE
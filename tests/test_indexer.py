@@ -0,0 +1,131 @@
+import threading
+import time
+
+from claude_window_manager.indexer import SessionIndexer
+
+
+def empty_snapshot(updated_at: float = 0.0) -> dict:
+    return {"updated_at": updated_at, "terminal": [], "iterm2": [], "tmux": [], "stale": []}
+
+
+def test_concurrent_refreshes_share_one_collection():
+    release = threading.Event()
+    running = 0
+    overlapped = False
+    calls = 0
+
+    def collect():
+        nonlocal running, overlapped, calls
+        running += 1
+        overlapped |= running > 1
+        calls += 1
+        release.wait(5)
+        running -= 1
+        return empty_snapshot(calls)
+
+    indexer = SessionIndexer(collect=collect, watch=False)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(indexer.refresh())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert not overlapped
+    assert calls == 1
+    assert len(results) == 8
+    assert all(result is results[0] for result in results)
+
+
+def test_snapshots_publish_in_collection_order():
+    published = []
+    count = 0
+
+    def collect():
+        nonlocal count
+        count += 1
+        return {**empty_snapshot(count), "terminal": [{"window_id": count}]}
+
+    indexer = SessionIndexer(collect=collect, watch=False)
+    indexer.add_listener(lambda snapshot: published.append(snapshot["updated_at"]))
+    threads = [threading.Thread(target=indexer.refresh) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert published == sorted(published)
+    assert indexer.snapshot["updated_at"] == published[-1]
+
+
+def test_query_while_idle_paused_refreshes_and_wakes_the_poller():
+    from claude_window_manager.scheduler import AdaptiveScheduler, SchedulerConfig
+
+    clock = [0.0]
+    idle = [600.0]
+    scheduler = AdaptiveScheduler(SchedulerConfig(), clock=lambda: clock[0], idle_seconds=lambda: idle[0])
+    calls = 0
+
+    def collect():
+        nonlocal calls
+        calls += 1
+        return empty_snapshot(calls)
+
+    indexer = SessionIndexer(collect=collect, scheduler=scheduler, watch=False)
+    indexer.refresh()
+    assert not scheduler.due()
+    assert scheduler.paused
+
+    idle[0] = 0.0
+    response = indexer.handle_request({"cmd": "snapshot"})
+
+    assert calls == 2
+    assert response["snapshot"]["updated_at"] == 2
+    assert scheduler.due()  # The poller checks idleness again right away
+    assert not scheduler.paused
+
+
+def test_transcript_appends_reread_transcripts_without_detecting():
+    detections = 0
+    rereads = []
+
+    def collect():
+        nonlocal detections
+        detections += 1
+        return empty_snapshot(detections)
+
+    def collect_transcripts(paths):
+        rereads.append(paths)
+        return {**empty_snapshot(100), "terminal": [{"window_id": 1, "waiting_for_input": True}]}
+
+    indexer = SessionIndexer(collect=collect, collect_transcripts=collect_transcripts, watch=False)
+    published = []
+    indexer.add_listener(published.append)
+    indexer.refresh()
+
+    indexer._on_transcripts_changed({"/p/a.jsonl"}, structural=False)
+
+    assert detections == 1
+    assert rereads == [{"/p/a.jsonl"}]
+    assert indexer.snapshot["updated_at"] == 100
+    assert len(published) == 2
+
+
+def test_structural_transcript_changes_wake_the_poller():
+    from claude_window_manager.scheduler import AdaptiveScheduler, SchedulerConfig
+
+    clock = [0.0]
+    scheduler = AdaptiveScheduler(SchedulerConfig(), clock=lambda: clock[0], idle_seconds=lambda: 0.0)
+    rereads = []
+    indexer = SessionIndexer(
+        collect=empty_snapshot, collect_transcripts=rereads.append, scheduler=scheduler, watch=False
+    )
+    scheduler.record(False)
+    assert not scheduler.due()
+
+    indexer._on_transcripts_changed({"/p/b.jsonl"}, structural=True)
+
+    assert scheduler.due()
+    assert rereads == []
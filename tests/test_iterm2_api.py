@@ -0,0 +1,145 @@
+import time
+
+import pytest
+
+from claude_window_manager import iterm2_api
+from claude_window_manager.iterm2_api import ITerm2Monitor, live_sessions
+from claude_window_manager.iterm2_integration import get_claude_iterm_sessions, parse_iterm_sessions
+from claude_window_manager.simulator import FakeITerm2, Simulator
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class Events(list):
+    def __call__(self, name, args):
+        self.append((name, args))
+
+    def names(self):
+        return [name for name, _ in self]
+
+
+@pytest.fixture
+def sim(monkeypatch):
+    sim = Simulator(windows=10)  # iTerm2 sessions in two windows: 8 tabs, then 2
+    sim.scripts = []
+    run = sim.run
+
+    def record(script, timeout=None):
+        sim.scripts.append(script)
+        return run(script, timeout)
+
+    monkeypatch.setattr(sim, "run", record)
+    with sim.install():
+        yield sim
+
+
+@pytest.fixture
+def fake(sim):
+    return FakeITerm2(sim)
+
+
+@pytest.fixture
+def monitor(fake, monkeypatch):
+    monkeypatch.setattr(iterm2_api, "RECONNECT_DELAY", 0.05)
+    monitor = ITerm2Monitor(Events(), api=fake)
+    monitor.start()
+    # Connected, and every monitor (3 layout, 3 per session) subscribed
+    assert wait_for(lambda: monitor.connected and len(fake.subscribers) == 3 + 3 * len(monitor._records))
+    yield monitor
+    monitor.stop()
+
+
+def subscribed(fake, monitor):
+    return lambda: len(fake.subscribers) == 3 + 3 * len(monitor._records)
+
+
+def test_connect_indexes_every_claude_session(sim, monitor):
+    assert monitor.on_event.names() == ["connected"]
+    assert monitor.sessions() == parse_iterm_sessions(sim.iterm_output)
+    assert live_sessions() == monitor.sessions()
+    # The "iterm2" source answers from the index without AppleScript
+    assert get_claude_iterm_sessions() == monitor.sessions()
+    assert sim.scripts == []
+
+
+def test_new_and_closed_sessions(fake, monitor):
+    fake.add_session(2, "new-1", "🤖 api — ✳ Review", "api", "Review")
+    assert wait_for(lambda: any(s["id"] == "new-1" for s in monitor.sessions()))
+    new = next(s for s in monitor.sessions() if s["id"] == "new-1")
+    assert (new["window"], new["tab"], new["project"], new["tty"]) == (2, 3, "api", "ttys900")
+    assert wait_for(lambda: "new_session" in monitor.on_event.names())
+    assert ("new_session", ["new-1"]) in monitor.on_event
+
+    # A session without the Claude variables is tracked but not listed
+    fake.add_session(2, "plain")
+    assert wait_for(lambda: "plain" in monitor._records)
+    assert all(s["id"] != "plain" for s in monitor.sessions())
+
+    assert wait_for(subscribed(fake, monitor))
+    first = monitor.sessions()[0]["id"]
+    fake.close_session(first)
+    assert wait_for(lambda: first not in monitor._records)
+    assert all(s["id"] != first for s in monitor.sessions())
+    assert wait_for(lambda: ("session_ended", [first]) in monitor.on_event)
+    # Its variable watches end with it
+    assert wait_for(subscribed(fake, monitor))
+
+
+def test_variable_changes_update_the_index(fake, monitor):
+    session = monitor.sessions()[0]
+    fake.set_variable(session["id"], "user.claude_topic", "Ship it")
+    assert wait_for(lambda: monitor.sessions()[0]["topic"] == "Ship it")
+    assert ("variable_changed", [session["id"], "user.claude_topic"]) in monitor.on_event
+
+    # A session that marks itself as Claude appears
+    fake.add_session(2, "plain")
+    assert wait_for(lambda: "plain" in monitor._records)
+    assert wait_for(subscribed(fake, monitor))
+    fake.set_variable("plain", "user.claude_project", "web")
+    fake.set_variable("plain", "user.claude_session", "🤖 web — ✳ Docs")
+    assert wait_for(lambda: any(s["id"] == "plain" for s in monitor.sessions()))
+
+
+def test_layout_moves_renumber_windows_and_tabs(fake, monitor):
+    sessions = monitor.sessions()
+    moved = sessions[0]["id"]
+    requests = fake.requests
+    fake.move_session(moved, 2)
+    assert wait_for(lambda: next(s for s in monitor.sessions() if s["id"] == moved)["window"] == 2)
+    after = {s["id"]: (s["window"], s["tab"]) for s in monitor.sessions()}
+    assert after[moved] == (2, 3)
+    assert after[sessions[1]["id"]] == (1, 1)  # The rest of window 1 shifts left
+    assert ("layout_changed", []) in monitor.on_event
+    # Moves are read from the layout: no session variables are fetched again
+    assert fake.requests == requests + 1  # app.async_refresh()
+
+
+def test_disconnect_falls_back_to_applescript(sim, fake, monitor, monkeypatch):
+    monkeypatch.setattr(iterm2_api, "RECONNECT_DELAY", 60)
+    fake.disconnect()
+    assert wait_for(lambda: not monitor.connected)
+    assert monitor.sessions() is None
+    assert live_sessions() is None
+
+    assert get_claude_iterm_sessions() == parse_iterm_sessions(sim.iterm_output)
+    assert len(sim.scripts) == 1
+
+
+def test_reconnects_after_a_disconnect(fake, monitor):
+    fake.disconnect()
+    assert wait_for(lambda: monitor.on_event.names().count("connected") == 2)
+    assert wait_for(lambda: monitor.connected)
+    assert len(monitor.sessions()) == 10
+
+
+def test_stop_disconnects(monitor):
+    monitor.stop()
+    assert wait_for(lambda: not monitor.connected)
+    assert live_sessions() is None
@@ -0,0 +1,110 @@
+import pytest
+
+from claude_window_manager.applescript import DEFAULT_TIMEOUT, FIELD_SEP, AppleScriptError, use_runner
+from claude_window_manager.iterm2_integration import build_launch_script, launch_claude_sessions
+from claude_window_manager.manifest import LaunchSpec
+
+HOSTILE = [
+    'say "hi"',
+    "back\\slash\\",
+    '\\" & (do shell script "touch /tmp/pwned") & "',
+    "-- not a comment",
+    "two\nlines\r",
+    "tab\tand ◂ ✳ 🚀",
+    "end tell",
+]
+
+
+def split_literals(script: str) -> tuple[str, list[str]]:
+    """The script with string literals blanked, and the literals' values."""
+    skeleton, literals = [], []
+    i = 0
+    while i < len(script):
+        if script[i] != '"':
+            skeleton.append(script[i])
+            i += 1
+            continue
+        value = []
+        i += 1
+        while script[i] != '"':
+            if script[i] == "\\":
+                i += 1
+            value.append(script[i])
+            i += 1
+        i += 1
+        skeleton.append('""')
+        literals.append("".join(value))
+    return "".join(skeleton), literals
+
+
+def spec(path="/src/api", topic="Fix tests", color=(147, 112, 219)) -> LaunchSpec:
+    return LaunchSpec(path, topic, color)
+
+
+class RecordingRunner:
+    """Stands in for the AppleScript runner, answering with a canned reply."""
+
+    def __init__(self, reply="", error=None):
+        self.reply, self.error = reply, error
+        self.calls = []
+
+    def run(self, script, timeout=None):
+        self.calls.append((script, timeout))
+        if self.error:
+            raise self.error
+        return self.reply
+
+
+def test_launch_script_activates_once_and_opens_a_tab_per_spec():
+    script = build_launch_script([spec(), spec("/src/web", "Docs", (0, 128, 255))])
+    assert script.count("activate") == 1
+    assert script.count("create tab with default profile") == 2
+    assert "set background color to {0, 32896, 65535}" in script
+    _, literals = split_literals(script)
+    assert "🤖 web — ✳ Docs" in literals
+    assert "/src/web" in literals
+
+
+@pytest.mark.parametrize("text", HOSTILE)
+def test_hostile_titles_and_paths_stay_inside_their_literals(text):
+    benign, benign_literals = split_literals(build_launch_script([spec()]))
+    path = f"/src/{text.replace('/', '_')}"
+    hostile, literals = split_literals(build_launch_script([spec(path, text)]))
+    assert hostile == benign
+    assert len(literals) == len(benign_literals)
+    assert text in literals
+    assert path in literals
+    assert f"🤖 {LaunchSpec(path, text, (0, 0, 0)).title}" in literals
+
+
+def test_results_are_split_per_spec():
+    specs = [spec(), spec("/src/web"), spec("/src/ui")]
+    runner = RecordingRunner(FIELD_SEP.join(["ok", "iTerm2 got an error: no profile", "ok"]))
+    with use_runner(runner):
+        assert launch_claude_sessions(specs) == [None, "iTerm2 got an error: no profile", None]
+    ((script, timeout),) = runner.calls
+    assert script == build_launch_script(specs)
+    assert timeout == DEFAULT_TIMEOUT + 3
+
+
+def test_empty_error_messages_are_still_errors():
+    with use_runner(RecordingRunner(FIELD_SEP.join(["", "ok"]))):
+        assert launch_claude_sessions([spec(), spec("/src/web")]) == ["unknown error", None]
+
+
+@pytest.mark.parametrize("runner", [
+    RecordingRunner("ok"),  # Fewer results than specs
+    RecordingRunner(FIELD_SEP.join(["ok"] * 3)),  # More
+    RecordingRunner(""),
+    RecordingRunner(error=AppleScriptError("iTerm2 is not running")),
+])
+def test_mismatched_results_fail_every_spec(runner):
+    with use_runner(runner):
+        assert launch_claude_sessions([spec(), spec("/src/web")]) == ["iTerm2 didn't run the launch script"] * 2
+
+
+def test_nothing_to_launch():
+    runner = RecordingRunner("ok")
+    with use_runner(runner):
+        assert launch_claude_sessions([]) == []
+    assert runner.calls == []
@@ -0,0 +1,131 @@
+import re
+
+import pytest
+
+from claude_window_manager import iterm2_integration, iterm2_writes
+from claude_window_manager.applescript import FIELD_SEP
+from claude_window_manager.iterm2_writes import WriteBuffer, build_script
+
+
+class RecordingRunner:
+    """Stands in for osascript: records scripts; sessions in `existing` succeed."""
+
+    def __init__(self, existing=("s1", "s2", "s3")):
+        self.existing = set(existing)
+        self.scripts = []
+
+    def __call__(self, script: str) -> str:
+        self.scripts.append(script)
+        ids = re.findall(r'if sessionId is "([^"]*)" then', script)
+        return "ok" + FIELD_SEP + FIELD_SEP.join(i for i in ids if i in self.existing)
+
+
+def test_writes_coalesce_to_the_last_value():
+    runner = RecordingRunner()
+    writes = WriteBuffer(run=runner)
+    writes.set_badge("s1", "one")
+    writes.set_badge("s1", "two")
+    writes.set_color("s1", 255, 0, 0)
+
+    assert writes.pending == 2
+    assert writes.flush()
+    assert len(runner.scripts) == 1
+    assert '"two"' in runner.scripts[0]
+    assert '"one"' not in runner.scripts[0]
+    assert writes.stats["coalesced"] == 1
+    assert writes.stats["written"] == 2
+
+
+def test_unchanged_values_are_not_written_again():
+    runner = RecordingRunner()
+    writes = WriteBuffer(run=runner)
+    writes.set_badge("s1", "idle")
+    writes.flush()
+
+    writes.set_badge("s1", "idle")
+    assert writes.pending == 0
+    assert writes.flush()
+    assert len(runner.scripts) == 1
+    assert writes.stats["skipped"] == 1
+
+
+def test_one_script_per_flush_for_every_session():
+    runner = RecordingRunner()
+    writes = WriteBuffer(run=runner)
+    for sid in ("s1", "s2", "s3"):
+        writes.set_badge(sid, "busy")
+        writes.set_variable(sid, "user.claude_topic", "Fix tests")
+
+    writes.flush()
+
+    assert len(runner.scripts) == 1
+    assert writes.stats["written"] == 6
+
+
+def test_sessions_are_addressed_by_id():
+    script = build_script({"w0t0-ABC": {"badge": "hi"}})
+    assert 'if sessionId is "w0t0-ABC" then' in script
+    assert "of window" not in script
+
+
+def test_failed_sessions_are_written_again():
+    runner = RecordingRunner(existing=("s1",))
+    writes = WriteBuffer(run=runner)
+    writes.set_badge("s1", "a")
+    writes.set_badge("gone", "a")
+    writes.flush()
+    assert writes.stats["failed"] == 1
+
+    writes.set_badge("s1", "a")
+    writes.set_badge("gone", "a")
+    assert writes.pending == 1  # Only the failed one
+
+
+def test_values_for_sessions_that_ended_are_forgotten():
+    runner = RecordingRunner()
+    writes = WriteBuffer(run=runner)
+    writes.set_badge("s1", "a")
+    writes.flush()
+
+    writes.sync_sessions(["s2"])
+    writes.set_badge("s1", "a")
+    assert writes.pending == 1
+
+
+def test_a_failed_script_keeps_nothing_as_applied():
+    writes = WriteBuffer(run=lambda script: "")
+    writes.set_badge("s1", "a")
+    assert not writes.flush()
+    writes.set_badge("s1", "a")
+    assert writes.pending == 1
+
+
+@pytest.fixture
+def shared_buffer(monkeypatch):
+    runner = RecordingRunner(existing=("s1",))
+    monkeypatch.setattr(iterm2_writes, "_buffer", WriteBuffer(run=runner))
+    # (window, tab) -> session id, as AppleScript numbers them
+    monkeypatch.setattr(
+        iterm2_integration, "run_template",
+        lambda template, window, tab: "s1" if (window, tab) == (2, 3) else "",
+    )
+    return runner
+
+
+def test_writes_by_session_id(shared_buffer):
+    assert iterm2_integration.update_session_badge("s1", "busy")
+    assert iterm2_integration.set_session_color("s1", 255, 0, 0)
+    assert iterm2_integration.set_session_variable("s1", "user.claude_topic", "Fix tests", defer=True)
+    assert len(shared_buffer.scripts) == 2
+    assert iterm2_writes.get_write_buffer().pending == 1
+
+
+def test_writes_by_window_and_tab_still_work(shared_buffer):
+    assert iterm2_integration.update_session_badge(2, 3, "busy")
+    assert iterm2_integration.set_session_color(2, 3, 255, 0, 0)
+    assert iterm2_integration.set_session_variable(2, 3, "user.claude_topic", "Fix tests")
+    assert all('if sessionId is "s1" then' in script for script in shared_buffer.scripts)
+    assert len(shared_buffer.scripts) == 3
+    # No tab there: nothing is queued
+    assert not iterm2_integration.update_session_badge(9, 9, "busy")
+    assert iterm2_writes.get_write_buffer().pending == 0
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from claude_window_manager.colors import COLORS
+from claude_window_manager.manifest import DEFAULT_TOPIC, LaunchSpec, ManifestError, load_manifest
+
+
+@pytest.fixture
+def projects(tmp_path):
+    for name in ("api", "web"):
+        (tmp_path / "src" / name).mkdir(parents=True)
+    return tmp_path
+
+
+def write(directory, name, text):
+    path = directory / name
+    path.write_text(text)
+    return path
+
+
+def test_json_list(projects):
+    path = write(projects, "m.json", json.dumps([
+        {"path": "src/api", "topic": "  Fix tests ", "color": "backend"},
+        "src/web",
+    ]))
+    assert load_manifest(path) == [
+        LaunchSpec(str(projects / "src/api"), "Fix tests", COLORS["backend"]),
+        LaunchSpec(str(projects / "src/web"), DEFAULT_TOPIC, COLORS["default"]),
+    ]
+
+
+def test_toml_sessions_table(projects):
+    path = write(projects, "m.toml", """
+[[sessions]]
+path = "src/api"
+topic = "Invoice retries"
+color = [10, 20, 30]
+
+[[sessions]]
+path = "src/web"
+""")
+    specs = load_manifest(path)
+    assert [(s.topic, s.color) for s in specs] == [("Invoice retries", (10, 20, 30)), (DEFAULT_TOPIC, COLORS["default"])]
+    assert specs[0].title == "api — ✳ Invoice retries"
+
+
+def test_yaml(projects):
+    pytest.importorskip("yaml")
+    path = write(projects, "m.yml", "sessions:\n  - path: src/api\n    topic: Review\n  - src/web\n")
+    assert [s.topic for s in load_manifest(path)] == ["Review", DEFAULT_TOPIC]
+
+
+def test_paths_expand_home(projects, monkeypatch):
+    monkeypatch.setenv("HOME", str(projects))
+    path = write(projects / "src", "m.json", '["~/src/api"]')
+    assert load_manifest(path)[0].path == str(projects / "src" / "api")
+
+
+def test_every_bad_entry_is_reported_together(projects):
+    (projects / "notes.txt").write_text("")
+    path = write(projects, "m.json", json.dumps([
+        {"path": "src/api"},
+        {"path": "missing"},
+        {"path": "notes.txt"},
+        {"topic": "No path"},
+        {"path": "src/web", "color": "mauve"},
+        {"path": "src/web", "color": [0, 256, 0]},
+        {"path": "src/web", "color": [0, 0]},
+        {"path": "src/web", "topic": "  "},
+        {"path": "src/web", "colour": "backend"},
+        42,
+    ]))
+    with pytest.raises(ManifestError) as error:
+        load_manifest(path)
+    lines = str(error.value).splitlines()
+    assert lines[0] == f"Invalid entries in {path}:"
+    assert [line.split(":")[0].strip() for line in lines[1:]] == [f"entry {n}" for n in range(2, 11)]
+    message = str(error.value)
+    assert "is not a directory" in message
+    assert "missing path" in message
+    assert "unknown color 'mauve'" in message
+    assert "0-255 components" in message
+    assert "topic must be a non-empty string" in message
+    assert "unknown keys: colour" in message
+
+
+def test_duplicates_are_rejected(projects):
+    path = write(projects, "m.json", json.dumps([
+        {"path": "src/api", "topic": "Fix tests"},
+        {"path": "src/web", "topic": "Fix tests"},
+        {"path": "./src/../src/api", "topic": "Fix tests", "color": "urgent"},
+        {"path": "src/api", "topic": "Review"},
+    ]))
+    with pytest.raises(ManifestError, match="entry 3: same path and topic as entry 1"):
+        load_manifest(path)
+
+
+@pytest.mark.parametrize("name, text, message", [
+    ("m.json", "[", "Can't parse"),
+    ("m.toml", "[[sessions]\n", "Can't parse"),
+    ("m.json", "[]", "lists no sessions"),
+    ("m.json", '{"projects": ["src/api"]}', "lists no sessions"),
+    ("m.txt", "src/api", "Unknown manifest format .txt"),
+])
+def test_unreadable_manifests(projects, name, text, message):
+    with pytest.raises(ManifestError, match=message):
+        load_manifest(write(projects, name, text))
+
+
+def test_missing_manifest(projects):
+    with pytest.raises(ManifestError, match="Can't read"):
+        load_manifest(projects / "nope.json")
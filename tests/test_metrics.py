@@ -0,0 +1,208 @@
+import asyncio
+import json
+import time
+import urllib.request
+
+import pytest
+
+from claude_window_manager import metrics
+from claude_window_manager.metrics import METRICS, Histogram, Metrics, configure, span, timed
+
+
+@pytest.fixture
+def global_metrics():
+    """Enable the process-wide registry for one test, then put it back."""
+    enabled, tracing = METRICS.enabled, METRICS.tracing
+    METRICS.reset()
+    configure(True, tracing=True)
+    yield METRICS
+    METRICS.reset()
+    METRICS.enabled, METRICS.tracing = enabled, tracing
+
+
+def enabled_metrics(tracing=False) -> Metrics:
+    m = Metrics()
+    m.enabled = True
+    m.tracing = tracing
+    return m
+
+
+def test_histogram_quantiles():
+    h = Histogram()
+    for ms in range(1, 101):
+        h.add(ms / 1000)
+    q = h.quantiles()
+    assert q["p50"] == pytest.approx(0.0505)
+    assert q["p90"] == pytest.approx(0.0901)
+    assert q["p99"] == pytest.approx(0.09901)
+    assert q["max"] == 0.1
+    assert h.count == 100
+    assert h.total == pytest.approx(5.05)
+
+
+def test_histogram_edge_cases():
+    assert Histogram().quantiles() == {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    one = Histogram()
+    one.add(0.25)
+    assert set(one.quantiles().values()) == {0.25}
+
+
+def test_histogram_window_rolls_but_lifetime_totals_do_not():
+    h = Histogram(window=10)
+    for _ in range(10):
+        h.add(1.0)
+    for _ in range(10):
+        h.add(0.001)
+    assert h.quantiles()["max"] == 0.001
+    assert h.count == 20
+    assert h.total == pytest.approx(10.01)
+
+
+def test_nested_spans_are_recorded_inside_each_other():
+    m = enabled_metrics(tracing=True)
+    with m.span("refresh"):
+        with m.span("ps_scan"):
+            time.sleep(0.01)
+        with m.span("ps_scan"):
+            pass
+    spans = m.snapshot()["spans"]
+    assert spans["refresh"]["count"] == 1
+    assert spans["ps_scan"]["count"] == 2
+    assert spans["refresh"]["total"] >= spans["ps_scan"]["total"] >= 0.01
+
+    inner, _, outer = m.trace_events  # Recorded as each span closes
+    assert (inner["name"], outer["name"]) == ("ps_scan", "refresh")
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_span_records_when_the_block_raises():
+    m = enabled_metrics()
+    with pytest.raises(ValueError):
+        with m.span("parse"):
+            raise ValueError
+    assert m.snapshot()["spans"]["parse"]["count"] == 1
+
+
+def test_subprocess_counts_by_command_and_tick():
+    m = enabled_metrics()
+    m.count_subprocess("/bin/ps")
+    m.count_subprocess("osascript")
+    m.count_subprocess("osascript")
+    m.tick()
+    m.count_subprocess("ps")
+    m.tick()
+    m.count("watch_events", 3)
+    snap = m.snapshot()
+    assert snap["subprocesses"] == {"ps": 2, "osascript": 2}
+    assert snap["ticks"] == 2
+    assert snap["subprocesses_per_tick"] == 2.0
+    assert snap["subprocesses_last_tick"] == 1
+    assert snap["counters"] == {"watch_events": 3}
+
+
+def test_prometheus_text():
+    m = enabled_metrics()
+    m.record("run_applescript", 0.0, 0.5)
+    m.count_subprocess("ps")
+    m.count("watch_events")
+    m.tick()
+    lines = m.prometheus().splitlines()
+    assert "# TYPE cwm_span_duration_seconds summary" in lines
+    assert 'cwm_span_duration_seconds{span="run_applescript",quantile="0.5"} 0.500000000' in lines
+    assert 'cwm_span_duration_seconds_sum{span="run_applescript"} 0.500000000' in lines
+    assert 'cwm_span_duration_seconds_count{span="run_applescript"} 1' in lines
+    assert 'cwm_subprocesses_total{command="ps"} 1' in lines
+    assert 'cwm_events_total{name="watch_events"} 1' in lines
+    assert "cwm_refresh_ticks_total 1" in lines
+    assert "cwm_subprocesses_per_tick 1.000" in lines
+    # Every sample line belongs to a declared metric family
+    families = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    for line in lines:
+        if not line.startswith("#"):
+            name = line.split("{")[0].split()[0]
+            assert name.removesuffix("_sum").removesuffix("_count") in families
+
+
+def test_chrome_trace_format(tmp_path):
+    m = enabled_metrics(tracing=True)
+    m.record("rebuild_menu", m._epoch + 0.001, m._epoch + 0.003)
+    path = tmp_path / "trace.json"
+    m.write_trace(path)
+    trace = json.loads(path.read_text())
+    assert trace["displayTimeUnit"] == "ms"
+    (event,) = trace["traceEvents"]
+    assert event["name"] == "rebuild_menu"
+    assert event["ph"] == "X"
+    assert event["ts"] == pytest.approx(1000)
+    assert event["dur"] == pytest.approx(2000)
+    assert isinstance(event["pid"], int) and isinstance(event["tid"], int)
+
+
+def test_spans_are_not_traced_unless_tracing():
+    m = enabled_metrics()
+    with m.span("refresh"):
+        pass
+    assert m.snapshot()["spans"]["refresh"]["count"] == 1
+    assert m.chrome_trace()["traceEvents"] == []
+
+
+def test_disabled_metrics_record_nothing():
+    m = Metrics()
+    assert m.span("a") is m.span("b") is metrics._NULL_SPAN
+    with m.span("refresh"):
+        pass
+    m.count_subprocess("ps")
+    m.count("watch_events")
+    m.tick()
+    snap = m.snapshot()
+    assert snap["spans"] == {} and snap["subprocesses"] == {} and snap["counters"] == {}
+    assert snap["ticks"] == 0
+
+
+def test_timed_wraps_sync_and_async_functions(global_metrics):
+    @timed("parse")
+    def parse(x):
+        return x * 2
+
+    @timed("fetch")
+    async def fetch(x):
+        return x + 1
+
+    assert parse.__name__ == "parse"
+    assert parse(2) == 4
+    assert asyncio.run(fetch(2)) == 3
+    with span("outer"):
+        parse(1)
+    spans = global_metrics.snapshot()["spans"]
+    assert spans["parse"]["count"] == 2
+    assert spans["fetch"]["count"] == 1
+    assert spans["outer"]["count"] == 1
+
+    configure(False)
+    parse(3)
+    assert global_metrics.snapshot()["spans"]["parse"]["count"] == 2
+
+
+def test_configure_reads_the_environment(global_metrics, monkeypatch):
+    monkeypatch.setenv("CWM_METRICS", "0")
+    configure()
+    assert not global_metrics.enabled
+    configure(tracing=True)  # Tracing needs the spans, whatever the env says
+    assert global_metrics.enabled and global_metrics.tracing
+    monkeypatch.delenv("CWM_METRICS")
+    configure()
+    assert global_metrics.enabled and not global_metrics.tracing
+
+
+def test_serve_prometheus(global_metrics):
+    global_metrics.count_subprocess("ps")
+    server = metrics.serve_prometheus(0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert 'cwm_subprocesses_total{command="ps"} 1' in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
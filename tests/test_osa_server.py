@@ -0,0 +1,42 @@
+import io
+import json
+import subprocess
+
+from claude_window_manager import osa_server
+from claude_window_manager.applescript import FIELD_SEP, RECORD_SEP
+from claude_window_manager.osa_server import FakeBackend, OsascriptBackend, serve
+
+
+def exchange(backend, *requests) -> list[dict]:
+    stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+    stdout = io.StringIO()
+    serve(backend, stdin, stdout)
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+def test_responses_answer_requests_by_id():
+    responses = exchange(
+        FakeBackend(),
+        {"id": 1, "source": "hello", "args": None},
+        {"id": 2, "source": "error", "args": None},
+    )
+    assert responses == [
+        {"id": 1, "ok": True, "result": "hello", "compiled": True},
+        {"id": 2, "ok": False, "error": "fake script error"},
+    ]
+
+
+def test_compiled_templates_are_cached_by_source():
+    template = {"source": "on cwm(argv)\nend cwm", "args": ["a"]}
+    responses = exchange(FakeBackend(), {"id": 1, **template}, {"id": 2, **template}, {"id": 3, **template, "source": "other"})
+    assert [r["compiled"] for r in responses] == [True, False, True]
+    assert responses[0]["result"] == "a"
+
+
+def test_osascript_backend_keeps_trailing_separators(monkeypatch):
+    output = f"a{FIELD_SEP}b{RECORD_SEP}\n"
+    monkeypatch.setattr(
+        osa_server.subprocess, "run",
+        lambda argv, **kwargs: subprocess.CompletedProcess(argv, 0, stdout=output, stderr=""),
+    )
+    assert OsascriptBackend().execute("script", None) == (f"a{FIELD_SEP}b{RECORD_SEP}", True)
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from claude_window_manager.refresh import SingleFlight
+
+
+class CountingWork:
+    """Counts runs; each blocks until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, fresh: bool = False):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return self.calls
+
+
+def test_requests_during_a_run_share_it():
+    work = CountingWork()
+    results = []
+    flight = SingleFlight(work, on_result=results.append)
+
+    first = flight.request()
+    work.started.wait(5)
+    joined = [flight.request(fresh=True) for _ in range(10)]
+    work.release.set()
+
+    assert all(future is first for future in joined)
+    assert first.result(5) == 1
+    assert work.calls == 1
+    assert flight.runs == 1
+    assert results == [1]
+
+
+def test_request_after_a_run_starts_another():
+    work = CountingWork()
+    work.release.set()
+    flight = SingleFlight(work)
+
+    assert flight.request().result(5) == 1
+    assert flight.request().result(5) == 2
+    assert work.calls == flight.runs == 2
+    assert not flight.in_flight
+
+
+def test_failed_run_reaches_every_waiter():
+    def fail():
+        raise RuntimeError("osascript died")
+
+    flight = SingleFlight(fail)
+    with pytest.raises(RuntimeError, match="osascript died"):
+        flight.request().result(5)
+    assert not flight.in_flight
@@ -0,0 +1,155 @@
+from claude_window_manager.scheduler import AdaptiveScheduler, SchedulerConfig
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_scheduler(idle=None, **config):
+    clock = FakeClock()
+    idle_seconds = [idle]
+    scheduler = AdaptiveScheduler(
+        SchedulerConfig(**{"min_interval": 2.0, "max_interval": 60.0, "backoff": 2.0,
+                           "boost_duration": 30.0, "idle_after": 300.0, **config}),
+        clock=clock,
+        idle_seconds=lambda: idle_seconds[0],
+    )
+    return scheduler, clock, idle_seconds
+
+
+def run_due(scheduler, clock, changed=False) -> float:
+    """Wait until the next refresh is due, run it, and return how long that took."""
+    waited = scheduler.sleep_time()
+    clock.advance(waited)
+    assert scheduler.due()
+    scheduler.record(changed)
+    return waited
+
+
+def test_first_refresh_is_due_immediately():
+    scheduler, _, _ = make_scheduler()
+    assert scheduler.due()
+
+
+def test_backs_off_exponentially_while_nothing_changes():
+    scheduler, clock, _ = make_scheduler()
+    run_due(scheduler, clock)
+    waits = [run_due(scheduler, clock) for _ in range(7)]
+    assert waits == [4.0, 8.0, 16.0, 32.0, 60.0, 60.0, 60.0]
+
+
+def test_change_resets_to_the_minimum_interval():
+    scheduler, clock, _ = make_scheduler()
+    for _ in range(5):
+        run_due(scheduler, clock)
+    run_due(scheduler, clock, changed=True)
+    assert run_due(scheduler, clock) == 2.0
+
+
+def test_not_due_before_the_interval_passes():
+    scheduler, clock, _ = make_scheduler()
+    scheduler.record(False)
+    clock.advance(3.9)
+    assert not scheduler.due()
+    clock.advance(0.1)
+    assert scheduler.due()
+
+
+def test_boost_polls_fast_for_its_duration_then_backs_off():
+    scheduler, clock, _ = make_scheduler()
+    for _ in range(5):
+        run_due(scheduler, clock)
+    scheduler.boost()
+    assert scheduler.sleep_time() == 0
+    waits = [run_due(scheduler, clock) for _ in range(16)]
+    # Fast for 30 seconds, then doubling again
+    assert waits[:15] == [0.0] + [2.0] * 14
+    assert waits[15] == 2.0
+    assert run_due(scheduler, clock) == 4.0
+
+
+def test_menu_open_polls_fast_until_closed():
+    scheduler, clock, _ = make_scheduler()
+    scheduler.set_menu_open(True)
+    clock.advance(120)
+    assert all(run_due(scheduler, clock) <= 2.0 for _ in range(100))
+    scheduler.set_menu_open(False)
+    run_due(scheduler, clock)
+    assert [run_due(scheduler, clock) for _ in range(3)] == [4.0, 8.0, 16.0]
+
+
+def test_pauses_while_idle_and_resumes_on_activity():
+    scheduler, clock, idle = make_scheduler(idle=0.0)
+    run_due(scheduler, clock)
+    idle[0] = 300.0
+    clock.advance(scheduler.sleep_time())
+    assert not scheduler.due()
+    assert scheduler.paused
+    # Checks again at the longest interval, and stays paused while idle
+    assert scheduler.sleep_time() == 60.0
+    clock.advance(60)
+    assert not scheduler.due()
+
+    idle[0] = 1.0
+    clock.advance(60)
+    assert scheduler.due()
+    assert not scheduler.paused
+
+
+def test_boost_overrides_idle_pause():
+    scheduler, clock, idle = make_scheduler(idle=600.0)
+    assert not scheduler.due()
+    scheduler.boost()
+    assert scheduler.due()
+    assert not scheduler.paused
+
+
+def test_unknown_idle_time_never_pauses():
+    scheduler, clock, _ = make_scheduler(idle=None)
+    for _ in range(10):
+        run_due(scheduler, clock)
+    assert not scheduler.paused
+
+
+def test_expedite_keeps_the_interval():
+    scheduler, clock, _ = make_scheduler()
+    for _ in range(4):
+        run_due(scheduler, clock)
+    interval = scheduler.interval
+    scheduler.expedite()
+    assert scheduler.due()
+    assert scheduler.interval == interval
+
+
+def test_change_arriving_mid_refresh_stays_due():
+    scheduler, clock, _ = make_scheduler()
+    for _ in range(4):
+        run_due(scheduler, clock)
+    clock.advance(scheduler.sleep_time())
+    assert scheduler.due()
+    clock.advance(0.5)
+    scheduler.expedite()  # a change event while the refresh is running
+    clock.advance(0.5)
+    scheduler.record(False)
+    assert scheduler.sleep_time() == 0
+    assert scheduler.due()
+    # Once that refresh runs, the backoff carries on as before
+    scheduler.record(False)
+    assert scheduler.sleep_time() == 60.0
+
+
+def test_boost_arriving_mid_refresh_stays_due():
+    scheduler, clock, _ = make_scheduler()
+    run_due(scheduler, clock)
+    clock.advance(scheduler.sleep_time())
+    assert scheduler.due()
+    scheduler.boost()
+    scheduler.record(False)
+    assert scheduler.due()
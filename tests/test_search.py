@@ -0,0 +1,110 @@
+import random
+
+from claude_window_manager.search import Search, SearchIndex
+
+
+def session(project, topic=None, language=None, last_activity=None) -> dict:
+    return {"project": project, "topic": topic, "language": language, "last_activity": last_activity}
+
+
+def search(sessions, query) -> list[dict]:
+    return [sessions[i] for i in Search(SearchIndex(sessions)).update(query)]
+
+
+def projects(results) -> list[str]:
+    return [s["project"] for s in results]
+
+
+def test_matches_need_every_term():
+    sessions = [
+        session("api", "Fix tests", "Python"),
+        session("web", "Fix layout", "TypeScript"),
+        session("api", "Add billing", "Go"),
+    ]
+    assert projects(search(sessions, "fix")) == ["api", "web"]
+    assert search(sessions, "api fix") == [sessions[0]]
+    assert search(sessions, "FIX Python") == [sessions[0]]
+    assert search(sessions, "rust") == []
+
+
+def test_terms_do_not_match_across_fields():
+    sessions = [session("api", "fix")]
+    assert search(sessions, "ifi") == []
+    assert search(sessions, "i f") == sessions
+
+
+def test_long_terms_must_match_contiguously():
+    # Has every trigram of "abcab" but not the term itself
+    sessions = [session("abcaxbcab"), session("xabcabx")]
+    assert projects(search(sessions, "abcab")) == ["xabcabx"]
+
+
+def test_project_outranks_topic_outranks_language():
+    sessions = [
+        session("web", "Docs", "Go"),
+        session("site", "Go live", "Python"),
+        session("go-api", "Fix tests", "Python"),
+    ]
+    assert projects(search(sessions, "go")) == ["go-api", "site", "web"]
+
+
+def test_field_start_outranks_word_start_outranks_inner_match():
+    sessions = [session("rebilling"), session("core-billing"), session("billing-service")]
+    assert projects(search(sessions, "bil")) == ["billing-service", "core-billing", "rebilling"]
+
+
+def test_recency_breaks_ties():
+    sessions = [
+        session("api", last_activity="2026-01-01T09:00:00"),
+        session("api", last_activity="2026-01-01T11:00:00"),
+        session("api"),
+        session("api", last_activity="2026-01-01T10:00:00"),
+    ]
+    assert search(sessions, "api") == [sessions[1], sessions[3], sessions[0], sessions[2]]
+
+
+def test_empty_query_lists_the_most_recent_first():
+    sessions = [
+        session("a"),
+        session("b", last_activity="2026-01-01T09:00:00"),
+        session("c"),
+        session("d", last_activity="2026-01-01T10:00:00"),
+        session("e", last_activity="not a date"),
+    ]
+    assert projects(search(sessions, "")) == ["d", "b", "a", "c", "e"]
+    assert projects(search(sessions, "   ")) == ["d", "b", "a", "c", "e"]
+
+
+def test_empty_index():
+    assert Search(SearchIndex([])).update("api") == []
+
+
+def test_keystrokes_match_searching_from_scratch():
+    rng = random.Random(17)
+    words = ["api", "web", "billing", "fix", "tests", "docs", "go", "python", "core", "ui"]
+    sessions = [
+        session(
+            "-".join(rng.sample(words, 2)),
+            " ".join(rng.sample(words, 3)),
+            rng.choice(["Python", "Go", "TypeScript", None]),
+            f"2026-01-01T{rng.randrange(24):02}:00:00",
+        )
+        for _ in range(200)
+    ]
+    index = SearchIndex(sessions)
+    incremental = Search(index)
+    typed = ""
+    for _ in range(300):
+        key = rng.choice("abcdefgilnoprstuwy   " + "\b" * 6)
+        typed = typed[:-1] if key == "\b" else typed + key
+        assert incremental.update(typed) == Search(index).update(typed), typed
+
+
+def test_repeated_and_backspaced_queries_reuse_results():
+    sessions = [session("billing-service"), session("core-billing"), session("web")]
+    search = Search(SearchIndex(sessions))
+    first = search.update("bi")
+    narrowed = search.update("bil")
+    assert search.update("bil") is narrowed
+    assert search.update("bi") is first
+    assert search.update("w") == [2]
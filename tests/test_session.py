@@ -0,0 +1,81 @@
+import dataclasses
+from datetime import datetime
+
+import pytest
+
+from claude_window_manager.session import ClaudeSession, RecordCache, sessions_from_dicts
+from claude_window_manager.window_detector import build_claude_sessions
+
+STARTED = datetime(2026, 1, 1, 9, 30)
+TITLE = "api — ✳ Fix tests — Python ◂ claude"
+
+
+def test_record_cache_reuses_values_across_one_tick():
+    cache = RecordCache()
+    made = []
+
+    def make(key):
+        return lambda: made.append(key) or [key]
+
+    first = cache.reuse("a", make("a"))
+    assert cache.reuse("a", make("a")) is first  # Same tick
+    cache.tick()
+    assert cache.reuse("a", make("a")) is first
+    assert cache.reuse("b", make("b")) == ["b"]
+    assert made == ["a", "b"]
+
+    cache.tick()
+    cache.tick()  # A tick that didn't use "a" forgets it
+    assert cache.reuse("a", make("a")) is not first
+    assert made == ["a", "b", "a"]
+
+
+def test_sessions_from_dicts_rebuilds_only_changed_records():
+    cache = RecordCache()
+    api = ClaudeSession(1, TITLE, "api", "Fix tests", "Python", 4242, "ttys001", STARTED)
+    web = ClaudeSession(2, "web — ✳ Docs — Markdown ◂ claude", "web", "Docs", None, 4343, "ttys002", None)
+    first = sessions_from_dicts([api.to_dict(), web.to_dict()], cache)
+    assert first == [api, web]
+
+    retitled = dataclasses.replace(web, topic="Ship docs")
+    second = sessions_from_dicts([api.to_dict(), retitled.to_dict()], cache)
+    assert second[0] is first[0]
+    assert second[1] is not first[1]
+    assert second[1] == retitled
+
+
+def test_build_claude_sessions_reuses_unchanged_windows():
+    cache = RecordCache()
+    processes = {"ttys001": (4242, STARTED), "ttys002": (4343, STARTED)}
+    windows = [(1, TITLE, "ttys001"), (2, "web — ✳ Docs — Markdown ◂ claude", "ttys002"), (3, "zsh", "ttys003")]
+    first = build_claude_sessions(windows, processes, cache)
+    cache.tick()
+    assert [s.window_id for s in first] == [1, 2]
+
+    # Window 2 is retitled; window 1's process restarts
+    processes = {"ttys001": (5000, datetime(2026, 1, 1, 10)), "ttys002": (4343, STARTED)}
+    windows[1] = (2, "web — ✳ Ship docs — Markdown ◂ claude", "ttys002")
+    second = build_claude_sessions(windows, processes, cache)
+    assert second[0] is not first[0] and second[0].pid == 5000
+    assert second[1] is not first[1] and second[1].topic == "Ship docs"
+    cache.tick()
+
+    third = build_claude_sessions(windows, processes, cache)
+    assert third[0] is second[0] and third[1] is second[1]
+
+
+def test_sessions_are_immutable_with_shared_strings():
+    a = ClaudeSession(1, TITLE, "".join(["a", "pi"]), "Fix tests", None, None, None, None)
+    b = ClaudeSession(2, TITLE, "".join(["ap", "i"]), "Fix tests", None, None, None, None)
+    assert a.project is b.project
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        a.topic = "Other"
+    assert not hasattr(a, "__dict__")
+
+
+def test_runtime_at_a_single_clock_reading():
+    session = ClaudeSession(1, TITLE, "api", None, None, None, None, STARTED)
+    now = datetime(2026, 1, 2, 13, 45)
+    assert session.runtime_display_at(now) == "1d 4h"
+    assert session.runtime_display_at(datetime(2026, 1, 1, 9, 37)) == "7m"
+    assert dataclasses.replace(session, start_time=None).runtime_display_at(now) == ""
@@ -0,0 +1,48 @@
+import gc
+import sys
+
+from claude_window_manager.diff import diff_sessions
+from claude_window_manager.indexer import SessionIndexer, collect_snapshot
+from claude_window_manager.simulator import Simulator
+
+WARMUP = 1000
+CYCLES = 2000
+# Allowance for allocator and thread bookkeeping that settles slowly; a
+# leak of one object per cycle would be well over it
+MAX_GROWTH = 500  # Allocated blocks
+
+
+def test_memory_stays_flat_across_refresh_cycles():
+    # Windows opening, closing and being renamed between refreshes
+    sims = [Simulator(windows=n, processes=200, seed=n) for n in (20, 24, 18, 24)]
+    indexer = SessionIndexer(collect=collect_snapshot, watch=False)
+    rows: dict[int, tuple] = {}  # What a menu keeps per session
+    sessions = []
+
+    def cycle(i: int) -> None:
+        nonlocal sessions
+        with sims[i % len(sims)].install():
+            indexer.refresh()
+        new = indexer.terminal_sessions()
+        diff = diff_sessions(sessions, new)
+        for session in diff.removed:
+            del rows[session.window_id]
+        for session in diff.added:
+            rows[session.window_id] = (session.display_name, session.display_topic)
+        for _, session in diff.changed:
+            rows[session.window_id] = (session.display_name, session.display_topic)
+        sessions = new
+
+    def allocated_blocks() -> int:
+        gc.collect()
+        return sys.getallocatedblocks()
+
+    for i in range(WARMUP):
+        cycle(i)
+    start = allocated_blocks()
+    for i in range(WARMUP, WARMUP + CYCLES):
+        cycle(i)
+    end = allocated_blocks()
+
+    assert len(rows) == len(sessions)
+    assert end - start < MAX_GROWTH
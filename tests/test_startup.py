@@ -0,0 +1,11 @@
+import os
+
+from claude_window_manager.bench import check_startup
+
+# Shared machines are slower and noisier than the developer machines the
+# budgets are set for; CWM_STARTUP_SCALE=1 checks them as `bench --startup` does
+SCALE = float(os.environ.get("CWM_STARTUP_SCALE", "1.5"))
+
+
+def test_cli_entry_paths_stay_within_budget_and_allow_list():
+    assert check_startup(SCALE, repeat=3) == []
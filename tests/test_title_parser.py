@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from claude_window_manager.bench import legacy_parse_window_name
+from claude_window_manager.simulator import title_corpus
+from claude_window_manager.window_detector import (
+    TITLE_CACHE_SIZE,
+    _parse_title,
+    is_claude_title,
+    parse_window_name,
+)
+
+# Pieces random titles are assembled from, biased towards the tricky parts
+TITLE_FRAGMENTS = [
+    "claude", "Claude", "CLAUDE", "claudes", " ◂ claude", "◂", "✳", " ✳ ", "—", " — ", "-", " - ",
+    " ", "  ", "\t", "\n", "ai-app-builder", "Fix flaky tests", "Python", "Rust", "C++", "v2",
+    "x", "é", "名前", "🚀", ",", "#482", "", "— Python ◂ claude",
+]
+
+
+def random_titles(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choices(TITLE_FRAGMENTS, k=rng.randint(0, 10))) for _ in range(count)]
+
+
+TITLES = sorted(set(title_corpus(1000) + random_titles(5000)))
+
+
+@pytest.fixture(autouse=True)
+def cold_cache():
+    _parse_title.cache_clear()
+    yield
+    _parse_title.cache_clear()
+
+
+@pytest.mark.parametrize("title", TITLES)
+def test_matches_the_legacy_parser(title):
+    assert parse_window_name(title) == legacy_parse_window_name(title)
+    assert is_claude_title(title) == ("claude" in title.lower())
+
+
+def test_title_formats():
+    assert parse_window_name("ai-app-builder — ✳ Evaluations Package — Python ◂ claude") == (
+        "ai-app-builder", "Evaluations Package", "Python"
+    )
+    assert parse_window_name("api — ✳ Fix tests ◂ claude") == ("api", "Fix tests ◂ claude", None)
+    assert parse_window_name("api — claude") == ("api", None, None)
+    assert parse_window_name("zsh — 80×24") == ("zsh — 80×24", None, None)
+    assert not is_claude_title("zsh — 80×24")
+
+
+def test_parses_are_cached_and_shared():
+    title = "api — ✳ Fix tests — Python ◂ claude"
+    assert is_claude_title(title)
+    first = parse_window_name(title)
+    info = _parse_title.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+    assert parse_window_name(title)[0] is first[0]  # From the cached parse
+    assert _parse_title.cache_info().hits == 2
+
+
+def test_cache_is_bounded():
+    for i in range(TITLE_CACHE_SIZE + 10):
+        is_claude_title(f"project{i} — claude")
+    assert _parse_title.cache_info().currsize == TITLE_CACHE_SIZE
+    # The oldest titles were evicted and parse the same again
+    assert parse_window_name("project0 — claude") == ("project0", None, None)
+    assert _parse_title.cache_info().misses == TITLE_CACHE_SIZE + 11
@@ -0,0 +1,204 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import pytest
+
+from claude_window_manager import tmux_backend
+from claude_window_manager.applescript import FIELD_SEP
+from claude_window_manager.manifest import LaunchSpec
+from claude_window_manager.session import RecordCache
+from claude_window_manager.tmux_backend import (
+    TmuxControl,
+    TmuxPane,
+    build_tmux_sessions,
+    get_tmux_panes_async,
+    launch_claude_tmux_session,
+    launch_claude_tmux_sessions,
+    parse_panes,
+    switch_to_pane,
+)
+
+STARTED = datetime(2026, 1, 1, 9, 30)
+TITLE = "api — ✳ Fix tests — Python ◂ claude"
+
+
+def pane_line(*fields) -> str:
+    return FIELD_SEP.join(str(field) for field in fields)
+
+
+def pane(pane_id="%3", tty="ttys003", title=TITLE, path="/src/api") -> TmuxPane:
+    return TmuxPane("main", 1, 0, pane_id, tty, 100, title, "node", path)
+
+
+def test_parse_panes():
+    output = "\n".join([
+        pane_line("main", 1, 0, "%3", "/dev/ttys003", 100, TITLE, "node", "/src/api"),
+        pane_line("main", 2, 1, "%7", "/dev/pts/4", 200, "host.local", "zsh", "/src/web"),
+        pane_line("too", "few", "fields"),
+        pane_line("main", "x", 0, "%8", "/dev/ttys005", 300, "t", "zsh", "/"),  # Bad window index
+        "",
+    ])
+    assert parse_panes(output) == [
+        TmuxPane("main", 1, 0, "%3", "ttys003", 100, TITLE, "node", "/src/api"),
+        TmuxPane("main", 2, 1, "%7", "pts/4", 200, "host.local", "zsh", "/src/web"),
+    ]
+
+
+def test_build_tmux_sessions_joins_the_process_table():
+    titled = pane("%3", "ttys003")
+    untitled = pane("%7", "ttys007", title="host.local", path="/src/web")
+    shell = pane("%9", "ttys009", title="host.local")
+    sessions = build_tmux_sessions([titled, untitled, shell], {"ttys007": (4242, STARTED)})
+
+    assert [s.window_id for s in sessions] == [3, 7]
+    api, web = sessions
+    assert (api.project, api.topic, api.pid, api.tty) == ("api", "Fix tests", None, "ttys003")
+    # Titles that don't follow the Claude format fall back to the directory
+    assert (web.project, web.topic, web.pid, web.start_time) == ("web", None, 4242, STARTED)
+    assert web.window_name == "host.local"
+
+
+def test_build_tmux_sessions_reuses_unchanged_records():
+    cache = RecordCache()
+    first = build_tmux_sessions([pane("%3"), pane("%4")], {}, cache)
+    second = build_tmux_sessions([pane("%3"), pane("%4", title="api — ✳ Ship it — Python ◂ claude")], {}, cache)
+    assert second[0] is first[0]
+    assert second[1] is not first[1]
+    assert second[1].topic == "Ship it"
+
+
+# Against a private tmux server: TMUX_TMPDIR moves the default socket, so
+# plain `tmux` calls in the code under test never reach the user's server
+
+
+def tmux(*args) -> str:
+    return subprocess.run(["tmux", *args], capture_output=True, text=True, check=True).stdout
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.fixture
+def tmux_server(monkeypatch):
+    if shutil.which("tmux") is None:
+        pytest.skip("tmux is not installed")
+    # Socket paths are length-limited, so not under pytest's tmp_path
+    root = tempfile.mkdtemp(prefix="cwm-tmux-")
+    bin_dir = os.path.join(root, "bin")
+    os.mkdir(bin_dir)
+    claude = os.path.join(bin_dir, "claude")
+    with open(claude, "w") as f:
+        f.write("#!/bin/sh\nexec sleep 600\n")
+    os.chmod(claude, 0o755)
+
+    monkeypatch.setenv("TMUX_TMPDIR", root)
+    monkeypatch.setenv("PATH", bin_dir + os.pathsep + os.environ["PATH"])
+    monkeypatch.delenv("TMUX", raising=False)
+    tmux("-f", "/dev/null", "new-session", "-d", "-s", "cwm-test", "-x", "80", "-y", "24", "-c", root, "sleep 600")
+    try:
+        yield root
+    finally:
+        subprocess.run(["tmux", "kill-server"], capture_output=True)
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def test_panes_of_a_live_server(tmux_server):
+    tmux("select-pane", "-t", "cwm-test:0.0", "-T", TITLE)
+    (live,) = asyncio.run(get_tmux_panes_async())
+    assert (live.session, live.window, live.pane) == ("cwm-test", 0, 0)
+    assert live.title == TITLE
+    assert live.command == "sleep"
+    assert os.path.realpath(live.path) == os.path.realpath(tmux_server)
+    assert live.pane_id.startswith("%") and live.tty
+
+    (session,) = build_tmux_sessions([live], {})
+    assert session.window_id == int(live.pane_id[1:])
+    assert (session.project, session.topic) == ("api", "Fix tests")
+
+
+def test_launch_opens_titled_windows(tmux_server):
+    project = os.path.join(tmux_server, "api")
+    os.mkdir(project)
+    assert launch_claude_tmux_session(project, "Fix tests")
+    specs = [LaunchSpec(project, "Review", (0, 0, 0)), LaunchSpec(tmux_server, "Plan", (0, 0, 0))]
+    assert launch_claude_tmux_sessions(specs) == [None, None]
+
+    panes = [p for p in asyncio.run(get_tmux_panes_async()) if p.command == "sleep" and p.window > 0]
+    titles = [p.title for p in sorted(panes, key=lambda p: p.window)]
+    assert titles == ["api — ✳ Fix tests", "api — ✳ Review", f"{os.path.basename(tmux_server)} — ✳ Plan"]
+    assert tmux("display-message", "-p", "-t", "cwm-test:1", "#{window_name}").strip() == "api — ✳ Fix tests"
+
+
+def test_launch_reports_every_spec_failed_without_a_server(tmux_server):
+    tmux("kill-server")
+    specs = [LaunchSpec("/src/api", "Fix tests", (0, 0, 0))] * 2
+    errors = launch_claude_tmux_sessions(specs)
+    assert len(errors) == 2
+    assert all(errors)
+    assert launch_claude_tmux_sessions([]) == []
+
+
+def test_switch_selects_the_pane_and_its_window(tmux_server):
+    first = tmux("display-message", "-p", "-t", "cwm-test:0.0", "#{pane_id}").strip()
+    tmux("new-window", "-t", "cwm-test", "sleep 600")
+    tmux("split-window", "-t", "cwm-test:0", "sleep 600")
+    assert tmux("display-message", "-p", "-t", "cwm-test", "#{window_index}").strip() == "1"
+
+    assert switch_to_pane(int(first[1:]))
+    active = tmux("display-message", "-p", "-t", "cwm-test", "#{window_index} #{pane_id}").split()
+    assert active == ["0", first]
+    assert not switch_to_pane(99999)
+
+
+def test_control_mode_reports_window_and_title_changes(tmux_server, monkeypatch):
+    monkeypatch.setattr(tmux_backend, "RECONNECT_DELAY", 0.1)
+    events = []
+    control = TmuxControl(lambda name, args: events.append((name, args)))
+    control.start()
+    try:
+        # The subscription sends its first value once the client is attached
+        assert wait_for(lambda: any(name == "%subscription-changed" for name, _ in events))
+        events.clear()
+
+        tmux("new-window", "-t", "cwm-test", "sleep 600")
+        assert wait_for(lambda: any(name == "%window-add" for name, _ in events))
+        assert all(name in tmux_backend.EVENTS for name, _ in events)
+
+        events.clear()
+        tmux("select-pane", "-t", "cwm-test:0.0", "-T", "api — ✳ Renamed")
+        assert wait_for(lambda: events)
+        name, args = events[0]
+        assert name == "%subscription-changed"
+        assert args[0] == "cwm-titles"
+        # "cwm-titles $session @window index %pane : value"
+        assert " ".join(args[args.index(":") + 1:]) == "api — ✳ Renamed"
+    finally:
+        control.stop()
+
+
+def test_control_mode_reconnects_to_a_new_server(tmux_server, monkeypatch):
+    monkeypatch.setattr(tmux_backend, "RECONNECT_DELAY", 0.1)
+    events = []
+    control = TmuxControl(lambda name, args: events.append(name))
+    control.start()
+    try:
+        assert wait_for(lambda: "%subscription-changed" in events)
+        tmux("kill-server")
+        events.clear()
+        # The old server may still be shutting down
+        new_session = ["tmux", "-f", "/dev/null", "new-session", "-d", "-s", "cwm-again", "sleep 600"]
+        assert wait_for(lambda: subprocess.run(new_session, capture_output=True).returncode == 0)
+        assert wait_for(lambda: "%subscription-changed" in events)
+    finally:
+        control.stop()
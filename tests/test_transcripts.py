@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from claude_window_manager import transcripts
+from claude_window_manager.transcripts import HEAD_SIZE, TAIL_SIZE, TranscriptTailer
+
+
+def entry(kind, timestamp, stop_reason=None, cwd="/src/web"):
+    line = {"type": kind, "cwd": cwd, "timestamp": timestamp}
+    if stop_reason:
+        line["message"] = {"stop_reason": stop_reason}
+    return json.dumps(line) + "\n"
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "-src-web").mkdir()
+    return tmp_path
+
+
+def test_unseen_long_transcript_is_read_from_head_and_tail(root):
+    path = root / "-src-web" / "a.jsonl"
+    filler = entry("user", "2025-01-01T00:00:00Z")
+    with open(path, "w") as f:
+        f.write(json.dumps({"type": "summary", "summary": "Fix tests"}) + "\n")
+        for _ in range((HEAD_SIZE + TAIL_SIZE) * 4 // len(filler)):
+            f.write(filler)
+        f.write(entry("assistant", "2025-01-02T00:00:00Z", "end_turn"))
+    size = path.stat().st_size
+
+    tailer = TranscriptTailer(root, state_path=None)
+    status = tailer.update()[str(path)]
+
+    assert tailer.bytes_read <= HEAD_SIZE + TAIL_SIZE
+    assert tailer.files[str(path)].offset == size
+    assert status.topic == "Fix tests"
+    assert status.cwd == "/src/web"
+    assert status.waiting_for_input
+    assert status.last_activity == pytest.approx(1735776000.0)
+
+
+def test_short_transcript_is_read_in_full(root):
+    path = root / "-src-web" / "a.jsonl"
+    path.write_text(entry("user", "2025-01-01T00:00:00Z") + entry("assistant", "2025-01-01T00:01:00Z", "end_turn"))
+
+    tailer = TranscriptTailer(root, state_path=None)
+    tailer.update()
+
+    assert tailer.bytes_read == path.stat().st_size
+
+
+def test_watched_updates_read_only_changed_transcripts(root):
+    a, b = root / "-src-web" / "a.jsonl", root / "-src-web" / "b.jsonl"
+    a.write_text(entry("user", "2025-01-01T00:00:00Z"))
+    tailer = TranscriptTailer(root, state_path=None)
+    tailer.watched = True
+    tailer.update()  # The first update still scans
+
+    with open(a, "a") as f:
+        f.write(entry("assistant", "2025-01-01T00:01:00Z", "end_turn"))
+    b.write_text(entry("user", "2025-01-01T00:02:00Z"))
+    statuses = tailer.update()
+    assert not statuses[str(a)].waiting_for_input
+    assert str(b) not in statuses
+
+    tailer.changed([str(a)])
+    statuses = tailer.update()
+    assert statuses[str(a)].waiting_for_input
+    assert str(b) not in statuses
+
+    # A directory (or the root, after dropped events) means scanning again
+    tailer.changed([str(root / "-src-web")])
+    assert str(b) in tailer.update()
+
+
+def test_unwatched_updates_scan_every_time(root):
+    tailer = TranscriptTailer(root, state_path=None)
+    tailer.update()
+    path = root / "-src-web" / "a.jsonl"
+    path.write_text(entry("user", "2025-01-01T00:00:00Z"))
+
+    assert str(path) in tailer.update()
+
+
+def test_state_is_saved_at_most_once_per_interval(root, tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(transcripts.time, "monotonic", lambda: clock[0])
+    state_path = tmp_path / "state.json"
+    path = root / "-src-web" / "a.jsonl"
+    path.write_text(entry("user", "2025-01-01T00:00:00Z"))
+    tailer = TranscriptTailer(root, state_path=state_path)
+
+    tailer.update()
+    saved = state_path.read_text()
+    with open(path, "a") as f:
+        f.write(entry("assistant", "2025-01-01T00:01:00Z", "end_turn"))
+    tailer.update()
+    assert state_path.read_text() == saved
+
+    tailer.save(force=True)
+    assert state_path.read_text() != saved
+    restored = TranscriptTailer(root, state_path=state_path)
+    assert restored.files[str(path)].offset == path.stat().st_size
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from claude_window_manager.usage import collect_usage
+
+TRANSCRIPT = json.dumps({
+    "type": "assistant",
+    "cwd": "/src/web",
+    "timestamp": "2025-01-01T00:00:00Z",
+    "message": {"id": "m1", "usage": {"input_tokens": 10, "output_tokens": 5}},
+}) + "\n"
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_unreadable_transcripts_are_skipped(tmp_path, jobs):
+    (tmp_path / "-src-web").mkdir()
+    (tmp_path / "-src-web" / "a.jsonl").write_text(TRANSCRIPT)
+    (tmp_path / "-src-web" / "b.jsonl").write_text(TRANSCRIPT.replace("m1", "m2"))
+    (tmp_path / "-src-web" / "broken.jsonl").mkdir()  # stat()s fine, can't be read
+    cache_path = tmp_path / "cache.json"
+
+    usages, scanned = collect_usage(tmp_path, jobs=jobs, cache_path=cache_path)
+
+    assert sorted(u.session_id for u in usages) == ["a", "b"]
+    assert scanned == 3
+    cached = json.loads(cache_path.read_text())["files"]
+    assert not any(path.endswith("broken.jsonl") for path in cached)
+
+
+def run_cli(*args):
+    env = {**os.environ, "PYTHONPATH": str(Path(__file__).resolve().parents[1] / "src")}
+    return subprocess.run(
+        [sys.executable, "-m", "claude_window_manager.cli", *args],
+        capture_output=True, text=True, timeout=60, env=env,
+    )
+
+
+def test_stats_and_stats_usage_json_flags_are_separate():
+    projects = Path(os.environ["CLAUDE_CONFIG_DIR"]) / "projects" / "-src-web"
+    projects.mkdir(parents=True, exist_ok=True)
+    (projects / "a.jsonl").write_text(TRANSCRIPT)
+
+    usage_json = run_cli("stats", "usage", "--json", "--no-cache")
+    assert json.loads(usage_json.stdout)[0]["project"] == "web"
+
+    table = run_cli("stats", "--json", "usage", "--no-cache")
+    assert table.returncode == 0
+    assert "Usage from 1 transcripts" in table.stdout
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import pytest
+
+from claude_window_manager.watcher import Debouncer, InotifyBackend, PollingBackend
+
+
+class Reports:
+    """Collects what a backend or debouncer reports, and waits for it."""
+
+    def __init__(self):
+        self.items = []
+        self._cond = threading.Condition()
+
+    def __call__(self, paths, structural):
+        with self._cond:
+            self.items.append((set(paths), structural))
+            self._cond.notify_all()
+
+    def wait(self, predicate, timeout=5.0):
+        with self._cond:
+            assert self._cond.wait_for(lambda: predicate(self.items), timeout), self.items
+
+
+def test_debouncer_coalesces_and_reports_structural_if_any_change_was():
+    reports = Reports()
+    debouncer = Debouncer(reports, debounce=0.05, max_delay=1.0)
+    debouncer.start()
+    try:
+        debouncer.add(["/p/a.jsonl"])
+        debouncer.add(["/p/b.jsonl"], structural=True)
+        reports.wait(lambda items: items)
+        debouncer.add(["/p/a.jsonl"])
+        reports.wait(lambda items: len(items) == 2)
+    finally:
+        debouncer.stop()
+
+    assert reports.items == [({"/p/a.jsonl", "/p/b.jsonl"}, True), ({"/p/a.jsonl"}, False)]
+
+
+def test_debouncer_ignores_irrelevant_paths():
+    reports = Reports()
+    debouncer = Debouncer(reports, debounce=0.01)
+    debouncer.add(["/p/.a.jsonl.swp", __file__])
+    assert not debouncer._pending
+
+
+def _split(items):
+    structural = set().union(*(paths for paths, s in items if s))
+    modified = set().union(*(paths for paths, s in items if not s))
+    return structural, modified
+
+
+def _exercise(backend, root, timeout=5.0):
+    """Append to one transcript and create another; return (structural, modified) paths."""
+    existing = root / "proj" / "a.jsonl"
+    reports = Reports()
+    backend.start(reports)
+    try:
+        time.sleep(0.05)
+        with open(existing, "a") as f:
+            f.write('{"type":"user"}\n')
+        (root / "proj" / "b.jsonl").write_text("")
+        reports.wait(
+            lambda items: str(existing) in _split(items)[1]
+            and str(root / "proj" / "b.jsonl") in _split(items)[0],
+            timeout,
+        )
+    finally:
+        backend.stop()
+    return _split(reports.items)
+
+
+@pytest.fixture
+def projects(tmp_path):
+    (tmp_path / "proj").mkdir()
+    (tmp_path / "proj" / "a.jsonl").write_text('{"type":"summary"}\n')
+    return tmp_path
+
+
+def test_polling_backend_reports_appends_apart_from_new_files(projects):
+    # mtimes may not move within a scan interval on coarse filesystems; the
+    # size change is what's detected
+    structural, modified = _exercise(PollingBackend(projects, interval=0.05), projects)
+
+    assert str(projects / "proj" / "b.jsonl") in structural
+    assert str(projects / "proj" / "a.jsonl") not in structural
+
+
+@pytest.mark.skipif(not InotifyBackend.available(), reason="needs inotify")
+def test_inotify_backend_reports_appends_apart_from_new_files(projects):
+    structural, modified = _exercise(InotifyBackend(projects), projects)
+
+    assert str(projects / "proj" / "b.jsonl") in structural
+    assert str(projects / "proj" / "a.jsonl") not in structural
+    assert str(projects / "proj" / "b.jsonl") not in modified
+
+
+@pytest.mark.skipif(not InotifyBackend.available(), reason="needs inotify")
+def test_inotify_backend_reports_removals_as_structural(projects):
+    reports = Reports()
+    backend = InotifyBackend(projects)
+    backend.start(reports)
+    try:
+        os.remove(projects / "proj" / "a.jsonl")
+        reports.wait(lambda items: str(projects / "proj" / "a.jsonl") in _split(items)[0])
+    finally:
+        backend.stop()
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+from claude_window_manager import window_detector
+from claude_window_manager.session import RecordCache
+from claude_window_manager.window_detector import build_claude_sessions, parse_process_table
+
+HEADER = "  PID TTY      STARTED                      COMMAND\n"
+
+
+def ps(*rows: tuple[int, str, str, str]) -> str:
+    return HEADER + "".join(f"{pid:>5} {tty:<8} {lstart} {comm}\n" for pid, tty, lstart, comm in rows)
+
+
+@pytest.fixture(autouse=True)
+def fresh_start_times(monkeypatch):
+    monkeypatch.setattr(window_detector, "_start_times", {})
+
+
+def test_claude_processes_are_keyed_by_tty():
+    output = ps(
+        (501, "ttys003", "Mon Jan  6 09:15:02 2025", "claude"),
+        (502, "ttys004", "Mon Jan  6 10:00:00 2025", "-zsh"),
+        (503, "??", "Mon Jan  6 10:01:00 2025", "claude"),
+        (504, "ttys005", "Tue Jan  7 18:30:59 2025", "/usr/local/bin/claude --resume"),
+    )
+    assert parse_process_table(output) == {
+        "ttys003": (501, datetime(2025, 1, 6, 9, 15, 2)),
+        "ttys005": (504, datetime(2025, 1, 7, 18, 30, 59)),
+    }
+
+
+def test_the_oldest_claude_process_on_a_tty_wins():
+    # The session's own process, not the claude subprocesses it starts
+    output = ps(
+        (610, "ttys003", "Mon Jan  6 09:20:00 2025", "claude"),
+        (600, "ttys003", "Mon Jan  6 09:15:00 2025", "claude"),
+        (620, "ttys003", "Mon Jan  6 09:25:00 2025", "claude"),
+    )
+    assert parse_process_table(output)["ttys003"][0] == 600
+
+
+def test_malformed_lines_are_skipped():
+    output = HEADER + "  abc ttys003 Mon Jan  6 09:15:02 2025 claude\n  701 ttys004 claude\n"
+    output += ps((702, "ttys005", "Mon Xyz  6 09:15:02 2025", "claude")).removeprefix(HEADER)
+    assert parse_process_table(output) == {}
+
+
+def test_start_times_are_reused_while_the_pid_lives():
+    output = ps((501, "ttys003", "Mon Jan  6 09:15:02 2025", "claude"))
+    first = parse_process_table(output)["ttys003"][1]
+    assert parse_process_table(output)["ttys003"][1] is first
+
+
+def test_reused_pids_get_their_new_start_time():
+    parse_process_table(ps((501, "ttys003", "Mon Jan  6 09:15:02 2025", "claude")))
+    again = parse_process_table(ps((501, "ttys003", "Wed Jan  8 11:00:00 2025", "claude")))
+    assert again["ttys003"] == (501, datetime(2025, 1, 8, 11, 0, 0))
+
+
+def test_exited_pids_are_evicted():
+    parse_process_table(ps(
+        (501, "ttys003", "Mon Jan  6 09:15:02 2025", "claude"),
+        (502, "ttys004", "Mon Jan  6 09:16:02 2025", "claude"),
+    ))
+    parse_process_table(ps((502, "ttys004", "Mon Jan  6 09:16:02 2025", "claude")))
+    assert set(window_detector._start_times) == {502}
+
+
+def test_sessions_join_windows_to_processes_on_tty():
+    processes = parse_process_table(ps((501, "ttys003", "Mon Jan  6 09:15:02 2025", "claude")))
+    windows = [
+        (11, "web — ✳ Fix tests — claude", "ttys003"),
+        (12, "notes — ✳ Plan — claude", "ttys009"),
+        (13, "~ — -zsh", "ttys004"),
+    ]
+    sessions = build_claude_sessions(windows, processes, RecordCache())
+    assert [(s.window_id, s.pid, s.start_time) for s in sessions] == [
+        (11, 501, datetime(2025, 1, 6, 9, 15, 2)),
+        (12, None, None),
+    ]